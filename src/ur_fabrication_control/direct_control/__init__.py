@@ -23,7 +23,11 @@ Describe typical classes found in project
 from .communication import *
 from .mixins import*
 from .common import *
+from .script_buffer import *
+from .script_passes import *
+from .script_library import *
 from .urscript import *
+from .pose_query import *
 from .fabrication_process import *
 
 __all__ = []
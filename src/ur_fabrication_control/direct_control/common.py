@@ -1,20 +1,16 @@
-import os
-import sys
-import socket
-import time
 from ur_fabrication_control.direct_control.urscript import URScript
-from ur_fabrication_control.direct_control.communication import TCPFeedbackServer
-from threading import Thread
-if sys.version_info[0] == 3:
-    from queue import Queue
-else:
-    from Queue import Queue
+from ur_fabrication_control.direct_control.communication import send_to, send_direct
+from ur_fabrication_control.direct_control.communication.connection_pool import ConnectionError
+from ur_fabrication_control.direct_control.pose_query import get_pose_service
+from ur_fabrication_control.direct_control import utilities
 
 __all__ = [
     'is_available',
     'send_script',
     'send_stop',
     'generate_moves_linear',
+    'generate_moves_linear_stream',
+    'generate_pose_stream',
     'generate_script_pick_and_place_block',
     'generate_airpick_toggle',
     'generate_areagrip_toggle',
@@ -24,13 +20,19 @@ __all__ = [
 
 
 
-def is_available(ip):
-    """Ping the UR network to check for availability.
+def is_available(ip, refresh=False):
+    """Check if the UR Robot accepts connections.
+
+    The result is cached for a few seconds, see
+    :class:`ReachabilityCache`.
 
     Parameters
     ----------
     ip : string
         IP of the UR Robot.
+    refresh : boolean
+        Set to "True" to probe even if a cached result exists.
+        Default set to "False".
 
     Returns
     -------
@@ -39,12 +41,7 @@ def is_available(ip):
         "False" if unavailable.
 
     """
-    system_call = "ping -r 1 -n 1 {}".format(ip)
-    response = os.system(system_call)
-    if response == 0:
-        return True
-    else:
-        return False
+    return utilities.is_available(ip, refresh)
 
 
 def send_script(script, ip, port=30002):
@@ -68,19 +65,19 @@ def send_script(script, ip, port=30002):
 
     """
     try:
-        s = socket.create_connection((ip, port), timeout=2)
-    except socket.timeout:
+        send_to(ip, port, script.encode('utf-8'))  # encoding allows use of python 3.7
+    except ConnectionError:
         print("UR with ip {} not available on port {}".format(ip, port))
-    finally:
-        enc_script = script.encode('utf-8')  # encoding allows use of python 3.7
-        s.send(enc_script)
-        print("Script sent to {} on port {}".format(ip, port))
-        s.close()
+        raise
+    print("Script sent to {} on port {}".format(ip, port))
 
 
 def send_stop(ip, port):
     """Send stop script to the UR Robot.
 
+    The script is sent on a new connection, so it does not wait for an
+    upload on the pooled connection, see :func:`send_direct`.
+
     Parameters
     ----------
     ip : string
@@ -98,8 +95,7 @@ def send_stop(ip, port):
     ur_cmds.start()
     ur_cmds.add_line("\tstopl(0.5)")
     ur_cmds.end()
-    ur_cmds.generate()
-    ur_cmds.send_script()
+    send_direct(ip, port, ur_cmds.generate())
 
 
 def generate_moves_linear(tcp, frames, ur_ip, ur_port, velocity=0.05, radius=0):
@@ -146,6 +142,95 @@ def generate_moves_linear(tcp, frames, ur_ip, ur_port, velocity=0.05, radius=0):
     return ur_cmds
 
 
+def generate_moves_linear_stream(tcp, server_ip, server_port, ur_ip, ur_port, timeout=2):
+    """Generate linear movements fed at runtime by a path server.
+
+    The script stays the same size for any path length, the waypoints are
+    served by a :class:`PathStreamServer` at ``server_ip:server_port``.
+
+    Parameters
+    ----------
+    tcp : sequence of float
+        Tool center point in a form of list.
+        tcp = [x, y, z, dx, dy, dz]
+
+    server_ip : string
+        IP of the path server.
+
+    server_port : integer
+        Port number of the path server.
+
+    ur_ip : string
+        IP of the UR Robot.
+
+    ur_port : integer
+        Port number of the UR Robot.
+
+    timeout : float
+        Time in seconds the robot waits for the next waypoint.
+        Default set to 2.
+
+    Returns
+    -------
+    object
+        URScript
+
+    """
+    ur_cmds = URScript(ur_ip=ur_ip, ur_port=ur_port)
+    ur_cmds.start()
+    ur_cmds.set_tcp(tcp)
+    ur_cmds.set_socket(server_ip, server_port, "Pathserver")
+    ur_cmds.socket_open("Pathserver")
+    ur_cmds.moves_linear_stream("Pathserver", address=(server_ip, server_port), timeout=timeout)
+    ur_cmds.socket_close("Pathserver")
+    ur_cmds.end()
+    ur_cmds.generate()
+    return ur_cmds
+
+
+def generate_pose_stream(server_ip, server_port, ur_ip, ur_port, rate=10, cartesian=True, joints=True):
+    """Generate a program streaming the current poses to a pose stream server.
+
+    The program keeps running until it is stopped or replaced by another
+    program. Programs sent while the robot works can stream the poses
+    themselves with :meth:`URSocketComm.socket_stream_poses`.
+
+    Parameters
+    ----------
+    server_ip : string
+        IP of the :class:`PoseStreamServer`.
+
+    server_port : integer
+        Port number of the :class:`PoseStreamServer`.
+
+    ur_ip : string
+        IP of the UR Robot.
+
+    ur_port : integer
+        Port number of the UR Robot.
+
+    rate : float
+        Number of poses sent per second.
+        Default set to 10.
+
+    Returns
+    -------
+    object
+        URScript
+
+    """
+    ur_cmds = URScript(ur_ip=ur_ip, ur_port=ur_port)
+    ur_cmds.start()
+    ur_cmds.set_socket(server_ip, server_port, "Posestream")
+    ur_cmds.socket_open("Posestream")
+    ur_cmds.socket_stream_poses(rate, cartesian, joints, socket_name="Posestream",
+                                address=(server_ip, server_port))
+    ur_cmds.add_lines(["while True:", "\tsleep(1)", "end"])
+    ur_cmds.end()
+    ur_cmds.generate()
+    return ur_cmds
+
+
 def generate_script_pick_and_place_block(tcp, frames, ur_ip, ur_port, velocity = 0.05, radius = 0, vacuum_on=2, vacuum_off=5):
     """Generate multiple linear movements and Airpick on/off commands.
 
@@ -289,7 +374,7 @@ def generate_areagrip_toggle(toggle, ur_ip, ur_port, sleep):
     return ur_cmds
 
 
-def get_current_pose_cartesian(tcp, server_ip, server_port, ur_ip, ur_port, send=False):
+def get_current_pose_cartesian(tcp, server_ip, server_port, ur_ip, ur_port, send=False, service=None):
     """Get the current cartesian coordinates of the UR Robot.
 
     Parameters
@@ -314,33 +399,20 @@ def get_current_pose_cartesian(tcp, server_ip, server_port, ur_ip, ur_port, send
         Set to "True" to also send the current pose from the UR Robot to the server.
         Default set to "False" to only print out on the UR Robot's display.
 
+    service : :class:`PoseQueryService`
+        Started service to query with, ``server_ip`` and ``server_port`` are
+        then ignored.
+        Default set to "None" to use the shared service of the server address.
+
     Returns
     -------
     msg : float
 
     """
-    ur_cmds = URScript(ur_ip=ur_ip, ur_port=ur_port)
-    ur_cmds.start()
-    ur_cmds.set_tcp(tcp)
-    ur_cmds.set_socket(server_ip, server_port, "Feedbackserver")
-    ur_cmds.socket_open("Feedbackserver")
-    ur_cmds.get_current_pose_cartesian(socket_name="Feedbackserver", send=send)
-    ur_cmds.socket_close(name="Feedbackserver")
-    ur_cmds.end()
-    ur_cmds.generate()
-    print(ur_cmds.script)
-    with TCPFeedbackServer(ip=server_ip, port=server_port) as server:
-        ur_cmds.send_script()
-        ms = 0
-        while len(server.msgs)==0 and ms<1000:
-            time.sleep(0.001)
-            ms += 1
-    return server.msgs.get(0, "Timed out")
-
-    # return _get_current_pose("cartesian", tcp, server_ip, server_port, ur_ip, ur_port, send)
+    return _get_current_pose("cartesian", server_ip, server_port, ur_ip, ur_port, tcp, send, service)
 
 
-def get_current_pose_joints(server_ip, server_port, ur_ip, ur_port, send=False):
+def get_current_pose_joints(server_ip, server_port, ur_ip, ur_port, send=False, service=None):
     """Get the current joint positions of the UR Robot.
 
     Parameters
@@ -361,49 +433,32 @@ def get_current_pose_joints(server_ip, server_port, ur_ip, ur_port, send=False):
         Set to "True" to also send the current pose from the UR Robot to the server.
         Default set to "False" to only print out on the UR Robot's display.
 
+    service : :class:`PoseQueryService`
+        Started service to query with, ``server_ip`` and ``server_port`` are
+        then ignored.
+        Default set to "None" to use the shared service of the server address.
+
     Returns
     -------
     msg : float
 
     """
-    ur_cmds = URScript(ur_ip=ur_ip, ur_port=ur_port)
-    ur_cmds.start()
-    ur_cmds.set_socket(server_ip, server_port, "Feedbackserver")
-    ur_cmds.socket_open("Feedbackserver")
-    ur_cmds.get_current_pose_joints(send)
-    ur_cmds.socket_close(name="Feedbackserver")
-    ur_cmds.end()
-    ur_cmds.generate()
-    with TCPFeedbackServer(ip=server_ip, port=server_port) as server:
-        ur_cmds.send_script()
-        ms = 0
-        while len(server.msgs)==0 and ms<1000:
-            time.sleep(0.001)
-            ms += 1
-    return server.msgs.get(0, "Timed out")
+    return _get_current_pose("joints", server_ip, server_port, ur_ip, ur_port, None, send, service)
+
+
+def _get_current_pose(pose_type, server_ip, server_port, ur_ip, ur_port, tcp, send, service=None):
+    if service is None:
+        service = get_pose_service(server_ip, server_port)
+    if not send:
+        # only printed on the UR Robot's display
+        script = service.query_script(pose_type, ur_ip, ur_port, tcp, send=False)
+        send_script(script, ur_ip, ur_port)
+        return "Timed out"
+    msg = service.query(pose_type, ur_ip, ur_port, tcp)
+    if msg is None:
+        return "Timed out"
+    return msg
 
-    #return _get_current_pose("joints", tcp, server_ip, server_port, ur_ip, ur_port, send)
-
-"""
-def _get_current_pose(pose_type, tcp, server_ip, server_port, ur_ip, ur_port, send):
-
-    ur_cmds = URScript(server_ip=server_ip, server_port=server_port, ur_ip=ur_ip, ur_port=ur_port)
-    ur_cmds.start()
-    ur_cmds.set_tcp(tcp)
-    pose_type_map = {"cartesian": ur_cmds.get_current_pose_cartesian,
-                     "joints": ur_cmds.get_current_pose_joints}
-    pose_type_map[pose_type](send)
-    ur_cmds.end(feedback=True)
-    ur_cmds.generate()
-    server = TCPFeedbackServer(ip=server_ip, port=server_port)
-    server.start()
-    ur_cmds.send_script()
-    server.listen(timeout=5)
-    time.sleep(1)
-    server.close()
-    server.join()
-    return server.msgs[0]
-"""
 
 if __name__ == "__main__":
     server_port = 50005
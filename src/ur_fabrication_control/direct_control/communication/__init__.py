@@ -1,2 +1,10 @@
+from .message_parser import *
+from .message_store import *
 from .tcp_server import *
-from .urscript_socket import *
\ No newline at end of file
+from .urscript_socket import *
+from .path_server import *
+from .pose_stream import *
+from .connection_pool import *
+import sys as _sys
+if _sys.version_info >= (3, 7):
+    from .async_transport import *
@@ -0,0 +1,347 @@
+import asyncio
+from collections import deque
+
+from .message_parser import parse_message
+from .message_store import MessageStore
+
+__all__ = [
+    'AsyncURScriptClient',
+    'AsyncFeedbackServer'
+]
+
+
+class AsyncURScriptClient(object):
+    """Asyncio counterpart of :meth:`URScript.send_script`, keeping one
+    persistent connection to the UR Robot.
+
+    Clients of many robots can share one event loop. Data the controller
+    sends is read and discarded in the background, a closed connection is
+    reopened with an exponential backoff.
+
+    Parameters
+    ----------
+    ur_ip : string
+        IP of the UR Robot.
+    ur_port : integer
+        Port number of the UR Robot.
+        Default set to 30002.
+    timeout : float
+        Timeout in s of connecting and writing.
+        Default set to 2.
+    retries : integer
+        Number of reconnection attempts after a failure.
+        Default set to 3.
+    backoff : float
+        Wait in s before the first retry, doubled for every further retry.
+        Default set to 0.1.
+
+    """
+    def __init__(self, ur_ip, ur_port=30002, timeout=2, retries=3, backoff=0.1):
+        self.ur_ip = ur_ip
+        self.ur_port = ur_port
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._reader = None
+        self._writer = None
+        self._drain_task = None
+        self._lock = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, typ, val, tb):
+        await self.close()
+
+    @property
+    def is_connected(self):
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self):
+        """Open the connection, retrying with backoff.
+
+        Raises
+        ------
+        ConnectionError
+            If the robot is not available after all retries.
+
+        """
+        if self.is_connected:
+            return
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                self._reader, self._writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.ur_ip, self.ur_port), self.timeout)
+            except (asyncio.TimeoutError, OSError) as e:
+                error = e
+                if attempt < self.retries:
+                    await asyncio.sleep(delay)
+                    delay *= 2
+                continue
+            self._drain_task = asyncio.ensure_future(self._discard(self._reader))
+            return
+        raise ConnectionError("UR at {} not available on port {}: {}".format(
+            self.ur_ip, self.ur_port, error))
+
+    async def close(self):
+        if self._drain_task is not None:
+            self._drain_task.cancel()
+            self._drain_task = None
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+            self._writer = None
+
+    async def _discard(self, reader):
+        try:
+            while await reader.read(65536):
+                pass
+        except OSError:
+            pass
+        # the robot closed the connection
+        if self._reader is reader and self._writer is not None:
+            self._writer.close()
+
+    async def send_script(self, script, stream=False, minify=False):
+        """Send a script to the UR Robot.
+
+        Parameters
+        ----------
+        script : :class:`URScript` or string
+            The script, of a URScript the generated script.
+        stream : boolean
+            Set to "True" to send a URScript chunk by chunk while it is
+            generated, see :meth:`URScript.iter_generate`.
+            Default set to "False".
+        minify : boolean
+            Set to "True" to send a minified script when streaming.
+            Default set to "False".
+
+        Raises
+        ------
+        ConnectionError
+            If the script could not be sent.
+
+        """
+        if isinstance(script, str):
+            chunks = [script.encode('utf-8')]
+        elif stream:
+            chunks = script.iter_generate(minify=minify)
+        else:
+            if script.payload is None:
+                script.generate()
+            chunks = [script.payload]
+        if self._lock is None:
+            # created in the running loop
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            await self._send(chunks)
+        print("Script sent to {} on port {}".format(self.ur_ip, self.ur_port))
+
+    async def _send(self, chunks):
+        chunks = iter(chunks)
+        first = next(chunks, None)
+        if first is None:
+            return
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            await self.connect()
+            try:
+                self._writer.write(first)
+                await asyncio.wait_for(self._writer.drain(), self.timeout)
+                break
+            except (asyncio.TimeoutError, OSError) as e:
+                await self.close()
+                if attempt == self.retries:
+                    raise ConnectionError("Sending to {}:{} failed: {}".format(
+                        self.ur_ip, self.ur_port, e))
+                await asyncio.sleep(delay)
+                delay *= 2
+        try:
+            for chunk in chunks:
+                self._writer.write(chunk)
+                await asyncio.wait_for(self._writer.drain(), self.timeout)
+        except (asyncio.TimeoutError, OSError) as e:
+            await self.close()
+            raise ConnectionError("Sending to {}:{} failed: {}".format(self.ur_ip, self.ur_port, e))
+
+    def __repr__(self):
+        return "AsyncURScriptClient({}:{})".format(self.ur_ip, self.ur_port)
+
+
+class AsyncFeedbackServer(object):
+    """Asyncio counterpart of :class:`TCPFeedbackServer`.
+
+    Lines received from the robot are stored in :attr:`rcv_msg` and parsed
+    to :attr:`msgs`, every line is acknowledged like by
+    :class:`FeedbackHandler`. Servers of many robots can share one event
+    loop.
+
+    Parameters
+    ----------
+    ip : string
+        IP of the server.
+    port : integer
+        Port number of the server.
+    maxlen : integer (None)
+        Number of retained lines and messages, see :class:`MessageStore`.
+        Default set to "None" to retain all messages.
+    spill : string (None)
+        Path of a file evicted messages are appended to.
+        Default set to "None".
+
+    Attributes
+    ----------
+    rcv_msg : deque of string
+        The received lines.
+    msgs : :class:`MessageStore`
+        The parsed messages by their sequence number.
+
+    """
+    def __init__(self, ip="192.168.10.11", port=50002, maxlen=None, spill=None):
+        self.name = "Feedbackserver"
+        self.ip = ip
+        self.port = port
+        self.maxlen = maxlen
+        self.server = None
+        self.rcv_msg = deque(maxlen=maxlen)
+        self.msgs = MessageStore(maxlen, spill)
+        self._received = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, typ, val, tb):
+        await self.shutdown()
+        print("shut down server")
+
+    @property
+    def server_address(self):
+        """The bound (ip, port), with the port given by the system if 0."""
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def start(self):
+        await self.shutdown()
+        self._received = asyncio.Condition()
+        self.server = await asyncio.start_server(self._handle, self.ip, self.port)
+        print("Server started on {}:{}".format(*self.server_address))
+
+    async def shutdown(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    def clear(self):
+        self.rcv_msg = deque(maxlen=self.maxlen)
+        self.msgs.clear()
+
+    async def _handle(self, reader, writer):
+        print("Connected to client at {}".format(writer.get_extra_info('peername')[0]))
+        try:
+            while True:
+                data = await reader.readline()
+                if not data:
+                    break
+                data = data.strip().decode()
+                if not data:
+                    continue
+                self.rcv_msg.append(data)
+                self.add_message(data)
+                writer.write("Message from client: {}\n".format(data).encode())
+                await writer.drain()
+                async with self._received:
+                    self._received.notify_all()
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        print("Client disconnected")
+        writer.close()
+
+    def add_message(self, msg):
+        print("Adding message: {}".format(msg))
+        self.msgs.add(parse_message(msg))
+
+    async def wait_for(self, message, timeout=None):
+        """Wait until a message was received.
+
+        Parameters
+        ----------
+        message : object or callable
+            The message, or a predicate called once with every parsed
+            message.
+        timeout : float (None)
+            Maximum wait in s.
+            Default set to "None" to wait without limit.
+
+        Returns
+        -------
+        boolean
+            "True" if the message was received, "False" on timeout.
+
+        """
+        msgs = self.msgs
+        if callable(message):
+            checked = msgs.first_seq
+
+            def received():
+                # only the messages added since the last check
+                nonlocal checked
+                for seq in range(max(checked, msgs.first_seq), msgs.next_seq):
+                    if seq in msgs and message(msgs[seq]):
+                        return True
+                checked = msgs.next_seq
+                return False
+        else:
+            def received():
+                return msgs.contains(message)
+        async with self._received:
+            try:
+                await asyncio.wait_for(self._received.wait_for(received), timeout)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+
+if __name__ == '__main__':
+    # robots of a cell on one event loop, every fake controller reports
+    # the task exit message of the script it received
+    import time
+
+    async def fake_controller(feedback_address):
+        async def handle(reader, writer):
+            while True:
+                script = (await reader.readline()).decode()
+                if not script:
+                    break
+                task = script.split("'")[1]
+                _, fb_writer = await asyncio.open_connection(*feedback_address)
+                await asyncio.sleep(0.05)
+                fb_writer.write("{}\n".format(task).encode())
+                await fb_writer.drain()
+                fb_writer.close()
+        return await asyncio.start_server(handle, "localhost", 0)
+
+    async def robot(i):
+        async with AsyncFeedbackServer("localhost", 0) as server:
+            controller = await fake_controller(server.server_address)
+            address = controller.sockets[0].getsockname()[:2]
+            async with AsyncURScriptClient(*address) as client:
+                for k in range(3):
+                    exit_msg = "Robot_{}_task_{}_complete".format(i, k)
+                    await client.send_script("textmsg('{}')\n".format(exit_msg))
+                    assert await server.wait_for(exit_msg, timeout=2)
+            controller.close()
+            return len(server.msgs)
+
+    async def main(n):
+        return await asyncio.gather(*[robot(i) for i in range(n)])
+
+    t0 = time.time()
+    counts = asyncio.run(main(8))
+    print("{} robots, {} messages in {:.2f} s".format(len(counts), sum(counts), time.time() - t0))
@@ -0,0 +1,354 @@
+import sys
+import time
+import select
+import socket
+import atexit
+import threading
+
+__all__ = [
+    'URConnection',
+    'ConnectionPool',
+    'default_pool',
+    'send_to',
+    'send_direct'
+]
+
+if sys.version_info[0] == 2:
+    ConnectionError = socket.error
+else:
+    # importable from here on every version
+    ConnectionError = ConnectionError
+
+
+class URConnection(object):
+    """Persistent connection to a port of the UR Robot.
+
+    The connection is opened on the first send and kept open. Data the
+    controller sends (e.g. the state messages of the secondary interface
+    on port 30002) is drained and discarded, which also detects a closed
+    connection before it is written to. A failed connect or write is
+    retried on a new connection with an exponential backoff.
+
+    Parameters
+    ----------
+    ip : string
+        IP of the UR Robot.
+    port : integer
+        Port number of the UR Robot.
+    timeout : float
+        Timeout in s of connecting and writing.
+        Default set to 2.
+    retries : integer
+        Number of reconnection attempts after a failure.
+        Default set to 3.
+    backoff : float
+        Wait in s before the first retry, doubled for every further retry.
+        Default set to 0.1.
+
+    """
+    def __init__(self, ip, port, timeout=2, retries=3, backoff=0.1):
+        self.ip = ip
+        self.port = port
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.last_used = None
+        self._socket = None
+        self._lock = threading.RLock()
+
+    @property
+    def is_connected(self):
+        return self._socket is not None
+
+    def connect(self):
+        """Open the connection, retrying with backoff.
+
+        Raises
+        ------
+        ConnectionError
+            If the robot is not available after all retries.
+
+        """
+        with self._lock:
+            if self._socket is not None:
+                return
+            delay = self.backoff
+            for attempt in range(self.retries + 1):
+                try:
+                    s = socket.create_connection((self.ip, self.port), timeout=self.timeout)
+                except (socket.timeout, socket.error) as e:
+                    error = e
+                    if attempt < self.retries:
+                        time.sleep(delay)
+                        delay *= 2
+                    continue
+                s.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+                s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self._socket = s
+                self.last_used = time.time()
+                return
+            raise ConnectionError("UR at {} not available on port {}: {}".format(
+                self.ip, self.port, error))
+
+    def close(self):
+        with self._lock:
+            if self._socket is not None:
+                try:
+                    self._socket.close()
+                finally:
+                    self._socket = None
+
+    def drain(self):
+        """Discard received data, close the connection if the robot closed it.
+
+        Returns
+        -------
+        boolean
+            "True" if the connection is still open.
+
+        """
+        with self._lock:
+            s = self._socket
+            if s is None:
+                return False
+            try:
+                while select.select([s], [], [], 0)[0]:
+                    if not s.recv(65536):
+                        self.close()
+                        return False
+            except (socket.error, ValueError):
+                self.close()
+                return False
+            return True
+
+    def send(self, data):
+        """Write all data, on a new connection if the current one failed.
+
+        Parameters
+        ----------
+        data : bytes or iterable of bytes
+            The data, or consecutive chunks of it. Chunks from an iterator
+            can not be repeated, a failure after the first chunk raises.
+
+        Raises
+        ------
+        ConnectionError
+            If the data could not be written.
+
+        """
+        if isinstance(data, bytes):
+            data = [data]
+        with self._lock:
+            chunks = iter(data)
+            try:
+                first = next(chunks)
+            except StopIteration:
+                return
+            delay = self.backoff
+            for attempt in range(self.retries + 1):
+                self.drain()
+                self.connect()
+                try:
+                    self._socket.sendall(first)
+                    break
+                except (socket.timeout, socket.error) as e:
+                    self.close()
+                    if attempt == self.retries:
+                        raise ConnectionError("Sending to {}:{} failed: {}".format(self.ip, self.port, e))
+                    time.sleep(delay)
+                    delay *= 2
+            try:
+                for chunk in chunks:
+                    self._socket.sendall(chunk)
+            except (socket.timeout, socket.error) as e:
+                self.close()
+                raise ConnectionError("Sending to {}:{} failed: {}".format(self.ip, self.port, e))
+            self.last_used = time.time()
+
+    def __repr__(self):
+        state = "connected" if self.is_connected else "closed"
+        return "URConnection({}:{}, {})".format(self.ip, self.port, state)
+
+
+class ConnectionPool(object):
+    """Thread safe pool of persistent connections keyed by (ip, port).
+
+    A daemon thread drains the received data of the open connections and
+    closes connections unused for ``idle_timeout`` s.
+
+    Parameters
+    ----------
+    timeout, retries, backoff
+        See :class:`URConnection`.
+    idle_timeout : float (None)
+        Time in s after which an unused connection is closed.
+        Default set to 60.
+    interval : float
+        Time in s between two drains of the open connections.
+        Default set to 0.5.
+
+    """
+    def __init__(self, timeout=2, retries=3, backoff=0.1, idle_timeout=60, interval=0.5):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.idle_timeout = idle_timeout
+        self.interval = interval
+        self.connections = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def get(self, ip, port):
+        """Return the connection to (ip, port), created if needed."""
+        key = (ip, int(port))
+        with self._lock:
+            connection = self.connections.get(key)
+            if connection is None:
+                connection = URConnection(ip, int(port), self.timeout, self.retries, self.backoff)
+                self.connections[key] = connection
+            if self._thread is None:
+                self._stop = threading.Event()
+                self._thread = threading.Thread(target=self._keep_alive, args=(self._stop,))
+                self._thread.daemon = True
+                self._thread.start()
+        return connection
+
+    def send(self, ip, port, data):
+        """Write data to (ip, port), see :meth:`URConnection.send`."""
+        self.get(ip, port).send(data)
+
+    def close(self, ip=None, port=None):
+        """Close the connection to (ip, port), all connections by default."""
+        with self._lock:
+            if ip is None:
+                connections = list(self.connections.values())
+                self.connections = {}
+                self._stop.set()
+                self._thread = None
+            else:
+                connection = self.connections.pop((ip, int(port)), None)
+                connections = [connection] if connection is not None else []
+        for connection in connections:
+            connection.close()
+
+    def _keep_alive(self, stop):
+        while not stop.wait(self.interval):
+            with self._lock:
+                connections = list(self.connections.values())
+            for connection in connections:
+                # skip connections busy sending
+                if not connection._lock.acquire(False):
+                    continue
+                try:
+                    if not connection.drain():
+                        continue
+                    idle = time.time() - connection.last_used
+                    if self.idle_timeout is not None and idle > self.idle_timeout:
+                        connection.close()
+                finally:
+                    connection._lock.release()
+
+    def __len__(self):
+        return len(self.connections)
+
+    def __repr__(self):
+        return "ConnectionPool({} connections)".format(len(self.connections))
+
+
+default_pool = ConnectionPool()
+atexit.register(default_pool.close)
+
+
+def send_to(ip, port, data, pool=None):
+    """Write data to the UR Robot over a persistent connection.
+
+    Parameters
+    ----------
+    ip : string
+        IP of the UR Robot.
+    port : integer
+        Port number of the UR Robot.
+    data : string, bytes or iterable of bytes
+        The data, strings are utf-8 encoded.
+    pool : :class:`ConnectionPool` (None)
+        Default set to "None" to use :data:`default_pool`.
+
+    """
+    if not isinstance(data, bytes) and hasattr(data, "encode"):
+        data = data.encode('utf-8')
+    (default_pool if pool is None else pool).send(ip, port, data)
+
+
+def send_direct(ip, port, data, timeout=2):
+    """Write data to the UR Robot on a new connection, closed afterwards.
+
+    Unlike :func:`send_to` it does not wait for a pooled connection busy
+    with an upload, and a half-open pooled connection can not swallow the
+    data, e.g. for a stop script.
+
+    Parameters
+    ----------
+    ip : string
+        IP of the UR Robot.
+    port : integer
+        Port number of the UR Robot.
+    data : string or bytes
+        The data, strings are utf-8 encoded.
+    timeout : float
+        Timeout in s of connecting and writing.
+        Default set to 2.
+
+    Raises
+    ------
+    ConnectionError
+        If the data could not be written.
+
+    """
+    if not isinstance(data, bytes):
+        data = data.encode('utf-8')
+    try:
+        s = socket.create_connection((ip, int(port)), timeout=timeout)
+    except (socket.timeout, socket.error) as e:
+        raise ConnectionError("UR at {} not available on port {}: {}".format(ip, port, e))
+    try:
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        s.sendall(data)
+    except (socket.timeout, socket.error) as e:
+        raise ConnectionError("Sending to {}:{} failed: {}".format(ip, port, e))
+    finally:
+        s.close()
+
+
+if __name__ == '__main__':
+    # fake controller counting the received scripts and connections
+    server = socket.socket()
+    server.bind(('localhost', 0))
+    server.listen(128)
+    ip, port = server.getsockname()
+    received = []
+    accepted = []
+
+    def serve():
+        while True:
+            c, _ = server.accept()
+            accepted.append(c)
+            threading.Thread(target=lambda: received.append(len(c.recv(1 << 20)))).start()
+
+    t = threading.Thread(target=serve)
+    t.daemon = True
+    t.start()
+    script = "def program():\n\tstopl(0.5)\nend\nprogram()\n"
+    n = 200
+    t0 = time.time()
+    for _ in range(n):
+        s = socket.create_connection((ip, port), timeout=2)
+        s.sendall(script.encode('utf-8'))
+        s.close()
+    t1 = time.time()
+    for _ in range(n):
+        send_to(ip, port, script)
+    t2 = time.time()
+    print("new connection per script: {:.1f} us, pooled: {:.1f} us, {} connections".format(
+        (t1 - t0) / n * 1e6, (t2 - t1) / n * 1e6, len(accepted)))
+    default_pool.close()
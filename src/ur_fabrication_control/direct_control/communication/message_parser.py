@@ -0,0 +1,103 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+__all__ = [
+    'parse_message',
+    'parse_value',
+    'parse_lists'
+]
+
+CONSTANTS = {"True": True, "False": False}
+
+
+def parse_value(token):
+    """Parse a single URScript value to an int, float, bool or string.
+
+    Parameters
+    ----------
+    token : string
+        The value, e.g. ``"0.11"``, ``"3"``, ``"True"`` or ``"'text'"``.
+
+    Returns
+    -------
+    int, float, bool or string
+        Unknown tokens are returned stripped.
+
+    """
+    token = token.strip()
+    if token.lstrip("+-").isdigit():
+        return int(token)
+    try:
+        return float(token)
+    except ValueError:
+        pass
+    if len(token) > 1 and token[0] == token[-1] and token[0] in "'\"":
+        return token[1:-1]
+    return CONSTANTS.get(token, token)
+
+
+def parse_message(msg):
+    """Parse a feedback line.
+
+    Poses ``p[...]`` and lists ``[...]`` are returned as a list of values,
+    see :func:`parse_value`, other lines unchanged.
+
+    Parameters
+    ----------
+    msg : string
+        A received line.
+
+    Returns
+    -------
+    list or string
+
+    """
+    start = msg.find("[")
+    if start < 0 or "," not in msg:
+        return msg
+    end = msg.find("]", start)
+    if end < 0:
+        return msg
+    return [parse_value(x) for x in msg[start + 1:end].split(",")]
+
+
+def parse_lists(msgs):
+    """Parse many pose or list lines of equal length at once.
+
+    Parameters
+    ----------
+    msgs : sequence of string
+        Lines with a pose ``p[...]`` or list ``[...]`` of numbers.
+
+    Returns
+    -------
+    numpy.ndarray or list
+        (N, M) array of floats, a list of lists if NumPy is not available.
+
+    Raises
+    ------
+    ValueError
+        If a line is not a list or the lists differ in length.
+
+    """
+    contents = []
+    for msg in msgs:
+        start = msg.find("[")
+        end = msg.find("]", start)
+        if start < 0 or end < 0:
+            raise ValueError("Not a list: {}".format(msg))
+        contents.append(msg[start + 1:end])
+    if np is None:
+        rows = [[float(x) for x in c.split(",")] for c in contents]
+        if len(set(len(r) for r in rows)) > 1:
+            raise ValueError("Lists differ in length")
+        return rows
+    if not contents:
+        return np.zeros((0, 0))
+    width = contents[0].count(",") + 1
+    if any(c.count(",") + 1 != width for c in contents):
+        raise ValueError("Lists differ in length")
+    values = np.array(",".join(contents).split(","), dtype=float)
+    return values.reshape(len(contents), width)
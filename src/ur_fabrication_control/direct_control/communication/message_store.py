@@ -0,0 +1,250 @@
+import json
+import time
+import threading
+from array import array
+from collections import deque
+
+__all__ = [
+    'MessageStore'
+]
+
+try:
+    OFFSET_TYPE = array('q').typecode
+except ValueError:
+    # no 64 bit integers on Python 2, doubles hold offsets up to 2**53 exactly
+    OFFSET_TYPE = 'd'
+
+
+def _index_key(msg):
+    if isinstance(msg, list):
+        return tuple(_index_key(m) for m in msg)
+    return msg
+
+
+class MessageValues(object):
+    """View of the messages of a :class:`MessageStore`, with an O(1) ``in``."""
+    def __init__(self, store):
+        self._store = store
+
+    def __contains__(self, msg):
+        return self._store.contains(msg)
+
+    def __iter__(self):
+        store = self._store
+        return iter([store._msgs[seq] for seq in list(store._order)])
+
+    def __len__(self):
+        return len(self._store)
+
+
+class MessageStore(object):
+    """Thread safe store of feedback messages by sequence number, with an
+    index of the message contents.
+
+    Looking up whether a message was received is O(1), and threads can
+    wait for a message or a condition on the messages without polling.
+    It offers the dictionary methods used on the former message
+    dictionaries (``keys``, ``values``, ``items``, ``get``, ``[]``, ``in``
+    and ``len``), ``msg in store.values()`` uses the index.
+
+    With ``maxlen`` only the latest messages are retained. Sequence numbers
+    stay stable, evicted messages can still be read by their number if
+    they are spilled to a file.
+
+    Parameters
+    ----------
+    maxlen : integer (None)
+        Number of retained messages.
+        Default set to "None" to retain all messages.
+    spill : string (None)
+        Path of a file evicted messages are appended to, one JSON line
+        ``[seq, message]`` each.
+        Default set to "None" to discard evicted messages.
+
+    Attributes
+    ----------
+    next_seq (read-only) : integer
+        Sequence number of the next added message.
+    first_seq (read-only) : integer
+        Sequence number of the oldest retained message.
+
+    """
+    def __init__(self, maxlen=None, spill=None):
+        self.maxlen = maxlen
+        self.spill = spill
+        self._spill_file = None
+        self._condition = threading.Condition()
+        self.clear()
+
+    def clear(self):
+        with self._condition:
+            self._msgs = {}
+            self._order = deque()
+            self._index = {}
+            self._next_seq = 0
+            self._spilled = array(OFFSET_TYPE)   # file offsets of the spilled messages
+            self._spill_base = 0
+            self.close()
+
+    def close(self):
+        """Close the spill file."""
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    @property
+    def next_seq(self):
+        return self._next_seq
+
+    @property
+    def first_seq(self):
+        return self._order[0] if self._order else self._next_seq
+
+    def add(self, msg, seq=None):
+        """Add a message, returns its sequence number.
+
+        Parameters
+        ----------
+        msg : object
+            The message.
+        seq : integer (None)
+            Sequence number, numbers of lost messages are skipped.
+            Default set to "None" to use the next number.
+
+        """
+        with self._condition:
+            if seq is None:
+                seq = self._next_seq
+            elif seq < self._next_seq:
+                raise ValueError("Sequence number {} already used".format(seq))
+            self._msgs[seq] = msg
+            self._order.append(seq)
+            self._index.setdefault(_index_key(msg), []).append(seq)
+            self._next_seq = seq + 1
+            if self.maxlen is not None:
+                while len(self._order) > self.maxlen:
+                    self._evict()
+            self._condition.notify_all()
+        return seq
+
+    def _evict(self):
+        seq = self._order.popleft()
+        msg = self._msgs.pop(seq)
+        key = _index_key(msg)
+        seqs = self._index[key]
+        seqs.remove(seq)
+        if not seqs:
+            del self._index[key]
+        if self.spill is not None:
+            if self._spill_file is None:
+                self._spill_file = open(self.spill, 'a')
+                if not self._spilled:
+                    self._spill_base = seq
+            f = self._spill_file
+            while self._spill_base + len(self._spilled) < seq:
+                # skipped sequence numbers
+                self._spilled.append(-1)
+            self._spilled.append(f.tell())
+            f.write("{}\n".format(json.dumps([seq, msg])))
+            f.flush()
+
+    def _read_spilled(self, seq):
+        i = seq - self._spill_base
+        if self.spill is None or not 0 <= i < len(self._spilled) or self._spilled[i] < 0:
+            raise KeyError(seq)
+        with open(self.spill) as f:
+            f.seek(int(self._spilled[i]))
+            return json.loads(f.readline())[1]
+
+    def find(self, msg):
+        """Return the sequence numbers of the messages equal to ``msg``."""
+        return list(self._index.get(_index_key(msg), []))
+
+    def contains(self, msg):
+        """Return "True" if a message equal to ``msg`` was received."""
+        return _index_key(msg) in self._index
+
+    def wait_for(self, message, timeout=None):
+        """Wait until a message was received.
+
+        Parameters
+        ----------
+        message : object or callable
+            The message, or a predicate called once with every message.
+        timeout : float (None)
+            Maximum wait in s.
+            Default set to "None" to wait without limit.
+
+        Returns
+        -------
+        integer or None
+            Sequence number of the (first) matching message, "None" on
+            timeout.
+
+        """
+        t_end = None if timeout is None else time.time() + timeout
+        with self._condition:
+            checked = self.first_seq
+            while True:
+                if callable(message):
+                    for seq in range(max(checked, self.first_seq), self._next_seq):
+                        if seq in self._msgs and message(self._msgs[seq]):
+                            return seq
+                    checked = self._next_seq
+                else:
+                    seqs = self._index.get(_index_key(message))
+                    if seqs:
+                        return seqs[0]
+                wait = None if t_end is None else t_end - time.time()
+                if wait is not None and wait <= 0:
+                    return None
+                self._condition.wait(wait)
+
+    # Dictionary interface
+    def keys(self):
+        return list(self._order)
+
+    def values(self):
+        return MessageValues(self)
+
+    def items(self):
+        return [(seq, self._msgs[seq]) for seq in list(self._order)]
+
+    def get(self, seq, default=None):
+        try:
+            return self[seq]
+        except KeyError:
+            return default
+
+    def __getitem__(self, seq):
+        with self._condition:
+            if seq in self._msgs:
+                return self._msgs[seq]
+            return self._read_spilled(seq)
+
+    def __setitem__(self, seq, msg):
+        if seq == self._next_seq:
+            self.add(msg)
+            return
+        with self._condition:
+            old = self._msgs[seq]
+            self._index[_index_key(old)].remove(seq)
+            if not self._index[_index_key(old)]:
+                del self._index[_index_key(old)]
+            self._msgs[seq] = msg
+            self._index.setdefault(_index_key(msg), []).append(seq)
+            self._index[_index_key(msg)].sort()
+            self._condition.notify_all()
+
+    def __contains__(self, seq):
+        # retained messages only
+        return seq in self._msgs
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self._msgs)
+
+    def __repr__(self):
+        return "MessageStore({})".format(dict(self.items()))
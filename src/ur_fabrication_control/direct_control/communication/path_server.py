@@ -0,0 +1,137 @@
+import sys
+import socket
+import threading
+if sys.version_info[0] == 2:
+    import SocketServer as ss
+elif sys.version_info[0] == 3:
+    import socketserver as ss
+from .tcp_server import TCPFeedbackServer
+from ..script_buffer import format_float
+
+__all__ = [
+    'PathStreamHandler',
+    'PathStreamServer'
+]
+
+REQUEST_MSG = "next"
+MOVE_FLAG = 1
+END_FLAG = 0
+
+
+class PathStreamHandler(ss.StreamRequestHandler):
+    """Handler feeding waypoints to the URScript of
+    :meth:`URSocketComm.socket_stream_moves`.
+
+    Every ``next`` request of the robot is answered with waypoints in the
+    format of ``socket_read_ascii_float``: ``(flag,x,y,z,rx,ry,rz,v,r)``.
+    The first request is answered with ``window`` waypoints, every further
+    request with one, so the robot always has waypoints buffered. Other
+    lines are stored as feedback messages.
+    """
+    def handle(self):
+        print("Connected to client at {}".format(self.client_address[0]))
+        first = True
+        while True:
+            try:
+                data = self.rfile.readline().strip().decode()
+            except socket.error:
+                break
+            if not data:
+                break
+            if data == REQUEST_MSG:
+                self.server.consumed += 1
+                count = self.server.window if first else 1
+                first = False
+                self.wfile.write(self.server.next_waypoints(count))
+            else:
+                self.server.put_message(data)
+        print("Client disconnected")
+        self.request.close()
+
+
+class PathStreamServer(TCPFeedbackServer):
+    """Host side path server streaming waypoints to the robot at runtime.
+
+    Parameters
+    ----------
+    ip : string
+        IP of the server.
+    port : integer
+        Port number of the server.
+    path : iterable of sequence of float (None)
+        Waypoints [x, y, z, rx, ry, rz, v, r], may be a generator.
+    window : integer
+        Number of waypoints sent ahead of the robot.
+        Default set to 10.
+
+    """
+    def __init__(self, ip="192.168.10.11", port=50003, path=None, window=10,
+                 handler=PathStreamHandler):
+        super(PathStreamServer, self).__init__(ip, port, handler)
+        self.name = "Pathserver"
+        self.server.window = window
+        self.server.next_waypoints = self.next_waypoints
+        self._lock = threading.Lock()
+        self.set_path(path or [])
+
+    @property
+    def sent(self):
+        """Number of waypoints sent to the robot."""
+        return self.server.sent
+
+    @property
+    def consumed(self):
+        """Number of waypoints the robot has requested."""
+        return self.server.consumed
+
+    @property
+    def done(self):
+        """"True" once the end of the path has been sent."""
+        return self._done
+
+    def set_path(self, path):
+        """Set the waypoints to stream, see :func:`pose_rows`."""
+        with self._lock:
+            self._path = iter(path)
+            self._done = False
+            self.server.sent = 0
+            self.server.consumed = 0
+
+    def next_waypoints(self, count):
+        """Encode the next ``count`` waypoints, the end marker after the last."""
+        lines = []
+        with self._lock:
+            for _ in range(count):
+                if self._done:
+                    break
+                try:
+                    row = next(self._path)
+                except StopIteration:
+                    self._done = True
+                    row = [END_FLAG] + [0] * 8
+                else:
+                    row = [MOVE_FLAG] + [float(x) for x in row]
+                    self.server.sent += 1
+                # fixed notation, the robot cannot read exponents
+                lines.append("({})\n".format(",".join(format_float(x, 6) for x in row)))
+        return "".join(lines).encode('utf-8')
+
+
+if __name__ == '__main__':
+    # fake controller running the protocol of socket_stream_moves
+    address = ('localhost', 0)
+    path = ([0.1 * i, 0.0, 0.3, 0.0, 3.14, 0.0, 0.05, 0.001] for i in range(25))
+    with PathStreamServer(ip=address[0], port=address[1], path=path, window=5) as server:
+        ip, port = server.server.server_address
+        s = socket.create_connection((ip, port))
+        f = s.makefile('rb')
+        moves = 0
+        while True:
+            s.sendall((REQUEST_MSG + "\n").encode())
+            values = f.readline().decode().strip()[1:-1].split(",")
+            if int(float(values[0])) == END_FLAG:
+                break
+            moves += 1
+        f.close()
+        s.close()
+        print("Robot executed {} moves, {} sent".format(moves, server.sent))
@@ -0,0 +1,133 @@
+import sys
+import time
+import socket
+import threading
+if sys.version_info[0] == 2:
+    import SocketServer as ss
+elif sys.version_info[0] == 3:
+    import socketserver as ss
+from .tcp_server import TCPFeedbackServer
+from .message_parser import parse_message
+
+__all__ = [
+    'PoseStreamHandler',
+    'PoseStreamServer'
+]
+
+POSE_TYPES = {"pose_cartesian": "cartesian", "pose_joints": "joints"}
+
+
+class PoseStreamHandler(ss.StreamRequestHandler):
+    """Handler storing the lines of :meth:`URSocketComm.socket_stream_poses`.
+
+    Pose lines are not acknowledged, the robot does not read from the
+    stream socket.
+    """
+    def handle(self):
+        print("Connected to client at {}".format(self.client_address[0]))
+        while True:
+            try:
+                data = self.rfile.readline().strip().decode()
+            except socket.error:
+                break
+            if not data:
+                break
+            self.server.put_message(data)
+        print("Client disconnected")
+        self.request.close()
+
+
+class PoseStreamServer(TCPFeedbackServer):
+    """Host side of a pose subscription, keeping the latest pose of each
+    type with the time it was received.
+
+    The robot sends its poses from a thread of the running program, see
+    :meth:`URSocketComm.socket_stream_poses` and
+    :func:`generate_pose_stream`. Reading the latest pose does not need a
+    script round trip.
+
+    Parameters
+    ----------
+    ip : string
+        IP of the server.
+    port : integer
+        Port number of the server.
+    maxlen : integer
+        Number of retained raw lines.
+        Default set to 100.
+
+    """
+    def __init__(self, ip="192.168.10.11", port=50004, handler=PoseStreamHandler, maxlen=100):
+        super(PoseStreamServer, self).__init__(ip, port, handler, maxlen=maxlen)
+        self.name = "Posestream"
+        self.latest = {}
+        self._updated = threading.Condition()
+
+    def add_message(self, msg, seq=None):
+        prefix, _, pose = msg.partition(" ")
+        pose_type = POSE_TYPES.get(prefix)
+        if pose_type is None:
+            return super(PoseStreamServer, self).add_message(msg, seq)
+        t = None if seq is None else self.server.received_at(seq)
+        with self._updated:
+            self.latest[pose_type] = (parse_message(pose), time.time() if t is None else t)
+            self._updated.notify_all()
+
+    def get_pose(self, pose_type="cartesian", max_age=None):
+        """Return the latest pose.
+
+        Parameters
+        ----------
+        pose_type : string
+            "cartesian" for the tcp pose, "joints" for the joint positions.
+            Default set to "cartesian".
+        max_age : float (None)
+            Maximum age in s of the pose.
+            Default set to "None" for any age.
+
+        Returns
+        -------
+        tuple or None
+            (pose, timestamp) with the time.time() of reception, "None" if
+            no pose, or none recent enough, was received.
+
+        """
+        latest = self.latest.get(pose_type)
+        if latest is None or (max_age is not None and time.time() - latest[1] > max_age):
+            return None
+        return latest
+
+    def wait_pose(self, pose_type="cartesian", timeout=None):
+        """Wait for the next pose, returns (pose, timestamp) or "None" on
+        timeout."""
+        t_end = None if timeout is None else time.time() + timeout
+        with self._updated:
+            previous = self.latest.get(pose_type)
+            while self.latest.get(pose_type) is previous:
+                wait = None if t_end is None else t_end - time.time()
+                if wait is not None and wait <= 0:
+                    return None
+                self._updated.wait(wait)
+            return self.latest[pose_type]
+
+
+if __name__ == '__main__':
+    # fake controller thread streaming poses at 100 Hz
+    with PoseStreamServer(ip="localhost", port=0) as server:
+        def stream(address, n=200):
+            s = socket.create_connection(address)
+            for i in range(n):
+                s.sendall("pose_cartesian p[{}, 0.2, 0.3, 0.0, 3.14, 0.0]\n".format(0.001 * i).encode())
+                s.sendall("pose_joints [{}, -1.57, 1.57, 0.0, 1.57, 0.0]\n".format(0.001 * i).encode())
+                time.sleep(0.01)
+            s.close()
+        t = threading.Thread(target=stream, args=(server.server.server_address,))
+        t.daemon = True
+        t.start()
+        print("first pose: {}".format(server.wait_pose("cartesian", timeout=2)))
+        n = 100000
+        t0 = time.time()
+        for _ in range(n):
+            pose = server.get_pose("joints")
+        print("{:.2f} us per read, latest joints {}".format((time.time() - t0) / n * 1e6, pose))
+        t.join()
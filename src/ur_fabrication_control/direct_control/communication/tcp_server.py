@@ -1,6 +1,10 @@
 import time
 import sys
+import socket
 import threading
+from collections import deque
+from .message_parser import parse_message
+from .message_store import MessageStore
 if sys.version_info[0] == 2:
     import SocketServer as ss
 elif sys.version_info[0] == 3:
@@ -22,7 +26,7 @@ class FeedbackHandler(ss.StreamRequestHandler):
                 data = self.rfile.readline().strip().decode()
                 if not data:
                     break
-                self.server.rcv_msg.append(data)
+                self.server.put_message(data)
                 msg = "Message from client: {}\n".format(data)
                 self.wfile.write(msg.encode())
             except socket.error:
@@ -34,18 +38,68 @@ class FeedbackHandler(ss.StreamRequestHandler):
 class TCPServer(ss.TCPServer):
     allow_reuse_address = True
 
+    def __init__(self, *args, **kwargs):
+        ss.TCPServer.__init__(self, *args, **kwargs)
+        self.received = threading.Condition()
+        self.clear_messages()
+
+    def clear_messages(self, maxlen=None):
+        """Reset the received lines, of which the latest ``maxlen`` are kept."""
+        with self.received:
+            self.rcv_msg = deque(maxlen=maxlen)
+            self.rcv_times = deque(maxlen=maxlen)
+            self.rcv_count = 0
+
+    def put_message(self, msg):
+        """Store a received line and wake the threads waiting for it."""
+        with self.received:
+            self.rcv_msg.append(msg)
+            self.rcv_times.append(time.time())
+            self.rcv_count += 1
+            self.received.notify_all()
+
+    def received_at(self, seq):
+        """Return the time.time() a line was received, "None" if it is no
+        longer retained."""
+        with self.received:
+            i = seq - (self.rcv_count - len(self.rcv_times))
+            if 0 <= i < len(self.rcv_times):
+                return self.rcv_times[i]
+            return None
+
 
 class TCPFeedbackServer(object):
+    """Server receiving feedback lines from the UR Robot.
+
+    Parameters
+    ----------
+    ip : string
+        IP of the server.
+    port : integer
+        Port number of the server.
+    handler : class
+        Request handler storing the received lines.
+        Default set to :class:`FeedbackHandler`.
+    maxlen : integer (None)
+        Number of retained messages, see :class:`MessageStore`.
+        Default set to "None" to retain all messages.
+    spill : string (None)
+        Path of a file evicted messages are appended to.
+        Default set to "None".
+
+    """
     def __init__(self, ip="192.168.10.11", port=50002,
-                 handler=FeedbackHandler):
+                 handler=FeedbackHandler, maxlen=None, spill=None):
         self.name = "Feedbackserver"
         self.ip = ip
         self.port = port
         self.handler = handler
+        self.maxlen = maxlen
 
         self.server = TCPServer((self.ip, self.port), self.handler)
-        self.server.rcv_msg = []
-        self.msgs = {}
+        self.server.clear_messages(maxlen)
+        self.msgs = MessageStore(maxlen, spill)
+        self.processed = 0
         self._stop_flag = True
 
     def __enter__(cls):
@@ -57,8 +111,10 @@ class TCPFeedbackServer(object):
         print("shut down server")
 
     def clear(self):
-        self.server.rcv_msg = []
-        self.msgs = {}
+        with self.server.received:
+            self.server.clear_messages(self.maxlen)
+            self.msgs.clear()
+            self.processed = 0
 
     def _create_thread(self):
         self.server_thread = threading.Thread(target=self.run)
@@ -71,6 +127,8 @@ class TCPFeedbackServer(object):
 
     def shutdown(self):
         self._stop_flag = True
+        with self.server.received:
+            self.server.received.notify_all()
         if hasattr(self, "server_thread"):
             self.server.shutdown()
             self.server_thread.join()
@@ -96,30 +154,58 @@ class TCPFeedbackServer(object):
         except:
             pass
 
-    def process_messages(self, _stop_flag, timeout=None):
-        tCurrent = time.time()
-        while not _stop_flag():
-            if self.server.rcv_msg is []:
-                pass
-            elif len(self.msgs) != len(self.server.rcv_msg):
-                self.add_message(self.server.rcv_msg[len(self.msgs)])
-            if timeout is not None:
-                if time.time() >= tCurrent + timeout:
-                    print("Listening to server timed out")
-                    break
+    def process_messages(self, _stop_flag, timeout=None, poll=0.5):
+        """Parse the received lines to messages as they arrive.
 
-    def add_message(self, msg):
+        The thread sleeps until a line is received, the server is shut
+        down, or at the latest after ``poll`` s to check ``_stop_flag``.
+        Every line is passed once to :meth:`add_message`, which need not
+        store it.
+        """
+        t_end = None if timeout is None else time.time() + timeout
+        received = self.server.received
+        while not _stop_flag():
+            wait = poll
+            if t_end is not None:
+                wait = min(wait, t_end - time.time())
+            with received:
+                if self.processed >= self.server.rcv_count and wait > 0:
+                    received.wait(wait)
+                count = min(self.server.rcv_count - self.processed, len(self.server.rcv_msg))
+                seq = self.server.rcv_count - count
+                new_msgs = [self.server.rcv_msg[-k] for k in range(count, 0, -1)]
+                self.processed = self.server.rcv_count
+            for i, msg in enumerate(new_msgs):
+                self.add_message(msg, seq + i)
+            if t_end is not None and time.time() >= t_end:
+                print("Listening to server timed out")
+                break
+
+    def add_message(self, msg, seq=None):
         print("Adding message: {}".format(msg))
-        if all(i in msg for i in ["[", "]", ","]):
-            msg = msg.split('[', 1)[1].split(']')[0]
-            msg = msg.split(',')
-            msg = [eval(x) for x in msg]
-        self.msgs[len(self.msgs)] = msg
+        self.msgs.add(parse_message(msg), seq)
 
+    def wait_for(self, message, timeout=None):
+        """Wait until a message was processed, see :meth:`MessageStore.wait_for`.
 
-if __name__ == '__main__':
-    import socket
+        Parameters
+        ----------
+        message : object or callable
+            The message, or a predicate called with every message.
+        timeout : float (None)
+            Maximum wait in s.
+            Default set to "None" to wait without limit.
 
+        Returns
+        -------
+        boolean
+            "True" if the message was received, "False" on timeout.
+
+        """
+        return self.msgs.wait_for(message, timeout) is not None
+
+
+if __name__ == '__main__':
     address = ('localhost', 0)
     # let the kernel give us a port
     with TCPFeedbackServer(ip=address[0], port=address[1], handler=FeedbackHandler) as server:
@@ -22,15 +22,15 @@ class URSocketComm:
     def socket_open(self, name="socket_0"):
         """Open socket connection
         """
-        self.add_lines(['textmsg("Opening socket connection...")',
-                       'socket_open({}_ip, {}_port, {})'.format(name, name, name)])
+        self.textmessage("Opening socket connection...", string=True)
+        self.add_line('socket_open({}_ip, {}_port, {})'.format(name, name, name))
         self.sockets.get(name).update({"is_open": True})
 
     def socket_close(self, name="socket_0"):
         """Close socket connection
         """
-        self.add_lines(['textmsg("Closing socket connection with {}...")'.format(name),
-                        'socket_close(socket_name={})'.format(name)])
+        self.textmessage("Closing socket connection with {}...".format(name), string=True)
+        self.add_line('socket_close(socket_name={})'.format(name))
         self.sockets.get(name).update({"is_open": False})
 
     # --- Socket send commands ---
@@ -124,24 +124,125 @@ class URSocketComm:
                                    address=("192.168.10.11", 50002),
                                    timeout=2):
         sock_name = self.__get_socket_name(socket_name, address)
-        self.add_lines([
+        self.add_line(
             '{} = '.format(var_name) +
             'socket_read_binary_integer({}, '.format(number) +
-            'socket_name={}, timeout={})'.format(sock_name, timeout),
-            'textmsg({})'.format(var_name)
-        ])
+            'socket_name={}, timeout={})'.format(sock_name, timeout))
+        self.textmessage(var_name)
 
     def socket_read_string(self, var_name="msg_recv_0", prefix="", suffix="",
                            int_escape=False, socket_name="socket_0",
                            address=("192.168.10.11", 50002), timeout=2):
         sock_name = self.__get_socket_name(socket_name, address)
-        self.add_lines([
+        self.add_line(
             '{} = socket_read_string'.format(var_name) +
             '(socket_name="{}", prefix="{}", '.format(sock_name, prefix) +
             'suffix="{}", interpret_escape={}'.format(suffix, int_escape) +
-            ', timeout={})'.format(timeout),
-            'textmsg({})'.format(var_name)
-        ])
+            ', timeout={})'.format(timeout))
+        self.textmessage(var_name)
+
+    def socket_read_ascii_float(self, number, var_name="msg_recv_0",
+                                socket_name="socket_0",
+                                address=("192.168.10.11", 50002),
+                                timeout=2):
+        """Read a list of floats formatted as "(1.0,2.0,...)".
+
+        The first list item holds the number of floats read, 0 on timeout.
+        """
+        sock_name = self.__get_socket_name(socket_name, address)
+        return self.add_line(
+            '{} = '.format(var_name) +
+            'socket_read_ascii_float({}, '.format(number) +
+            'socket_name={}, timeout={})'.format(sock_name, timeout))
+
+    # --- Socket streaming ---
+    def socket_stream_moves(self, move="movel", var_name="stream",
+                            socket_name="socket_0",
+                            address=("192.168.10.11", 50002), timeout=2):
+        """Loop over waypoints read from a :class:`PathStreamServer`.
+
+        Each iteration requests the next waypoint with a "next" line and
+        reads it as (flag, x, y, z, rx, ry, rz, v, r). The loop ends on
+        the end marker (flag 0) or on a read timeout.
+
+        Parameters
+        ----------
+        move : string
+            Move command to run for every waypoint, "movel" or "movep".
+            Default set to "movel".
+        var_name : string
+            Prefix of the URScript variables used by the loop.
+            Default set to "stream".
+
+        Returns
+        -------
+        list of string
+            The loop lines added to the command dictionary.
+
+        """
+        sock_name = self.__get_socket_name(socket_name, address)
+        data = var_name + "_data"
+        pose = ", ".join(["{}[{}]".format(data, i) for i in range(2, 8)])
+        lines = ['{}_done = False'.format(var_name),
+                 'while {}_done == False:'.format(var_name),
+                 '\tsocket_send_line("next", socket_name={})'.format(sock_name),
+                 '\t{} = socket_read_ascii_float(9, socket_name={}, timeout={})'.format(
+                     data, sock_name, timeout),
+                 '\tif {0}[0] == 9 and {0}[1] == 1:'.format(data),
+                 '\t\t{}(p[{}], v={}[8], r={}[9])'.format(move, pose, data, data),
+                 '\telse:',
+                 '\t\t{}_done = True'.format(var_name),
+                 '\tend',
+                 'end']
+        self.add_lines(lines)
+        return lines
+
+    def socket_stream_poses(self, rate=10, cartesian=True, joints=True,
+                            var_name="pose_stream", socket_name="socket_0",
+                            address=("192.168.10.11", 50002)):
+        """Run a thread sending the current poses to a :class:`PoseStreamServer`.
+
+        The thread sends ``pose_cartesian p[...]`` and ``pose_joints [...]``
+        lines until the program ends.
+
+        Parameters
+        ----------
+        rate : float
+            Number of poses sent per second.
+            Default set to 10.
+        cartesian : boolean
+            Set to "True" to send the tcp pose.
+            Default set to "True".
+        joints : boolean
+            Set to "True" to send the joint positions.
+            Default set to "True".
+        var_name : string
+            Name of the URScript thread.
+            Default set to "pose_stream".
+
+        Returns
+        -------
+        list of string
+            The thread lines added to the command dictionary.
+
+        """
+        sock_name = self.__get_socket_name(socket_name, address)
+        sends = []
+        if cartesian:
+            sends.append(("pose_cartesian", "get_actual_tcp_pose()"))
+        if joints:
+            sends.append(("pose_joints", "get_actual_joint_positions()"))
+        lines = ['thread {}():'.format(var_name),
+                 '\twhile True:']
+        for prefix, func in sends:
+            lines += ['\t\tsocket_send_string("{} ", socket_name={})'.format(prefix, sock_name),
+                      '\t\tsocket_send_line({}, socket_name={})'.format(func, sock_name)]
+        lines += ['\t\tsleep({})'.format(1.0 / rate),
+                  '\tend',
+                  'end',
+                  '{0}_thread = run {0}()'.format(var_name)]
+        self.add_lines(lines)
+        return lines
 
     # --- Socket utilities ---
     def __get_socket_name(self, name=None, address=None):
@@ -1,2 +1,7 @@
+from .scheduler import *
+from .pipeline import *
+from .journal import *
+from .timing import *
 from .fabrication import *
+from .multi_robot import *
 from .urtask import URTask
\ No newline at end of file
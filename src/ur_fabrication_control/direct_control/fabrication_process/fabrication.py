@@ -1,72 +1,146 @@
 import sys
 from threading import Thread
 from ..communication import TCPFeedbackServer
+from .scheduler import TaskScheduler
+from .pipeline import TaskPipeline
+from .journal import TaskJournal, parse_node_message
+from .timing import TaskTimer
 if sys.version_info[0] == 3:
-    from queue import Queue
+    from queue import Queue, Empty
 else:
-    from Queue import Queue
+    from Queue import Queue, Empty
 
 
 __all__ = ["FabricationFeedbackServer",
            "Fabrication"]
 
 class FabricationFeedbackServer(TCPFeedbackServer):
-    def listen(self, stop, q):
-        task_exit_msg = None
-        while True:
-            if stop():
-                break
-            if task_exit_msg is None and not q.empty():
-                task_exit_msg = q.get()
-            elif task_exit_msg in self.msgs.values():
-                q.task_done()
-                task_exit_msg = None
-            if self.server.rcv_msg is []:
-                pass
-            elif len(self.msgs) != len(self.server.rcv_msg):
-                self.add_message(self.server.rcv_msg[len(self.msgs)])
+    journal = None
+    timer = None
+
+    def add_message(self, msg, seq=None):
+        super(FabricationFeedbackServer, self).add_message(msg, seq)
+        if self.journal is not None or self.timer is not None:
+            node = parse_node_message(msg)
+            if node is None:
+                return
+            if self.timer is not None:
+                self.timer.node(*node)
+            if self.journal is not None:
+                self.journal.record_node(*node)
+
+    def listen(self, stop, q, poll=0.5):
+        """Mark the queued exit messages as done once they are received.
+
+        The messages are processed by the thread of :meth:`process_messages`,
+        ``stop`` is checked at the latest every ``poll`` s.
+        """
+        while not stop():
+            try:
+                task_exit_msg = q.get(timeout=poll)
+            except Empty:
+                continue
+            while not stop():
+                if self.wait_for(task_exit_msg, timeout=poll):
+                    q.task_done()
+                    break
 
 
 class Fabrication(object):
-    def __init__(self):
+    """Performs tasks one after the other, each once the exit message of
+    the previous one was received by the feedback server.
+
+    Parameters
+    ----------
+    lookahead : integer
+        Number of upcoming tasks prepared while the current one runs, see
+        :class:`TaskPipeline`.
+        Default set to 1.
+
+    Attributes
+    ----------
+    timer : :class:`TaskTimer`
+        Timestamps of the performed tasks.
+
+    """
+    def __init__(self, lookahead=1):
         self.server = None
-        self.tasks = {}
+        self.scheduler = TaskScheduler()
+        self.pipeline = TaskPipeline(lookahead)
+        self.journal = None
+        self.timer = TaskTimer()
         self.stop_task = None
         self._stop_thread = False
         self._performing_task = False
         self.current_task = None
 
-    def set_feedback_server(self, ip, port):
-        self.server = FabricationFeedbackServer(ip, port)
+    @property
+    def tasks(self):
+        return self.scheduler.tasks
+
+    def set_feedback_server(self, ip, port, maxlen=None, spill=None):
+        self.server = FabricationFeedbackServer(ip, port, maxlen=maxlen, spill=spill)
+        self.server.journal = self.journal
+        self.server.timer = self.timer
+
+    def set_journal(self, path, fsync=True, resume=True):
+        """Record the task states and node progress in a :class:`TaskJournal`.
+
+        Parameters
+        ----------
+        path : string
+            Path of the journal file.
+        fsync : boolean
+            See :class:`TaskJournal`.
+            Default set to "True".
+        resume : boolean
+            Set to "True" to skip the tasks the journal records as completed,
+            the tasks have to be added before.
+            Default set to "True".
 
-    def add_task(self, task, exit_msg, key=None):
+        """
+        self.journal = TaskJournal(path, fsync)
+        if resume:
+            completed = self.journal.restore(self.scheduler)
+            self.journal.compact()
+            print("Resumed from journal, {} tasks completed".format(completed))
+        self.scheduler.journal = self.journal
+        if self.server is not None:
+            self.server.journal = self.journal
+
+    def add_task(self, task, exit_msg, key=None, task_type=None):
         if key is None:
             key = len(self.tasks)
-        self.tasks[key] = {"state": "waiting",
-                           "exit_message": exit_msg,
-                           "task": task}
+        self.scheduler.add(key, {"state": "waiting",
+                                 "exit_message": exit_msg,
+                                 "task": task,
+                                 "type": task_type or type(task).__name__})
 
     def tasks_available(self):
-        if len(self.tasks):
-            for task in self.tasks.values():
-                if task["state"] != "completed":
-                    return True
-            else:
-                return False
-        return False
+        return self.scheduler.available()
 
     def get_next_task(self):
-        keys = [key for key in self.tasks.keys()]
-        keys.sort()
-        for key in keys:
-            if self.tasks[key]["state"] == "waiting":
-                return key
-        else:
-            # No next task available
+        return self.scheduler.next()
+
+    def progress(self, key=None):
+        """Estimate the node the robot is at, see :meth:`TaskTimer.progress`.
+
+        Parameters
+        ----------
+        key : object (None)
+            Key of the task.
+            Default set to "None" for the current task.
+
+        """
+        key = self.current_task if key is None else key
+        if key not in self.tasks:
             return None
+        return self.timer.progress(key, self.tasks[key]["task"])
 
     def clear_tasks(self):
-        self.tasks = {}
+        self.scheduler.clear()
+        self.timer.clear()
+        self.pipeline.clear()
 
     def stop(self):
         self.perform_task(self.stop_task)
@@ -74,8 +148,11 @@ class Fabrication(object):
 
     def close(self):
         self._join_threads()
+        self.pipeline.close()
         self.server.clear()
         self.server.shutdown()
+        if self.journal is not None:
+            self.journal.close()
 
     def _join_threads(self):
         self._stop_thread = True
@@ -107,21 +184,40 @@ class Fabrication(object):
         else:
             print("No_tasks_available")
 
-    def run(self, stop_thread, q):
-        while self.tasks_available():
-            if stop_thread():
-                self._performing_task = False
-                break
-            elif not self._performing_task:
-                self.current_task = self.get_next_task()
-                q.put(self.tasks[self.current_task]["exit_message"])
-                self.perform_task(self.tasks[self.current_task]['task'])
-                self._performing_task = True
-            elif self._performing_task and not q.unfinished_tasks:
-                q.join()
+    def run(self, stop_thread, q, poll=0.5):
+        """Perform the tasks in the order of their keys.
+
+        The thread sleeps until the exit message of the current task is
+        marked as done by :meth:`FabricationFeedbackServer.listen`,
+        ``stop_thread`` is checked at the latest every ``poll`` s. In the
+        meantime :attr:`pipeline` prepares the next tasks.
+        """
+        while self.tasks_available() and not stop_thread():
+            self.current_task = self.scheduler.pop()
+            if self.current_task is None:
+                # all remaining tasks are running elsewhere
+                self.scheduler.wait(lambda: self.scheduler.next() is not None or
+                                    not self.tasks_available(), poll)
+                continue
+            task = self.tasks[self.current_task]['task']
+            self.pipeline.take(task)
+            q.put(self.tasks[self.current_task]["exit_message"])
+            self._performing_task = True
+            self.timer.sent(self.current_task, self.tasks[self.current_task]["type"])
+            self.perform_task(task)
+            upcoming = self.scheduler.upcoming(self.pipeline.depth)
+            self.pipeline.submit(self.tasks[key]['task'] for key in upcoming)
+            with q.all_tasks_done:
+                while q.unfinished_tasks and not stop_thread():
+                    q.all_tasks_done.wait(poll)
+                done = not q.unfinished_tasks
+            self._performing_task = False
+            if done:
+                self.timer.exit(self.current_task)
                 print("joined task {}".format(self.current_task))
-                self.tasks[self.current_task]["state"] = "completed"
-                self._performing_task = False
+                self.scheduler.complete(self.current_task)
+            else:
+                self.scheduler.set_state(self.current_task, "waiting")
 
     def perform_task(self, task):
         task.send_script()
@@ -0,0 +1,219 @@
+import os
+import re
+import ast
+import json
+import time
+import threading
+from ..communication import parse_value
+
+__all__ = ["TaskJournal",
+           "format_node_message",
+           "parse_node_message"]
+
+NODE_MESSAGE = re.compile(r"^\{'TASK': (.+), 'NODE': (\d+)\}$")
+COMPACT_NODE_MESSAGE = re.compile(r"^@(-?\d+) (\d+)$")
+
+
+def format_node_message(key, node, compact=False):
+    """Format the message a task sends when it reached a node.
+
+    Parameters
+    ----------
+    key : object
+        Key of the task.
+    node : integer
+        Index of the node.
+    compact : boolean
+        Set to "True" for ``@key i`` instead of ``{'TASK': key, 'NODE': i}``
+        if the key is an integer, other keys keep the full format so their
+        type is read back.
+        Default set to "False".
+
+    """
+    if compact and isinstance(key, int) and not isinstance(key, bool):
+        return "@{} {}".format(key, node)
+    return "{{'TASK': {!r}, 'NODE': {}}}".format(key, node)
+
+
+def parse_node_message(msg):
+    """Parse a node message of :meth:`URTask.create_urscript_from_nodes`,
+    see :func:`format_node_message`.
+
+    Returns
+    -------
+    tuple or None
+        (task key, node index), "None" for other messages.
+
+    """
+    if not hasattr(msg, "startswith"):
+        return None
+    if msg.startswith("{'TASK'"):
+        match = NODE_MESSAGE.match(msg)
+    elif msg.startswith("@"):
+        match = COMPACT_NODE_MESSAGE.match(msg)
+    else:
+        return None
+    if match is None:
+        return None
+    return _parse_key(match.group(1)), int(match.group(2))
+
+
+def _parse_key(token):
+    # the repr of the key, literals only
+    try:
+        return ast.literal_eval(token)
+    except (ValueError, SyntaxError):
+        return parse_value(token)
+
+
+def _key(key):
+    # JSON turns tuple keys into lists
+    return tuple(_key(k) for k in key) if isinstance(key, list) else key
+
+
+class TaskJournal(object):
+    """Append-only journal of the task states and node progress of a
+    fabrication, to resume it after a crash.
+
+    Every record is one JSON line ``{"t": time, "key": key, "state": state}``
+    or ``{"t": time, "key": key, "node": i}``, written and flushed at once.
+    A line cut off by a crash is skipped when the journal is read.
+
+    Parameters
+    ----------
+    path : string
+        Path of the journal file, appended to if it exists.
+    fsync : boolean
+        Set to "True" to sync state records to disk, so they also survive
+        a crash of the operating system. Node records are only flushed.
+        Default set to "True".
+
+    """
+    def __init__(self, path, fsync=True):
+        self.path = path
+        self.fsync = fsync
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _write(self, record, sync=False):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a")
+                if self._file.tell() and not self._ends_with_newline():
+                    # end a line cut off by a crash
+                    self._file.write("\n")
+            self._file.write(line)
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def record_state(self, key, state):
+        self._write({"t": time.time(), "key": key, "state": state}, self.fsync)
+
+    def record_node(self, key, node):
+        self._write({"t": time.time(), "key": key, "node": node})
+
+    def read(self):
+        """Read the records of the journal.
+
+        Returns
+        -------
+        list of dictionary
+            The records in the order they were written.
+
+        """
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # cut off by a crash
+                    continue
+                record["key"] = _key(record["key"])
+                records.append(record)
+        return records
+
+    def replay(self):
+        """Return the last state and node of every task.
+
+        Returns
+        -------
+        tuple
+            (states, nodes), dictionaries by task key.
+
+        """
+        states, nodes = {}, {}
+        for record in self.read():
+            if "state" in record:
+                states[record["key"]] = record["state"]
+                if record["state"] == "completed":
+                    nodes.pop(record["key"], None)
+            else:
+                nodes[record["key"]] = record["node"]
+        return states, nodes
+
+    def restore(self, scheduler):
+        """Mark the journaled completed tasks of a :class:`TaskScheduler`
+        as completed, and set the node to resume the others from.
+
+        Interrupted tasks stay waiting, their entry gets the last reached
+        "node", and tasks with a ``start_node`` attribute, e.g.
+        :class:`URTask`, start after it. Other tasks are performed from the
+        beginning again.
+
+        Returns
+        -------
+        integer
+            Number of restored completed tasks.
+
+        """
+        states, nodes = self.replay()
+        completed = 0
+        for key, state in states.items():
+            if state == "completed" and key in scheduler.tasks:
+                scheduler.complete(key)
+                completed += 1
+        for key, node in nodes.items():
+            entry = scheduler.tasks.get(key)
+            if entry is None or entry["state"] == "completed":
+                continue
+            entry["node"] = node
+            if hasattr(entry["task"], "start_node"):
+                entry["task"].start_node = node + 1
+            else:
+                print("Task {} is performed from the beginning, it was interrupted at node {}".format(key, node))
+        return completed
+
+    def compact(self):
+        """Rewrite the journal with only the last records of every task.
+
+        The compacted journal replaces the old one at once, it is never
+        left half written.
+        """
+        states, nodes = self.replay()
+        t = time.time()
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            for key, state in states.items():
+                f.write(json.dumps({"t": t, "key": key, "state": state}, separators=(",", ":")) + "\n")
+            for key, node in nodes.items():
+                f.write(json.dumps({"t": t, "key": key, "node": node}, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        with self._lock:
+            self.close()
+            getattr(os, "replace", os.rename)(tmp, self.path)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,299 @@
+import time
+from threading import Thread
+from ..communication import send_to
+from .fabrication import FabricationFeedbackServer
+from .scheduler import TaskScheduler
+from .journal import TaskJournal
+from .timing import TaskTimer
+
+__all__ = ["Robot",
+           "MultiRobotFabrication"]
+
+
+class Robot(object):
+    """A robot of a :class:`MultiRobotFabrication` with its feedback server.
+
+    Parameters
+    ----------
+    name : string
+        Name of the robot.
+    ur_ip : string
+        IP of the UR Robot.
+    ur_port : integer
+        Port number of the UR Robot.
+    server_ip : string
+        IP of the feedback server of the robot.
+    server_port : integer
+        Port number of the feedback server of the robot.
+    maxlen, spill : see :class:`MessageStore`.
+
+    Attributes
+    ----------
+    current_task : object
+        Key of the task performed by the robot, "None" while idle.
+    completed : list
+        Keys of the tasks completed by the robot, in order.
+    error : Exception
+        Error the robot stopped at, "None" while it works.
+
+    """
+    def __init__(self, name, ur_ip, ur_port, server_ip, server_port, maxlen=None, spill=None):
+        self.name = name
+        self.ur_ip = ur_ip
+        self.ur_port = ur_port
+        self.server = FabricationFeedbackServer(server_ip, server_port, maxlen=maxlen, spill=spill)
+        self.current_task = None
+        self.completed = []
+        self.error = None
+
+    @property
+    def server_address(self):
+        return self.server.server.server_address
+
+    def send(self, task):
+        """Send the script of a task, a :class:`URScript`, :class:`URTask`
+        or string, to the robot."""
+        if hasattr(task, "prepare"):
+            data = task.prepare()
+        else:
+            data = task
+        send_to(self.ur_ip, self.ur_port, data)
+
+    def __repr__(self):
+        return "Robot({}, {}:{})".format(self.name, self.ur_ip, self.ur_port)
+
+
+class MultiRobotFabrication(object):
+    """Performs tasks from a shared pool with several robots.
+
+    Every robot runs the next ready task as soon as it completed its
+    current one. A task can be bound to a robot, and can depend on other
+    tasks, e.g. an element placed before the element resting on it, see
+    :class:`TaskScheduler`. A task which is not bound to a robot can be
+    given as a function returning the script for the robot performing it,
+    so it reports to the right feedback server.
+
+    Attributes
+    ----------
+    robots : dictionary
+        The :class:`Robot` objects by name.
+    tasks (read-only) : dictionary
+        Task entries by key.
+    timer : :class:`TaskTimer`
+        Timestamps of the performed tasks.
+    failures : list
+        (task key, robot name, error) of the tasks a robot failed to
+        perform. The robot stops, the task waits to be performed again.
+
+    """
+    def __init__(self):
+        self.robots = {}
+        self.scheduler = TaskScheduler()
+        self.journal = None
+        self.timer = TaskTimer()
+        self.failures = []
+        self._stop_thread = False
+        self._threads = []
+
+    @property
+    def tasks(self):
+        return self.scheduler.tasks
+
+    def add_robot(self, name, ur_ip, ur_port, server_ip, server_port, maxlen=None, spill=None):
+        robot = Robot(name, ur_ip, ur_port, server_ip, server_port, maxlen, spill)
+        robot.server.journal = self.journal
+        robot.server.timer = self.timer
+        self.robots[name] = robot
+        return robot
+
+    def add_task(self, task, exit_msg, key=None, robot=None, depends_on=None, task_type=None):
+        """Add a task to the pool.
+
+        Parameters
+        ----------
+        task : object
+            A :class:`URScript`, :class:`URTask` or script string, or a
+            function returning one for a :class:`Robot`.
+        exit_msg : string
+            Message the script sends to the feedback server when done.
+        key : object (None)
+            Key of the task, tasks are performed in the order of their keys.
+            Default set to "None" for the number of added tasks.
+        robot : string (None)
+            Name of the robot to perform the task.
+            Default set to "None" for any robot.
+        depends_on : sequence (None)
+            Keys of the tasks to complete before.
+            Default set to "None" for no dependencies.
+        task_type : string (None)
+            Type the task is timed as, see :class:`TaskTimer`.
+            Default set to "None" for the class name of the task.
+
+        """
+        if key is None:
+            key = len(self.tasks)
+        self.scheduler.add(key, {"state": "waiting",
+                                 "exit_message": exit_msg,
+                                 "task": task,
+                                 "robot": robot,
+                                 "depends_on": list(depends_on or []),
+                                 "type": task_type or type(task).__name__})
+
+    def set_journal(self, path, fsync=True, resume=True):
+        """Record the task states and node progress in a :class:`TaskJournal`,
+        see :meth:`Fabrication.set_journal`."""
+        self.journal = TaskJournal(path, fsync)
+        if resume:
+            completed = self.journal.restore(self.scheduler)
+            self.journal.compact()
+            print("Resumed from journal, {} tasks completed".format(completed))
+        self.scheduler.journal = self.journal
+        for robot in self.robots.values():
+            robot.server.journal = self.journal
+
+    def tasks_available(self):
+        return self.scheduler.available()
+
+    def progress(self, key):
+        """Estimate the node the robot is at in a task, see
+        :meth:`TaskTimer.progress`."""
+        if key not in self.tasks:
+            return None
+        return self.timer.progress(key, self.tasks[key]["task"])
+
+    def clear_tasks(self):
+        self.scheduler.clear()
+        self.timer.clear()
+
+    def start(self):
+        self.stop()
+        if not self.tasks_available():
+            print("No_tasks_available")
+            return
+        self._stop_thread = False
+        self.failures = []
+        for robot in self.robots.values():
+            robot.error = None
+            if not hasattr(robot.server, "server_thread"):
+                robot.server.start()
+            thread = Thread(target=self.run, args=(robot, lambda: self._stop_thread))
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+        print("Started {} robot threads".format(len(self._threads)))
+
+    def join(self, timeout=None):
+        """Wait until all tasks are completed or a robot failed, returns
+        "True" if all tasks are completed, see :attr:`failures`."""
+        self.scheduler.wait(lambda: not self.tasks_available() or self.failures, timeout)
+        return not self.tasks_available()
+
+    def stop(self):
+        """Stop the robot threads, running tasks are performed again on the
+        next start."""
+        self._stop_thread = True
+        with self.scheduler.changed:
+            self.scheduler.changed.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def close(self):
+        self.stop()
+        for robot in self.robots.values():
+            robot.server.clear()
+            robot.server.shutdown()
+        if self.journal is not None:
+            self.journal.close()
+
+    def run(self, robot, stop_thread, poll=0.5):
+        """Perform ready tasks with a robot until all tasks are completed."""
+        scheduler = self.scheduler
+        while self.tasks_available() and not stop_thread():
+            key = scheduler.pop(robot.name)
+            if key is None:
+                scheduler.wait(lambda: stop_thread() or not self.tasks_available() or
+                               scheduler.next(robot.name) is not None, poll)
+                continue
+            entry = self.tasks[key]
+            robot.current_task = key
+            self.timer.sent(key, entry["type"], robot.name)
+            try:
+                self.perform_task(robot, entry["task"])
+            except Exception as e:
+                self._failed(robot, key, e)
+                return
+            while not robot.server.wait_for(entry["exit_message"], timeout=poll):
+                if stop_thread():
+                    break
+            else:
+                self.timer.exit(key)
+                robot.completed.append(key)
+                scheduler.complete(key)
+                robot.current_task = None
+                continue
+            scheduler.set_state(key, "waiting")
+            robot.current_task = None
+
+    def _failed(self, robot, key, error):
+        print("Robot {} failed to perform task {}: {}".format(robot.name, key, error))
+        robot.error = error
+        robot.current_task = None
+        self.failures.append((key, robot.name, error))
+        # wakes join
+        self.scheduler.set_state(key, "waiting")
+
+    def perform_task(self, robot, task):
+        if callable(task):
+            task = task(robot)
+        robot.send(task)
+
+
+if __name__ == '__main__':
+    import socket
+    import threading
+
+    def fake_controller(ur_socket, robot, motion=0.05):
+        # sends the exit message of every received script after ``motion`` s
+        feedback = socket.create_connection(robot.server_address)
+        feedback_file = feedback.makefile('rb')
+        c, _ = ur_socket.accept()
+        f = c.makefile('rb')
+        while True:
+            line = f.readline().decode()
+            if not line:
+                break
+            if line.startswith("Task_"):
+                time.sleep(motion)
+                feedback.sendall(line.encode())
+                feedback_file.readline()
+        feedback.close()
+
+    # a wall of 4 columns, every element rests on the one 4 below
+    n, columns = 32, 4
+    for robots in [1, 2, 4]:
+        fab = MultiRobotFabrication()
+        for r in range(robots):
+            ur_socket = socket.socket()
+            ur_socket.bind(("localhost", 0))
+            ur_socket.listen(1)
+            robot = fab.add_robot("robot_{}".format(r), "localhost", ur_socket.getsockname()[1],
+                                  "localhost", 0)
+            robot.server.add_message = lambda msg, seq=None, robot=robot: robot.server.msgs.add(msg, seq)
+            robot.server.start()
+            t = threading.Thread(target=fake_controller, args=(ur_socket, robot))
+            t.daemon = True
+            t.start()
+        for i in range(n):
+            exit_msg = "Task_{}_complete".format(i)
+            fab.add_task(exit_msg + "\n", exit_msg,
+                         depends_on=[i - columns] if i >= columns else None)
+        t0 = time.time()
+        fab.start()
+        fab.join()
+        wall = time.time() - t0
+        fab.stop()
+        summary = fab.timer.summary()
+        print("{} robots: {} tasks in {:.2f} s, {}, {:.0f} elements per hour, idle p95 {:.1f} ms".format(
+            robots, n, wall, [len(robot.completed) for robot in fab.robots.values()],
+            summary["elements_per_hour"], summary["idle"]["p95"] * 1e3))
@@ -0,0 +1,81 @@
+import sys
+import threading
+if sys.version_info[0] == 3:
+    from queue import Queue
+else:
+    from Queue import Queue
+
+__all__ = ["TaskPipeline"]
+
+
+class TaskPipeline(object):
+    """Look-ahead stage preparing upcoming tasks in a background thread.
+
+    Tasks with a ``prepare`` method, e.g. :class:`URScript` and
+    :class:`URTask`, have their script generated, encoded and the
+    connection to the robot opened while the current task runs, so they
+    can be sent as soon as it is completed.
+
+    Parameters
+    ----------
+    depth : integer
+        Number of upcoming tasks prepared ahead.
+        Default set to 1, 0 prepares every task when it is performed.
+
+    """
+    def __init__(self, depth=1):
+        self.depth = depth
+        self._entries = {}   # id(task): [task, prepared event, error]
+        self._queue = Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, tasks):
+        """Queue tasks to be prepared, tasks beyond :attr:`depth` are left out."""
+        for task in list(tasks)[:self.depth]:
+            if not hasattr(task, "prepare"):
+                continue
+            with self._lock:
+                if id(task) in self._entries:
+                    continue
+                entry = self._entries[id(task)] = [task, threading.Event(), None]
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._work)
+                    self._thread.daemon = True
+                    self._thread.start()
+            self._queue.put(entry)
+
+    def take(self, task):
+        """Wait until the task is prepared, prepares it if it was not queued."""
+        with self._lock:
+            entry = self._entries.pop(id(task), None)
+        if entry is not None:
+            entry[1].wait()
+            if entry[2] is None:
+                return
+        if hasattr(task, "prepare"):
+            # raises the error of a failed preparation in the calling thread
+            task.prepare()
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+    def close(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+        self.clear()
+
+    def _work(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                break
+            try:
+                entry[0].prepare()
+            except Exception as e:
+                entry[2] = e
+            entry[1].set()
@@ -0,0 +1,172 @@
+import heapq
+import threading
+import time
+
+__all__ = ["TaskScheduler"]
+
+WAITING = "waiting"
+RUNNING = "running"
+COMPLETED = "completed"
+
+
+class TaskScheduler(object):
+    """Bookkeeping of the task states of a fabrication.
+
+    Waiting tasks are kept in ready queues ordered by key, so the next
+    task is found in O(log n) and completing a task is O(1) plus its
+    dependents. Threads can wait for state changes instead of polling.
+
+    A task entry can name keys it depends on in "depends_on", it is ready
+    once these tasks are completed, and a "robot" it has to be performed
+    by, tasks without one can be performed by any robot.
+
+    Attributes
+    ----------
+    tasks : dictionary
+        Task entries by key, each a dictionary with at least a "state" of
+        "waiting", "running" or "completed".
+    remaining (read-only) : integer
+        Number of tasks not completed.
+    journal : :class:`TaskJournal`
+        Journal the state changes are recorded in.
+        Default set to "None".
+
+    """
+    def __init__(self):
+        self.changed = threading.Condition()
+        self.journal = None
+        self.clear()
+
+    def clear(self):
+        with self.changed:
+            self.tasks = {}
+            self._ready = {None: []}   # robot: heap of keys, None for any robot
+            self._blocking = {}        # key: number of dependencies not completed
+            self._dependents = {}      # key: keys depending on it
+            self._remaining = 0
+            self.changed.notify_all()
+
+    @property
+    def remaining(self):
+        return self._remaining
+
+    def add(self, key, entry):
+        """Add or replace the task entry of a key."""
+        with self.changed:
+            old = self.tasks.get(key)
+            if old is not None:
+                if old["state"] == COMPLETED:
+                    self._completion_changed(key, False)
+                self._remaining -= 1
+                for dependency in old.get("depends_on") or ():
+                    self._dependents[dependency].remove(key)
+            self.tasks[key] = entry
+            entry.setdefault("state", WAITING)
+            blocking = 0
+            for dependency in entry.get("depends_on") or ():
+                self._dependents.setdefault(dependency, []).append(key)
+                dep = self.tasks.get(dependency)
+                if dep is None or dep["state"] != COMPLETED:
+                    blocking += 1
+            self._blocking[key] = blocking
+            self._remaining += 1
+            if entry["state"] == COMPLETED:
+                self._completion_changed(key, True)
+            self._entered(key)
+
+    def set_state(self, key, state):
+        if self.journal is not None and self.tasks[key]["state"] != state:
+            # written before the change is visible to other threads, but
+            # without holding the lock, so they do not wait for the disk
+            self.journal.record_state(key, state)
+        with self.changed:
+            entry = self.tasks[key]
+            old_state = entry["state"]
+            if old_state == state:
+                return
+            entry["state"] = state
+            if (old_state == COMPLETED) != (state == COMPLETED):
+                self._completion_changed(key, state == COMPLETED)
+            self._entered(key)
+
+    def _completion_changed(self, key, completed):
+        # update the counts of the remaining tasks and of the dependents
+        change = -1 if completed else 1
+        self._remaining += change
+        for dependent in self._dependents.get(key, ()):
+            self._blocking[dependent] += change
+            self._entered(dependent)
+
+    def _entered(self, key):
+        if self.is_ready(key):
+            entry = self.tasks[key]
+            heapq.heappush(self._ready.setdefault(entry.get("robot"), []), key)
+        self.changed.notify_all()
+
+    def complete(self, key):
+        self.set_state(key, COMPLETED)
+
+    def available(self):
+        """Return "True" if any task is not completed."""
+        return self._remaining > 0
+
+    def is_ready(self, key):
+        entry = self.tasks.get(key)
+        return entry is not None and entry["state"] == WAITING and not self._blocking[key]
+
+    def _heaps(self, robot):
+        if robot is None:
+            return [self._ready[None]]
+        return [self._ready.setdefault(robot, []), self._ready[None]]
+
+    def next(self, robot=None):
+        """Return the smallest ready key of a robot, "None" if no task is
+        ready."""
+        with self.changed:
+            best = None
+            for heap in self._heaps(robot):
+                # entries whose state changed since they were queued are skipped
+                while heap and not self.is_ready(heap[0]):
+                    heapq.heappop(heap)
+                if heap and (best is None or heap[0] < best[0]):
+                    best = heap
+            return best[0] if best else None
+
+    def upcoming(self, n, robot=None):
+        """Return the n smallest ready keys of a robot, in order."""
+        with self.changed:
+            keys = []
+            # walk the heaps from their roots, O(n log n) for the n keys
+            heaps = self._heaps(robot)
+            candidates = [(heap[0], 0, h) for h, heap in enumerate(heaps) if heap]
+            while candidates and len(keys) < n:
+                key, i, h = heapq.heappop(candidates)
+                if self.is_ready(key) and key not in keys:
+                    keys.append(key)
+                for child in (2 * i + 1, 2 * i + 2):
+                    if child < len(heaps[h]):
+                        heapq.heappush(candidates, (heaps[h][child], child, h))
+            return keys
+
+    def pop(self, robot=None):
+        """Mark the next ready task of a robot as running and return its key."""
+        with self.changed:
+            key = self.next(robot)
+            if key is not None:
+                self.tasks[key]["state"] = RUNNING
+        if key is not None and self.journal is not None:
+            self.journal.record_state(key, RUNNING)
+        return key
+
+    def wait(self, predicate, timeout=None):
+        """Wait until ``predicate()`` is true, returns its last result."""
+        t_end = None if timeout is None else time.time() + timeout
+        with self.changed:
+            result = predicate()
+            while not result:
+                wait = None if t_end is None else t_end - time.time()
+                if wait is not None and wait <= 0:
+                    break
+                self.changed.wait(wait)
+                result = predicate()
+            return result
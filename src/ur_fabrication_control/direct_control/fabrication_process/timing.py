@@ -0,0 +1,173 @@
+import csv
+import json
+import time
+import threading
+
+__all__ = ["TaskTimer",
+           "percentile"]
+
+clock = getattr(time, "perf_counter", time.time)
+
+FIELDS = ["key", "type", "robot", "sent", "first_node", "exit", "duration", "nodes", "idle_before"]
+
+
+def percentile(values, p):
+    """Return the p-th percentile of values, linearly interpolated, "None"
+    without values."""
+    values = sorted(values)
+    if not values:
+        return None
+    k = (len(values) - 1) * p / 100.0
+    i = int(k)
+    if i + 1 >= len(values):
+        return values[-1]
+    return values[i] + (values[i + 1] - values[i]) * (k - i)
+
+
+class TaskTimer(object):
+    """Timestamps of the tasks of a fabrication on a monotonic clock.
+
+    For every task the time its script is sent, the times of its node
+    messages and the time its exit message is received are recorded, in s
+    since the timer was created.
+
+    Parameters
+    ----------
+    clock : callable
+        Monotonic clock returning the time in s.
+        Default set to time.perf_counter.
+
+    Attributes
+    ----------
+    start_time : float
+        Wall clock time the timer was created, as time.time().
+    records : dictionary
+        Timestamps by task key.
+
+    """
+    def __init__(self, clock=clock):
+        self.start_time = time.time()
+        self._clock = clock
+        self._t0 = clock()
+        self.records = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self.start_time = time.time()
+            self._t0 = self._clock()
+            self.records = {}
+
+    def now(self):
+        return self._clock() - self._t0
+
+    def sent(self, key, task_type=None, robot=None):
+        with self._lock:
+            # a task performed again is timed from its last run
+            self.records[key] = {"type": task_type, "robot": robot, "sent": self.now(),
+                                 "nodes": [], "exit": None}
+
+    def node(self, key, node):
+        t = self.now()
+        with self._lock:
+            record = self.records.get(key)
+            if record is not None:
+                record["nodes"].append((node, t))
+
+    def exit(self, key):
+        t = self.now()
+        with self._lock:
+            record = self.records.get(key)
+            if record is not None:
+                record["exit"] = t
+
+    def progress(self, key, task):
+        """Estimate the node the robot is at in a task from the last node
+        message, see :meth:`URTask.estimate_node`.
+
+        Returns
+        -------
+        float or None
+            Fractional node index, "None" for tasks which were not sent or
+            can not estimate their progress.
+
+        """
+        with self._lock:
+            record = self.records.get(key)
+            if record is None or not hasattr(task, "estimate_node"):
+                return None
+            node, t = record["nodes"][-1] if record["nodes"] else (None, record["sent"])
+        return task.estimate_node(node, self.now() - t)
+
+    def rows(self):
+        """Return one row per task in the order they were sent, with the
+        duration from sending to the exit message and the idle time of the
+        robot before the task was sent."""
+        with self._lock:
+            records = sorted(self.records.items(), key=lambda item: item[1]["sent"])
+        rows = []
+        last_exit = {}
+        for key, record in records:
+            robot = record["robot"]
+            previous = last_exit.get(robot)
+            exit_time = record["exit"]
+            rows.append({
+                "key": key,
+                "type": record["type"],
+                "robot": robot,
+                "sent": record["sent"],
+                "first_node": record["nodes"][0][1] if record["nodes"] else None,
+                "exit": exit_time,
+                "duration": None if exit_time is None else exit_time - record["sent"],
+                "nodes": len(record["nodes"]),
+                "idle_before": None if previous is None else max(record["sent"] - previous, 0.0)})
+            if exit_time is not None:
+                last_exit[robot] = exit_time
+        return rows
+
+    def summary(self):
+        """Summarize the recorded tasks.
+
+        Returns
+        -------
+        dictionary
+            "types": count and p50/p95/mean duration in s per task type,
+            "idle": p50/p95 and total of the idle gaps in s,
+            "completed": number of completed tasks,
+            "elements_per_hour": completed tasks per hour from the first
+            sent script to the last exit message.
+
+        """
+        rows = self.rows()
+        done = [row for row in rows if row["duration"] is not None]
+        types = {}
+        for row in done:
+            types.setdefault(str(row["type"]), []).append(row["duration"])
+        gaps = [row["idle_before"] for row in rows if row["idle_before"] is not None]
+        span = max(row["exit"] for row in done) - min(row["sent"] for row in rows) if done else 0
+        return {
+            "types": dict((name, {"count": len(d),
+                                  "p50": percentile(d, 50),
+                                  "p95": percentile(d, 95),
+                                  "mean": sum(d) / len(d)}) for name, d in types.items()),
+            "idle": {"count": len(gaps),
+                     "p50": percentile(gaps, 50),
+                     "p95": percentile(gaps, 95),
+                     "total": sum(gaps)},
+            "completed": len(done),
+            "elements_per_hour": len(done) / span * 3600 if span > 0 else None}
+
+    def to_csv(self, path):
+        """Write one row per task, see :meth:`rows`."""
+        with open(path, "w") as f:
+            writer = csv.DictWriter(f, FIELDS, lineterminator="\n")
+            writer.writeheader()
+            for row in self.rows():
+                writer.writerow(row)
+
+    def to_json(self, path):
+        """Write the summary and the rows of the tasks."""
+        with open(path, "w") as f:
+            json.dump({"start_time": self.start_time,
+                       "summary": self.summary(),
+                       "tasks": self.rows()}, f, indent=2, default=str)
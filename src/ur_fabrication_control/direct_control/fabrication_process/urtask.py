@@ -1,12 +1,43 @@
+import math
+from bisect import bisect_right
 from fabrication_manager.task import Task
 from ur_fabrication_control.direct_control import URScript
 from ur_fabrication_control.direct_control.common import send_stop
+from ur_fabrication_control.direct_control.utilities import frames_to_pose_array, simplify_path
+from ur_fabrication_control.direct_control.fabrication_process.journal import format_node_message
 
 __all__ = [
     "URTask"
 ]
 
+
+def _check_feedback(feedback):
+    if feedback in ("node", "segment", None):
+        return
+    if not isinstance(feedback, int) or isinstance(feedback, bool) or feedback < 1:
+        raise ValueError("feedback must be \"node\", \"segment\", None or an integer "
+                         "of at least 1, got {!r}".format(feedback))
+
+
 class URTask(Task):
+    """Task performing a URScript, created from path nodes or given.
+
+    Attributes
+    ----------
+    feedback : string or integer
+        Nodes a message is sent at, see :meth:`create_urscript_from_nodes`.
+        Default set to "node".
+    compact : boolean
+        Set to "True" to send compact node messages.
+        Default set to "False".
+    start_node : integer
+        Index of the first node performed, setting it recreates the
+        URScript of a task created from nodes.
+        Default set to 0.
+    node_times : list of float
+        Expected time in s from the first node to every node.
+
+    """
     def __init__(self, robot, robot_address, key=None):
         super(URTask, self).__init__(key)
         self.robot = robot
@@ -14,6 +45,29 @@ class URTask(Task):
         self.req_msg = "Task_{}_complete".format(key)
         self.sent = False
         self.server = None
+        self.urscript = None
+        self._start_node = 0
+        self.feedback = "node"
+        self.compact = False
+        self.feedback_nodes = []
+        self.node_times = []
+        self._nodes = None
+
+    @property
+    def start_node(self):
+        return self._start_node
+
+    @start_node.setter
+    def start_node(self, node):
+        if node == self._start_node:
+            return
+        self._start_node = node
+        if self._nodes is not None:
+            # created again from the start node by prepare
+            self.urscript = None
+        elif self.urscript is not None:
+            self.log("Task {} can not start at node {}, its URScript is given and "
+                     "is performed from the beginning".format(self.key, node))
 
     @classmethod
     def from_urscript(cls, robot, robot_address, urscript, key=None):
@@ -22,12 +76,56 @@ class URTask(Task):
         return urtask
 
     @classmethod
-    def from_nodes(cls, robot, robot_address, nodes, key=None):
+    def from_nodes(cls, robot, robot_address, nodes, key=None,
+                   tolerance=None, angle_tolerance=None, feedback="node", compact=False):
+        """Create a task whose URScript is created from path nodes by
+        :meth:`prepare`, once the feedback server is set."""
+        _check_feedback(feedback)
         urtask = cls(robot, robot_address, key)
-        urtask.create_urscript_from_nodes(nodes)
+        urtask.feedback = feedback
+        urtask.compact = compact
+        urtask._nodes = (nodes, tolerance, angle_tolerance)
         return urtask
 
-    def create_urscript_from_nodes(self, nodes):
+    def create_urscript_from_nodes(self, nodes, tolerance=None, angle_tolerance=None,
+                                   feedback=None, compact=None):
+        """Create the URScript of the task from path nodes.
+
+        Parameters
+        ----------
+        nodes : sequence of object
+            Path nodes with type, frame or joint_configuration, robot_vel
+            and radius.
+        tolerance : float (None)
+            Position tolerance in m to remove nearly collinear linear
+            nodes with, see :func:`simplify_path`.
+            Default set to "None" to keep all nodes.
+        angle_tolerance : float (None)
+            Orientation tolerance in rad used with ``tolerance``.
+        feedback : string or integer (None)
+            Nodes a message is sent at: "node" for every node, an integer k
+            for every k-th node, "segment" for the last node of every run
+            of nodes of the same type, or "None" for none. The last node
+            always sends a message.
+            Default set to "None" to use :attr:`feedback`.
+        compact : boolean (None)
+            Set to "True" to send ``@key i`` instead of
+            ``{'TASK': key, 'NODE': i}``, see :func:`format_node_message`.
+            Default set to "None" to use :attr:`compact`.
+
+        Nodes before :attr:`start_node` are left out, e.g. when resuming
+        an interrupted task, see :class:`TaskJournal`.
+
+        """
+        feedback = self.feedback if feedback is None else feedback
+        compact = self.compact if compact is None else compact
+        skip = set()
+        if tolerance is not None:
+            skip = self._simplify_nodes(nodes, tolerance, angle_tolerance)
+        kept = [i for i in range(self.start_node, len(nodes)) if i not in skip]
+        self.feedback_nodes = self._feedback_nodes(nodes, kept, feedback)
+        self.node_times = self._node_times(nodes, kept)
+        reported = set(self.feedback_nodes)
         self.urscript = URScript(*self.robot_address)
         self.urscript.start()
         tool = self.robot.attached_tool
@@ -39,15 +137,17 @@ class URTask(Task):
         self.urscript.socket_open(self.server.name)
 
         # currently assuming frames are in RCS
-        for i, node in enumerate(nodes):
+        for i in kept:
+            node = nodes[i]
             if node.type == "linear":
                 self.urscript.move_linear(node.frame, node.robot_vel, node.radius)
             elif node.type == "process":
                 self.urscript.move_process(node.frame, node.robot_vel, node.radius)
             elif node.type == "joints":
                 self.urscript.move_joint(node.joint_configuration, node.robot_vel)
-            node_msg = {"TASK":self.key, "NODE":i}
-            self.urscript.socket_send_line_string(str(node_msg), self.server.name)
+            if i in reported:
+                node_msg = format_node_message(self.key, i, compact)
+                self.urscript.socket_send_line_string(node_msg, self.server.name)
         
         self.urscript.socket_send_line_string(self.req_msg, self.server.name)
         self.urscript.socket_close(self.server.name)
@@ -55,15 +155,126 @@ class URTask(Task):
         self.urscript.end()
         self.urscript.generate()
 
+    def _feedback_nodes(self, nodes, kept, feedback):
+        # Indices of the kept nodes sending a message, in order
+        if feedback == "node":
+            reported = list(kept)
+        elif feedback == "segment":
+            reported = [i for i, j in zip(kept, kept[1:]) if nodes[i].type != nodes[j].type]
+        elif feedback is None:
+            reported = []
+        else:
+            _check_feedback(feedback)
+            reported = kept[feedback - 1::feedback]
+        if kept and kept[-1] not in reported[-1:]:
+            reported.append(kept[-1])
+        return reported
+
+    def _node_times(self, nodes, kept):
+        # Expected time from the first kept node to every node
+        kept = set(kept)
+        times = [0.0] * len(nodes)
+        t = 0.0
+        previous = None
+        for i, node in enumerate(nodes):
+            if i in kept:
+                if previous is not None:
+                    t += self._move_time(previous, node)
+                previous = node
+            times[i] = t
+        return times
+
+    @staticmethod
+    def _move_time(start, end):
+        if not end.robot_vel:
+            return 0.0
+        if end.type == "joints":
+            if getattr(start, "joint_configuration", None) is None:
+                return 0.0
+            a = list(getattr(start.joint_configuration, "values", start.joint_configuration))
+            b = list(getattr(end.joint_configuration, "values", end.joint_configuration))
+            return max(abs(x - y) for x, y in zip(a, b)) / end.robot_vel
+        if getattr(start, "frame", None) is None:
+            return 0.0
+        a, b = list(start.frame.point), list(end.frame.point)
+        return math.sqrt(sum((x - y) ** 2 for x, y in zip(a, b))) / end.robot_vel
+
+    def estimate_node(self, node, elapsed):
+        """Interpolate the progress of the robot between node messages.
+
+        Parameters
+        ----------
+        node : integer or None
+            Index of the node of the last received message, "None" if none
+            was received since the script was sent.
+        elapsed : float
+            Time in s since that message, or since the script was sent.
+
+        Returns
+        -------
+        float
+            Estimated fractional node index, at most the index of the next
+            node sending a message.
+
+        """
+        times = self.node_times
+        start = self.start_node if node is None else node
+        if not times or start >= len(times) - 1:
+            return float(start)
+        # the robot has not reached the next reported node yet
+        i_next = bisect_right(self.feedback_nodes, start)
+        upper = self.feedback_nodes[i_next] if i_next < len(self.feedback_nodes) else len(times) - 1
+        target = times[start] + elapsed
+        i = bisect_right(times, target, start, upper + 1) - 1
+        # next node further along the path, skipped nodes share the time
+        j = bisect_right(times, times[i], i, upper + 1)
+        if j > upper:
+            return float(upper)
+        return j - 1 + (target - times[i]) / (times[j] - times[i])
+
+    def _simplify_nodes(self, nodes, tolerance, angle_tolerance=None):
+        # Simplify runs of consecutive linear nodes, returns removed indices
+        runs = []
+        for i, node in enumerate(nodes):
+            if node.type != "linear":
+                continue
+            if runs and runs[-1][-1] == i - 1:
+                runs[-1].append(i)
+            else:
+                runs.append([i])
+        skip = set()
+        max_deviation = max_angle_deviation = 0.0
+        for run in runs:
+            poses = frames_to_pose_array([nodes[i].frame for i in run])
+            kept, _, deviation, angle_deviation = simplify_path(poses, tolerance, angle_tolerance)
+            skip.update(set(run) - set(run[k] for k in kept))
+            max_deviation = max(max_deviation, deviation)
+            max_angle_deviation = max(max_angle_deviation, angle_deviation or 0.0)
+        self.log("Path simplified: removed {} of {} nodes, max deviation {} m, {} rad".format(
+            len(skip), len(nodes), max_deviation, max_angle_deviation))
+        return skip
+
+    def prepare(self):
+        """Create the URScript if needed and get it ready to be sent, see
+        :meth:`URScript.prepare`. Can run in a :class:`TaskPipeline` while
+        the previous task runs."""
+        if self.urscript is None and self._nodes is not None:
+            self.create_urscript_from_nodes(*self._nodes)
+        return self.urscript.prepare()
+
+    def send_script(self):
+        self.prepare()
+        self.urscript.send_script()
+        self.log("URScript sent...")
+        self.sent = True
+
     def check_req_msg(self):
         return self.req_msg in self.server.msgs.values()
 
-    def run(self, stop_thread):
+    def run(self, stop_thread, poll=0.1):
         if not self.sent:
-            self.urscript.send_script()
-            self.log("URScript sent...")
-            self.sent = True
-        while not self.check_req_msg():
+            self.send_script()
+        while not self.server.wait_for(self.req_msg, timeout=poll):
             if stop_thread():
                 self.log("Forced to stop...")
                 send_stop(self.urscript.ur_ip, self.urscript.ur_port)
@@ -71,8 +282,6 @@ class URTask(Task):
                 self.is_running = False
                 self.is_completed = False
                 break
-            else:
-                pass
         else:
             self.is_completed = True
             return True
\ No newline at end of file
@@ -1,7 +1,6 @@
 from __future__ import absolute_import
 
-import os
-from ..utilities import read_file_to_string
+from ..script_library import AIRPICK_LIBRARY
 
 
 class AirpickMixins:
@@ -30,11 +29,9 @@ class AirpickMixins:
         ]
         str_settings = ', '.join(settings)
         self.add_line('\trq_vacuum_release({})'.format(str_settings))
-        self.add_line("\tsleep({})".format(sleep))
+        self.sleep(sleep)
 
-    def add_airpick_commands(self):
-        """Add airpick functionality to the script"""
-        path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "scripts")
-        program_file = os.path.join(path, "airpick_methods.script")
-        program_str = read_file_to_string(program_file)
-        self.add_line(program_str, 2)
+    def add_airpick_commands(self, shake=True):
+        """Add airpick functionality to the script, only the functions used
+        by the script when ``shake`` is "True"."""
+        return self.add_library(AIRPICK_LIBRARY, shake)
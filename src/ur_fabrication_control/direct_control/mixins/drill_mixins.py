@@ -8,13 +8,13 @@ class DrillMixins:
         """Turn on the drill.
         """
         self.add_digital_out(3, True)
-        self.add_line("\tsleep({})".format(sleep))
+        self.sleep(sleep)
 
     def drill_off(self, sleep=1.0):
         """Turn off the drill.
         """
         self.add_digital_out(3, False)
-        self.add_line("\tsleep({})".format(sleep))
+        self.sleep(sleep)
 
 class URScript_Drill(URScript, DrillMixins):
     pass
\ No newline at end of file
@@ -0,0 +1,262 @@
+import atexit
+import time
+import threading
+from ur_fabrication_control.direct_control.urscript import URScript
+from ur_fabrication_control.direct_control.communication import TCPFeedbackServer, parse_message, send_to
+
+__all__ = [
+    'PoseFeedbackServer',
+    'PoseQueryService',
+    'get_pose_service',
+    'close_pose_services'
+]
+
+REPLY_PREFIX = "pose_reply "
+REQUEST_TOKEN = "__REQUEST_ID__"
+POSE_FUNCTIONS = {
+    "cartesian": "get_forward_kin()",
+    "joints": "get_actual_joint_positions()"
+}
+
+
+class PoseFeedbackServer(TCPFeedbackServer):
+    """Feedback server collecting the replies of pose queries by request id.
+
+    Replies are lines ``pose_reply <id> <pose>``, other lines are stored as
+    feedback messages.
+    """
+    def __init__(self, ip="192.168.10.11", port=50002, maxlen=1000, **kwargs):
+        super(PoseFeedbackServer, self).__init__(ip, port, maxlen=maxlen, **kwargs)
+        self._replies = {}
+        self._pending = set()
+        self._replied = threading.Condition()
+
+    def expect(self, request_id):
+        """Register a request id, replies to unknown ids are dropped."""
+        with self._replied:
+            self._pending.add(request_id)
+
+    def add_message(self, msg, seq=None):
+        if not msg.startswith(REPLY_PREFIX):
+            return super(PoseFeedbackServer, self).add_message(msg, seq)
+        request_id, _, pose = msg[len(REPLY_PREFIX):].partition(" ")
+        try:
+            request_id = int(request_id)
+        except ValueError:
+            print("Dropped malformed pose reply: {}".format(msg))
+            return
+        with self._replied:
+            if request_id in self._pending:
+                self._replies[request_id] = parse_message(pose)
+                self._replied.notify_all()
+
+    def wait_reply(self, request_id, timeout=None):
+        """Wait for the reply to a request.
+
+        Parameters
+        ----------
+        request_id : integer
+            Id of the request, see :meth:`expect`.
+        timeout : float (None)
+            Maximum wait in s.
+            Default set to "None" to wait without limit.
+
+        Returns
+        -------
+        list of float or None
+            The pose, "None" on timeout.
+
+        """
+        t_end = None if timeout is None else time.time() + timeout
+        with self._replied:
+            try:
+                while request_id not in self._replies:
+                    wait = None if t_end is None else t_end - time.time()
+                    if wait is not None and wait <= 0:
+                        return None
+                    self._replied.wait(wait)
+                return self._replies.pop(request_id)
+            finally:
+                self._pending.discard(request_id)
+
+
+class PoseQueryService(object):
+    """Long-lived service querying the current pose of UR Robots.
+
+    One feedback server keeps listening for all queries, and a reply is
+    matched to its query by a request id, so repeated queries skip binding
+    the server and wait without polling. The query scripts are generated
+    once per robot, pose type and tcp.
+
+    Parameters
+    ----------
+    server_ip : string
+        IP of the server.
+    server_port : integer
+        Port number of the server.
+    server : :class:`PoseFeedbackServer` (None)
+        Existing server to listen with, ``server_ip`` and ``server_port``
+        are then ignored.
+        Default set to "None" to create a server.
+
+    """
+    def __init__(self, server_ip, server_port, server=None):
+        if server is None:
+            server = PoseFeedbackServer(server_ip, server_port)
+        self.server = server
+        self._scripts = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, typ, val, tb):
+        self.close()
+
+    @property
+    def server_address(self):
+        return self.server.server.server_address
+
+    def start(self):
+        self.server.start()
+
+    def shutdown(self):
+        self.server.shutdown()
+
+    def close(self):
+        """Shut down the server and release its port."""
+        self.shutdown()
+        self.server.server.server_close()
+
+    def query_script(self, pose_type, ur_ip, ur_port, tcp=None, send=True):
+        """Return the script of a query, with a placeholder for the id."""
+        key = (pose_type, ur_ip, ur_port, tuple(tcp) if tcp is not None else None, send)
+        script = self._scripts.get(key)
+        if script is None:
+            ip, port = self.server_address
+            name = self.server.name
+            ur_cmds = URScript(ur_ip=ur_ip, ur_port=ur_port)
+            ur_cmds.start()
+            if tcp is not None:
+                ur_cmds.set_tcp(tcp)
+            ur_cmds.set_socket(ip, port, name)
+            ur_cmds.socket_open(name)
+            ur_cmds.get_current_pose(pose_type, socket_name=name, address=(ip, port))
+            if send:
+                ur_cmds.add_line('socket_send_string("{}{} ", socket_name={})'.format(
+                    REPLY_PREFIX, REQUEST_TOKEN, name))
+                ur_cmds.socket_send_line("current_pose", name, (ip, port))
+            ur_cmds.socket_close(name)
+            ur_cmds.end()
+            script = ur_cmds.generate()
+            self._scripts[key] = script
+        return script
+
+    def query(self, pose_type, ur_ip, ur_port, tcp=None, timeout=1.0):
+        """Query the current pose of a UR Robot.
+
+        Parameters
+        ----------
+        pose_type : string
+            "cartesian" for the tcp pose, "joints" for the joint positions.
+        ur_ip : string
+            IP of the UR Robot.
+        ur_port : integer
+            Port number of the UR Robot.
+        tcp : sequence of float (None)
+            Tool center point [x, y, z, dx, dy, dz] of a cartesian pose.
+            Default set to "None" to keep the tcp of the robot.
+        timeout : float
+            Maximum wait in s for the reply.
+            Default set to 1.
+
+        Returns
+        -------
+        list of float or None
+            The pose, "None" on timeout.
+
+        """
+        if pose_type not in POSE_FUNCTIONS:
+            raise ValueError("Unknown pose type: {}".format(pose_type))
+        with self._lock:
+            request_id = self._next_id
+            self._next_id += 1
+        script = self.query_script(pose_type, ur_ip, ur_port, tcp)
+        self.server.expect(request_id)
+        send_to(ur_ip, ur_port, script.replace(REQUEST_TOKEN, str(request_id)))
+        return self.server.wait_reply(request_id, timeout)
+
+    def get_current_pose_cartesian(self, ur_ip, ur_port, tcp=None, timeout=1.0):
+        return self.query("cartesian", ur_ip, ur_port, tcp, timeout)
+
+    def get_current_pose_joints(self, ur_ip, ur_port, timeout=1.0):
+        return self.query("joints", ur_ip, ur_port, None, timeout)
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_pose_service(server_ip, server_port):
+    """Return the started shared :class:`PoseQueryService` of an address.
+
+    The service keeps its port until :func:`close_pose_services`, which
+    also runs at exit.
+    """
+    key = (server_ip, server_port)
+    with _services_lock:
+        service = _services.get(key)
+        if service is None:
+            service = PoseQueryService(server_ip, server_port)
+            service.start()
+            _services[key] = service
+    return service
+
+
+def close_pose_services():
+    """Close the shared pose query services and release their ports."""
+    with _services_lock:
+        services = list(_services.values())
+        _services.clear()
+    for service in services:
+        service.close()
+
+
+atexit.register(close_pose_services)
+
+
+if __name__ == '__main__':
+    # fake controller answering the query scripts
+    import socket
+
+    def fake_controller(ur_socket):
+        while True:
+            c, _ = ur_socket.accept()
+            f = c.makefile('rb')
+            while True:
+                line = f.readline().decode()
+                if not line:
+                    break
+                if line.startswith("\tsocket_send_string"):
+                    reply = line.split('"')[1]
+                elif line.startswith("\tsocket_send_line(current_pose"):
+                    s = socket.create_connection(service.server_address)
+                    s.sendall("{}p[0.1, 0.2, 0.3, 0.0, 3.14, 0.0]\n".format(reply).encode())
+                    s.makefile('rb').readline()
+                    s.close()
+
+    ur_socket = socket.socket()
+    ur_socket.bind(("localhost", 0))
+    ur_socket.listen(1)
+    ur_ip, ur_port = ur_socket.getsockname()
+    with PoseQueryService("localhost", 0) as service:
+        t = threading.Thread(target=fake_controller, args=(ur_socket,))
+        t.daemon = True
+        t.start()
+        n = 50
+        t0 = time.time()
+        for _ in range(n):
+            pose = service.get_current_pose_cartesian(ur_ip, ur_port, tcp=[0, 0, 0.1, 0, 0, 0])
+        print("{} queries, {:.2f} ms per query, last pose {}".format(n, (time.time() - t0) / n * 1e3, pose))
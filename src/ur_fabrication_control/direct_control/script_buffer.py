@@ -0,0 +1,369 @@
+from array import array
+
+__all__ = [
+    'ScriptBuffer',
+    'RAW',
+    'MOVEL',
+    'MOVEJ',
+    'MOVEP',
+    'SET_TCP',
+    'SET_PAYLOAD',
+    'SLEEP',
+    'TEXTMSG',
+    'format_op',
+    'format_float'
+]
+
+# Opcodes of the script operations
+RAW = 0             # text line, kept as is
+MOVEL = 1           # x, y, z, rx, ry, rz, v, r
+MOVEJ = 2           # q0, q1, q2, q3, q4, q5, v, r
+MOVEP = 3           # x, y, z, rx, ry, rz, v, r
+SET_TCP = 4         # x, y, z, rx, ry, rz
+SET_PAYLOAD = 5     # mass (, cx, cy, cz)
+SLEEP = 6           # seconds
+TEXTMSG = 7         # text of the message expression
+
+TEXT_OPS = (RAW, TEXTMSG)
+
+TEMPLATES = {
+    MOVEL: "movel(p[%r, %r, %r, %r, %r, %r], v=%r, r=%r)",
+    MOVEJ: "movej([%r, %r, %r, %r, %r, %r], v=%r, r=%r)",
+    MOVEP: "movep(p[%r, %r, %r, %r, %r, %r], v=%r, r=%r)",
+    SET_TCP: "set_tcp(p[%r, %r, %r, %r, %r, %r])",
+    SLEEP: "sleep(%r)",
+}
+
+# Units of the arguments for rounding, m: length, a: angle, -: unchanged
+UNITS = {
+    MOVEL: "mmmaaamm",
+    MOVEJ: "aaaaaaam",
+    MOVEP: "mmmaaamm",
+    SET_TCP: "mmmaaa",
+    SET_PAYLOAD: "-mmm",
+    SLEEP: "-",
+}
+
+
+def format_float(value, digits):
+    """Format a float with at most ``digits`` decimals and no trailing zeros."""
+    text = "%.*f" % (digits, value)
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    if text in ("-0", ""):
+        text = "0"
+    return text
+
+
+def format_op(op, args, fmt="%r", precision=None, compact=False):
+    """Format an operation with its arguments to a line of URScript.
+
+    Parameters
+    ----------
+    op : integer
+        Opcode of the operation.
+    args : sequence
+        Arguments of the operation, the text for text operations.
+    fmt : string
+        Format of the arguments.
+        Default set to "%r".
+    precision : dictionary (None)
+        Decimals per unit, {"m": digits, "a": digits} for lengths (and
+        speeds) in m and angles in rad.
+        Default set to "None" to write the full precision.
+    compact : boolean
+        Set to "True" to leave out the spaces after commas.
+        Default set to "False".
+
+    Returns
+    -------
+    string
+
+    """
+    if precision is not None and op not in TEXT_OPS:
+        args = [format_float(a, precision[u]) if u in precision else repr(a)
+                for a, u in zip(args, UNITS[op])]
+        fmt = "%s"
+    if op == RAW:
+        return args
+    elif op == TEXTMSG:
+        return "textmsg(" + args + ")"
+    elif op == SET_PAYLOAD:
+        if len(args) == 1:
+            template = "set_payload(%r)"
+        else:
+            template = "set_payload(%r, [%r, %r, %r])"
+    else:
+        template = TEMPLATES[op]
+    if fmt != "%r":
+        template = template.replace("%r", fmt)
+    if compact:
+        template = template.replace(", ", ",")
+    return template % tuple(args)
+
+
+class ScriptBuffer(object):
+    """Append-only buffer of script operations with optional keyed
+    replacement.
+
+    Every entry is an opcode with numeric arguments, or a line of text for
+    operations without a numeric form (:data:`RAW`, :data:`TEXTMSG`). The
+    opcodes, indents and arguments are stored in flat arrays and only
+    rendered to text when the lines are requested, which keeps the memory
+    per script low and lets optimisation passes reason about the program.
+
+    Appending an entry without a key is O(1), and replacing the entry
+    stored under an existing key keeps its position. It offers the
+    dictionary methods used on the former URScript dictionaries (``keys``,
+    ``values``, ``items``, ``get``, ``[]``, ``in`` and ``len``).
+
+    Parameters
+    ----------
+    lines : sequence of string (None)
+        Initial lines, added with automatic keys.
+
+    Attributes
+    ----------
+    lines (read-only) : list of string
+        The rendered lines in script order.
+
+    """
+    def __init__(self, lines=None):
+        self.clear()
+        if lines is not None:
+            self.extend(lines)
+
+    @property
+    def lines(self):
+        return list(self.iter_lines())
+
+    def next_key(self):
+        """Return the key the next appended entry will be stored under."""
+        return self._next_key
+
+    def append(self, line, key=None, indent=0):
+        """Append a text line or replace the entry stored under ``key``.
+
+        Parameters
+        ----------
+        line : string
+            A single script line.
+        key : hashable (None)
+            Key to store the line under.
+            Default set to "None" to use the next integer key.
+        indent : integer
+            Number of tabs rendered before the line.
+            Default set to 0.
+
+        Returns
+        -------
+        string or None
+            The replaced line, "None" if nothing was replaced.
+
+        """
+        return self.append_op(RAW, line, key, indent)
+
+    def append_op(self, op, args, key=None, indent=0):
+        """Append an operation or replace the entry stored under ``key``.
+
+        Parameters
+        ----------
+        op : integer
+            Opcode of the operation, e.g. :data:`MOVEL`.
+        args : sequence of float or string
+            Numeric arguments, the text for :data:`RAW` and :data:`TEXTMSG`.
+        key : hashable (None)
+            Key to store the operation under.
+            Default set to "None" to use the next integer key.
+        indent : integer
+            Number of tabs rendered before the operation.
+            Default set to 0.
+
+        Returns
+        -------
+        string or None
+            The replaced line, "None" if nothing was replaced.
+
+        """
+        if op in TEXT_OPS:
+            ref = len(self._texts)
+            self._texts.append(args)
+            count = 0
+        else:
+            ref = len(self._args)
+            self._args.extend(args)
+            count = len(self._args) - ref
+        if key is not None:
+            pos = self._get_index().get(key)
+            if pos is not None:
+                old_line = self._render(pos)
+                self._ops[pos] = op
+                self._indents[pos] = indent
+                self._refs[pos] = ref
+                self._counts[pos] = count
+                return old_line
+        else:
+            key = self._next_key
+        pos = len(self._ops)
+        self._ops.append(op)
+        self._indents.append(indent)
+        self._refs.append(ref)
+        self._counts.append(count)
+        self._add_key(pos, key)
+        return None
+
+    def extend(self, lines, keys=None, indent=0):
+        """Append multiple lines, see :meth:`append`."""
+        if keys is None:
+            keys = [None] * len(lines)
+        for key, line in zip(keys, lines):
+            self.append(line, key, indent)
+
+    def extend_ops(self, op, rows, indent=0):
+        """Append one operation per row of numeric arguments."""
+        for row in rows:
+            ref = len(self._args)
+            self._args.extend(row)
+            self._ops.append(op)
+            self._indents.append(indent)
+            self._refs.append(ref)
+            self._counts.append(len(self._args) - ref)
+            self._add_key(len(self._ops) - 1, self._next_key)
+
+    def clear(self):
+        self._ops = array('B')
+        self._indents = array('B')
+        self._refs = array('l')
+        self._counts = array('B')
+        self._args = array('d')
+        self._texts = []
+        self._int_keys = array('l')
+        self._named_keys = {}
+        self._index = None
+        self._next_key = 0
+
+    # Operations
+    def ops(self):
+        """Yield (position, opcode, indent, args) of every entry, args being
+        a tuple of floats or the text of text operations."""
+        for pos in range(len(self._ops)):
+            yield (pos, self._ops[pos], self._indents[pos], self._get_args(pos))
+
+    def set_args(self, pos, args):
+        """Replace the numeric arguments of the entry at ``pos``."""
+        ref = len(self._args)
+        self._args.extend(args)
+        self._refs[pos] = ref
+        self._counts[pos] = len(self._args) - ref
+
+    def remove(self, positions):
+        """Remove the entries at ``positions`` and compact the storage."""
+        positions = set(positions)
+        if not positions:
+            return 0
+        keys = self.keys()
+        entries = [(self._ops[pos], self._indents[pos], self._get_args(pos))
+                   for pos in range(len(self._ops)) if pos not in positions]
+        keys = [key for pos, key in enumerate(keys) if pos not in positions]
+        next_key = self._next_key
+        self.clear()
+        for (op, indent, args), key in zip(entries, keys):
+            self.append_op(op, args, key, indent)
+        self._next_key = next_key
+        return len(positions)
+
+    # Rendering
+    def iter_lines(self, precision=None, compact=False, skip=None):
+        """Yield the rendered lines in script order.
+
+        Parameters
+        ----------
+        precision : dictionary (None)
+            Decimals per unit, see :func:`format_op`.
+        compact : boolean
+            Set to "True" to leave out indents, spaces after commas of
+            operations, comments and empty lines.
+            Default set to "False".
+        skip : set of integer (None)
+            Positions of entries to leave out.
+
+        """
+        for pos in range(len(self._ops)):
+            if skip and pos in skip:
+                continue
+            if not compact:
+                yield self._render(pos, precision)
+                continue
+            line = format_op(self._ops[pos], self._get_args(pos), precision=precision, compact=True)
+            for part in line.split("\n"):
+                part = part.strip()
+                if part and not part.startswith("#"):
+                    yield part
+
+    def render(self, sep='\n', **kwargs):
+        return sep.join(self.iter_lines(**kwargs))
+
+    def _get_args(self, pos):
+        ref = self._refs[pos]
+        if self._ops[pos] in TEXT_OPS:
+            return self._texts[ref]
+        return tuple(self._args[ref:ref + self._counts[pos]])
+
+    def _render(self, pos, precision=None):
+        return "\t" * self._indents[pos] + format_op(self._ops[pos], self._get_args(pos),
+                                                     precision=precision)
+
+    # Keys
+    def _add_key(self, pos, key):
+        if isinstance(key, int):
+            self._int_keys.append(key)
+            if key >= self._next_key:
+                self._next_key = key + 1
+        else:
+            self._int_keys.append(-1)
+            self._named_keys[pos] = key
+        if self._index is not None:
+            self._index[key] = pos
+
+    def _get_key(self, pos):
+        return self._named_keys.get(pos, self._int_keys[pos])
+
+    def _get_index(self):
+        # The key index is only built once a key is looked up
+        if self._index is None:
+            self._index = dict((self._get_key(pos), pos) for pos in range(len(self._ops)))
+        return self._index
+
+    # Dictionary interface
+    def keys(self):
+        return [self._get_key(pos) for pos in range(len(self._ops))]
+
+    def values(self):
+        return self.lines
+
+    def items(self):
+        return list(zip(self.keys(), self.iter_lines()))
+
+    def get(self, key, default=None):
+        pos = self._get_index().get(key)
+        if pos is None:
+            return default
+        return self._render(pos)
+
+    def __getitem__(self, key):
+        return self._render(self._get_index()[key])
+
+    def __setitem__(self, key, line):
+        self.append(line, key)
+
+    def __contains__(self, key):
+        return key in self._get_index()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self._ops)
+
+    def __repr__(self):
+        return "ScriptBuffer({} lines)".format(len(self._ops))
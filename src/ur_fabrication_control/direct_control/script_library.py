@@ -0,0 +1,216 @@
+import os
+import re
+import threading
+
+__all__ = [
+    'ScriptLibrary',
+    'load_library',
+    'script_identifiers',
+    'AIRPICK_LIBRARY'
+]
+
+AIRPICK_LIBRARY = os.path.join(os.path.dirname(__file__), "scripts", "airpick_methods.script")
+
+IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+STRING = re.compile(r'"[^"]*"|\'[^\']*\'')
+BLOCK_START = re.compile(r"(def|thread)\s+([A-Za-z_][A-Za-z0-9_]*)\s*\(")
+ASSIGNMENT = re.compile(r"(?:global\s+)?([A-Za-z_][A-Za-z0-9_]*)\s*=[^=]")
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def script_identifiers(text):
+    """Return the set of identifiers used in URScript code, leaving out
+    strings and comments."""
+    names = set()
+    for line in text.split("\n"):
+        line = STRING.sub("", line.split("#", 1)[0])
+        names.update(IDENTIFIER.findall(line))
+    return names
+
+
+def load_library(path=AIRPICK_LIBRARY):
+    """Load a URScript library, parsed once per process.
+
+    The parsed library is cached by path and parsed again only when the
+    file was modified.
+
+    Parameters
+    ----------
+    path : string
+        Path of the library file.
+        Default set to the airpick library.
+
+    Returns
+    -------
+    :class:`ScriptLibrary`
+
+    """
+    path = os.path.abspath(path)
+    mtime = os.path.getmtime(path)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with open(path) as f:
+            library = ScriptLibrary(f.read(), name=os.path.basename(path))
+        _cache[path] = (mtime, library)
+        return library
+
+
+class ScriptLibrary(object):
+    """URScript library split into top-level statements and function and
+    thread definitions, to emit only the definitions a program uses.
+
+    The top-level statements (settings, global variables and calls) run in
+    order at the start of the program. A definition is kept if the program,
+    a kept statement or another kept definition uses its name, a variable
+    assignment if a kept line uses the variable.
+
+    Parameters
+    ----------
+    text : string
+        The code of the library.
+    name : string
+        Name of the library, e.g. the file name.
+        Default set to "library".
+
+    Attributes
+    ----------
+    functions (read-only) : list of string
+        Names of the functions and threads in definition order.
+    lines (read-only) : list of string
+        All lines of the library.
+
+    """
+    def __init__(self, text, name="library"):
+        self.name = name
+        self._blocks = []       # [kind, name, lines, used names]
+        self._shaken = {}
+        self._parse(text.rstrip("\n").split("\n"))
+        self._definitions = dict((b[1], b) for b in self._blocks if b[0] == "def")
+        self._variables = {}
+        for block in self._blocks:
+            if block[0] == "var" and block[3] & set(self._definitions):
+                # assignments calling a function are kept like calls
+                block[0] = "statement"
+            elif block[0] == "var":
+                self._variables.setdefault(block[1], []).append(block)
+        self._names = frozenset(self._definitions) | frozenset(self._variables)
+
+    @property
+    def functions(self):
+        return [b[1] for b in self._blocks if b[0] == "def"]
+
+    @property
+    def lines(self):
+        return [line for block in self._blocks for line in block[2]]
+
+    def _parse(self, lines):
+        indents = [len(line) - len(line.lstrip()) for line in lines if line.strip()]
+        base = min(indents) if indents else 0
+        block = None
+        for line in lines:
+            stripped = line.strip()
+            top_level = stripped and len(line) - len(line.lstrip()) == base
+            if block is not None:
+                block[2].append(line)
+                if top_level and stripped == "end":
+                    block[3] = script_identifiers("\n".join(block[2][1:]))
+                    block = None
+                continue
+            match = BLOCK_START.match(stripped) if top_level else None
+            if match:
+                block = ["def", match.group(2), [line], None]
+                self._blocks.append(block)
+                continue
+            assignment = ASSIGNMENT.match(stripped) if top_level else None
+            if assignment:
+                used = script_identifiers(stripped[assignment.end(1):])
+                self._blocks.append(["var", assignment.group(1), [line], used])
+            elif not stripped or stripped.startswith("#"):
+                self._blocks.append(["text", None, [line], set()])
+            else:
+                self._blocks.append(["statement", None, [line], script_identifiers(stripped)])
+        if block is not None:
+            raise ValueError("Definition of {} in {} is not closed".format(block[1], self.name))
+
+    def dependencies(self, names):
+        """Return the names of the functions and threads needed by code
+        using ``names``, including their transitive dependencies and the
+        functions called by the top-level statements."""
+        return self._closure(names)[0]
+
+    def _closure(self, names):
+        # calls with side effects are always kept
+        used = set(names)
+        for block in self._blocks:
+            if block[0] == "statement":
+                used |= block[3]
+        functions = set()
+        variables = set()
+        stack = list(used)
+        while stack:
+            name = stack.pop()
+            if name in functions or name in variables:
+                continue
+            if name in self._definitions:
+                functions.add(name)
+                blocks = [self._definitions[name]]
+            elif name in self._variables:
+                variables.add(name)
+                blocks = self._variables[name]
+            else:
+                continue
+            for block in blocks:
+                stack.extend(block[3] - used)
+                used |= block[3]
+        return functions, variables
+
+    def shake(self, names):
+        """Return the lines of the library needed by code using ``names``.
+
+        Parameters
+        ----------
+        names : iterable of string
+            Identifiers used by the program, see :func:`script_identifiers`.
+
+        Returns
+        -------
+        list of string
+            The needed lines in library order, unused definitions and
+            variables are left out.
+
+        """
+        key = frozenset(names) & self._names
+        lines = self._shaken.get(key)
+        if lines is None:
+            functions, variables = self._closure(key)
+            lines = []
+            for kind, name, block_lines, _names in self._blocks:
+                if kind == "def" and name not in functions:
+                    continue
+                if kind == "var" and name not in variables:
+                    continue
+                lines.extend(block_lines)
+            self._shaken[key] = lines
+        return lines
+
+    def __repr__(self):
+        return "ScriptLibrary({}, {} functions)".format(self.name, len(self._definitions))
+
+
+if __name__ == '__main__':
+    import time
+    t0 = time.time()
+    library = load_library()
+    t1 = time.time()
+    load_library()
+    t2 = time.time()
+    program = "rq_vacuum_grip(advanced_mode=True)\nrq_vacuum_release(advanced_mode=True)"
+    lines = library.shake(script_identifiers(program))
+    print("Parsed {} in {:.4f} s, cached load {:.6f} s".format(library, t1 - t0, t2 - t1))
+    print("{} of {} lines, {} of {} functions".format(
+        len(lines), len(library.lines), len(library.dependencies(script_identifiers(program))),
+        len(library.functions)))
@@ -0,0 +1,245 @@
+import re
+from ur_fabrication_control.direct_control.script_buffer import RAW, MOVEL, MOVEJ, MOVEP
+from ur_fabrication_control.direct_control.script_buffer import SET_TCP, SET_PAYLOAD, SLEEP, TEXTMSG
+
+__all__ = [
+    'remove_redundant_settings',
+    'merge_sleeps',
+    'remove_duplicate_waypoints',
+    'remove_textmsgs',
+    'removable_textmsgs',
+    'is_literal_textmsg',
+    'optimize',
+    'DEFAULT_PASSES'
+]
+
+MOVES = (MOVEL, MOVEJ, MOVEP)
+# one or more string literals, e.g. "a" or "a", "b"
+LITERAL_ARGS = re.compile(r'^"(?:[^"\\]|\\.)*"(?:\s*,\s*"(?:[^"\\]|\\.)*")*$')
+BLOCK_KEYWORDS = ("def ", "thread ", "if ", "elif ", "else", "while ", "end")
+# assignment to a variable or an element, e.g. "global i = 0" or "q[0] = 1"
+ASSIGNMENT = re.compile(r'^(?:global\s+|local\s+)?[A-Za-z_][A-Za-z0-9_]*(?:\[[^\]]*\])?\s*=[^=]')
+
+
+def _is_control(text):
+    # Lines changing the control flow, or text with unknown content
+    stripped = text.strip()
+    return ("\n" in stripped or stripped.startswith(BLOCK_KEYWORDS) or
+            "set_tcp" in stripped or "set_payload" in stripped)
+
+
+def _is_inert(text):
+    # Lines which can not move the robot: comments, textmsg and assignments
+    # without calls, any other call may move it
+    stripped = text.strip()
+    if _is_control(text):
+        return False
+    return (not stripped or stripped.startswith("#") or stripped.startswith("textmsg(") or
+            ("(" not in stripped and ASSIGNMENT.match(stripped) is not None))
+
+
+def remove_redundant_settings(buffer):
+    """Remove set_tcp and set_payload operations repeating the values in
+    effect. The values are forgotten at every change of the control flow.
+
+    Parameters
+    ----------
+    buffer : :class:`ScriptBuffer`
+        The buffer to optimise in place.
+
+    Returns
+    -------
+    integer
+        Number of removed operations.
+
+    """
+    current = {}
+    remove = []
+    for pos, op, _indent, args in buffer.ops():
+        if op in (SET_TCP, SET_PAYLOAD):
+            if current.get(op) == args:
+                remove.append(pos)
+            current[op] = args
+        elif op == RAW and _is_control(args):
+            current = {}
+    return buffer.remove(remove)
+
+
+def merge_sleeps(buffer):
+    """Merge back-to-back sleep operations into one.
+
+    Parameters
+    ----------
+    buffer : :class:`ScriptBuffer`
+        The buffer to optimise in place.
+
+    Returns
+    -------
+    integer
+        Number of removed operations.
+
+    """
+    remove = []
+    first = None
+    for pos, op, indent, args in buffer.ops():
+        if op == SLEEP and first is not None and first[1] == indent:
+            first[2] = round(first[2] + args[0], 9)
+            buffer.set_args(first[0], [first[2]])
+            remove.append(pos)
+        elif op == SLEEP:
+            first = [pos, indent, args[0]]
+        else:
+            first = None
+    return buffer.remove(remove)
+
+
+def remove_duplicate_waypoints(buffer):
+    """Remove moves to the waypoint the robot already stopped at.
+
+    A move is removed if it repeats the previous move, either directly or
+    with only inert lines in between (comments, textmsg, sleeps and
+    assignments without calls) if the previous move does not blend (r=0).
+
+    Parameters
+    ----------
+    buffer : :class:`ScriptBuffer`
+        The buffer to optimise in place.
+
+    Returns
+    -------
+    integer
+        Number of removed operations.
+
+    """
+    remove = []
+    previous = None
+    adjacent = False
+    for pos, op, indent, args in buffer.ops():
+        if op in MOVES:
+            if previous is not None and previous[:2] == (op, indent) and previous[2] == args:
+                if adjacent or args[-1] == 0.0:
+                    remove.append(pos)
+                    continue
+            previous = (op, indent, args)
+            adjacent = True
+        elif op in (SLEEP, TEXTMSG) or (op == RAW and _is_inert(args)):
+            adjacent = False
+        else:
+            previous = None
+    return buffer.remove(remove)
+
+
+def is_literal_textmsg(args):
+    """Return "True" if a textmsg only shows string literals, and not the
+    value of a variable, e.g. ``textmsg(current_pose)``."""
+    return LITERAL_ARGS.match(args.strip()) is not None
+
+
+def removable_textmsgs(*buffers):
+    """Return the positions of the textmsg operations that can be removed
+    without leaving a block empty, see :func:`remove_textmsgs`.
+
+    Parameters
+    ----------
+    buffers : :class:`ScriptBuffer`
+        The sections of a program in order, blocks can span sections.
+
+    Returns
+    -------
+    list of list of int
+        Positions of the removable operations in every buffer.
+
+    """
+    remove = [[] for _ in buffers]
+    blocks = [[False, None]]     # [has statement, last removed (buffer, textmsg)]
+    for b, buffer in enumerate(buffers):
+        for pos, op, _indent, args in buffer.ops():
+            stripped = args.strip() if op == RAW else None
+            if op == TEXTMSG and is_literal_textmsg(args):
+                remove[b].append(pos)
+                blocks[-1][1] = (b, pos)
+                continue
+            if stripped is not None and "\n" not in stripped:
+                if stripped == "end" or stripped.startswith(("else", "elif ")):
+                    _close_block(blocks, remove)
+                if stripped.endswith(":"):
+                    blocks[-1][0] = True
+                    blocks.append([False, None])
+                    continue
+                if stripped == "end" or not stripped:
+                    continue
+            blocks[-1][0] = True
+    return remove
+
+
+def remove_textmsgs(*buffers):
+    """Remove textmsg operations showing string literals, keeping one
+    where a block would otherwise be left empty. Messages showing values,
+    e.g. ``textmsg(current_pose)``, are kept.
+
+    Parameters
+    ----------
+    buffers : :class:`ScriptBuffer`
+        The buffer to optimise in place, or the sections of a program in
+        order.
+
+    Returns
+    -------
+    integer
+        Number of removed operations.
+
+    """
+    removable = removable_textmsgs(*buffers)
+    return sum(buffer.remove(positions) for buffer, positions in zip(buffers, removable))
+
+
+# runs on all sections of a program at once, see :func:`optimize`
+remove_textmsgs.whole_program = True
+
+
+def _close_block(blocks, remove):
+    has_statement, last_removed = blocks.pop()
+    if not has_statement and last_removed is not None:
+        b, pos = last_removed
+        remove[b].remove(pos)
+    if not blocks:
+        # unbalanced block end, the block was opened before the buffers
+        blocks.append([True, None])
+
+
+DEFAULT_PASSES = [
+    remove_redundant_settings,
+    merge_sleeps,
+    remove_duplicate_waypoints,
+    remove_textmsgs
+]
+
+
+def optimize(buffer, passes=None):
+    """Run optimisation passes on a buffer or on the sections of a program.
+
+    Parameters
+    ----------
+    buffer : :class:`ScriptBuffer` or sequence of :class:`ScriptBuffer`
+        The buffer to optimise in place, or the sections of a program in
+        order. Passes with a true ``whole_program`` attribute get all
+        sections at once, the others run on every section.
+    passes : sequence of callable (None)
+        Passes taking a buffer and returning the number of removed entries.
+        Default set to "None" to run :data:`DEFAULT_PASSES`.
+
+    Returns
+    -------
+    dictionary
+        Number of removed entries per pass name.
+
+    """
+    passes = DEFAULT_PASSES if passes is None else passes
+    buffers = list(buffer) if isinstance(buffer, (list, tuple)) else [buffer]
+    report = {}
+    for p in passes:
+        if getattr(p, "whole_program", False):
+            report[p.__name__] = p(*buffers)
+        else:
+            report[p.__name__] = sum(p(b) for b in buffers)
+    return report
@@ -1,14 +1,21 @@
-import os
-import socket
+import numbers
 from compas.geometry import Line
-from ur_fabrication_control.direct_control.communication import URSocketComm
+from ur_fabrication_control.direct_control.communication import URSocketComm, default_pool
+from ur_fabrication_control.direct_control.communication.connection_pool import ConnectionError
+from ur_fabrication_control.direct_control.mixins import AirpickMixins
+from ur_fabrication_control.direct_control.script_buffer import ScriptBuffer, format_op
+from ur_fabrication_control.direct_control.script_buffer import RAW, MOVEL, MOVEJ, MOVEP, SET_TCP, SET_PAYLOAD, SLEEP, TEXTMSG
+from ur_fabrication_control.direct_control import script_passes
+from ur_fabrication_control.direct_control.script_library import load_library, script_identifiers
+from ur_fabrication_control.direct_control.utilities import flatten_list, is_available
+from ur_fabrication_control.direct_control.utilities import frames_to_pose_array, pose_rows, blend_radii
 
 __all__ = [
     'URScript'
 ]
 
 
-class URScript(URSocketComm):
+class URScript(URSocketComm, AirpickMixins):
     """Class to build a script of commands for the UR Robot system.
 
     Parameters
@@ -20,21 +27,34 @@ class URScript(URSocketComm):
 
     Attributes
     ----------
-    commands_dict (read-only) : dictionary
-        A dictionary to store the command lines.
+    header, globals, commands, footer (read-only) : ScriptBuffer
+        Append-only buffers storing the script operations of each section.
     ur_ip : string
         IP of the UR Robot.
     ur_port : integer
         Port number of the UR Robot.
     script (read-only) : string
         A string generated from the commands_dict to be sent to the UR Robot.
+    payload (read-only) : bytes
+        The utf-8 encoded script, sent by :meth:`send_script`.
+    script_size (read-only) : integer
+        Size in bytes of the last generated script.
+    size_budget : integer
+        Maximum script size in bytes accepted by the controller, a warning
+        is printed when a generated script exceeds it.
+        Default set to "None" for no budget.
+    linear_precision, angular_precision : integer
+        Decimals of lengths in m and angles in rad of minified scripts.
+        Default set to 6.
+    libraries (read-only) : list of tuple
+        The added :class:`ScriptLibrary` objects with their shake setting.
 
     """
     def __init__(self, ur_ip=None, ur_port=None):
-        self.header = {}
-        self.globals = {}
-        self.commands = {}
-        self.footer = {}
+        self.header = ScriptBuffer()
+        self.globals = ScriptBuffer()
+        self.commands = ScriptBuffer()
+        self.footer = ScriptBuffer()
         self.dictionaries = {
             "header": self.header,      # format {line_nr: URSCRIPT code}
             "globals": self.globals,    # format {variable_name: URSCRIPT code}
@@ -44,6 +64,12 @@ class URScript(URSocketComm):
         self.ur_ip = ur_ip
         self.ur_port = ur_port
         self.script = None
+        self.payload = None
+        self.script_size = None
+        self.size_budget = None
+        self.linear_precision = 6
+        self.angular_precision = 6
+        self.libraries = []
         self.sockets = {}
 
         # Functionality
@@ -60,8 +86,8 @@ class URScript(URSocketComm):
             The start line is added to the command dictionary.
 
         """
-        lines = ["def {}():".format(name), "\ttextmsg(\">> Entering {}.\")".format(name)]
-        return self.add_lines(lines, to_dict=dictionary, indent=0)
+        self.add_line("def {}():".format(name), to_dict=dictionary, indent=0)
+        self.textmessage(">> Entering {}.".format(name), string=True, to_dict=dictionary)
 
     def end(self, name="program", dictionary="footer"):
         """Build the end of the script.
@@ -83,17 +109,26 @@ class URScript(URSocketComm):
                     print("Socket: {} at {}:{} was not closed".format(socket_name, ip, port))
                     self.socket_close(socket_name)
                     print("Socket has been closed at program end")
-        lines = ["\ttextmsg(\"<< Exiting {}.\")".format(name), "end"]
+        self.textmessage("<< Exiting {}.".format(name), string=True, to_dict=dictionary)
+        lines = ["end"]
         if dictionary == "footer":
             lines.append("{}()\n\n\n".format(name))
         self.add_lines(lines, to_dict=dictionary, indent=0)
 
-    def generate(self):
+    def generate(self, minify=False, textmsg=None):
         """Translate the script from a dictionary to a long string.
 
         Parameters
         ----------
-        None
+        minify : boolean
+            Set to "True" to round floats to :attr:`linear_precision` and
+            :attr:`angular_precision` decimals and to leave out indents,
+            spaces after commas, comments and empty lines.
+            Default set to "False".
+        textmsg : boolean (None)
+            Set to "False" to leave out textmsg calls, where no block is
+            left empty.
+            Default set to "None" to leave them out only when minified.
 
         Returns
         -------
@@ -101,14 +136,148 @@ class URScript(URSocketComm):
             A long string generated from the command dictionary.
 
         """
-        script_header = '\n'.join(self.header.values())
-        script_globals = '\n'.join(self.globals.values())
-        script_commands = '\n'.join(self.commands.values())
-        script_footer = '\n'.join(self.footer.values())
-        self.script = '\n'.join([script_header, script_globals,
-                                 script_commands, script_footer])
+        sections = self._iter_sections(minify, textmsg)
+        if minify:
+            self.script = '\n'.join(line for lines in sections for line in lines)
+        else:
+            self.script = '\n'.join(['\n'.join(lines) for lines in sections])
+        self.payload = self.script.encode('utf-8')
+        self._set_script_size(len(self.payload))
         return self.script
 
+    def prepare(self, minify=False, pool=None):
+        """Get the script ready to be sent without delay.
+
+        The script is generated if it was not before, and the connection
+        to the UR Robot is opened.
+
+        Parameters
+        ----------
+        minify : boolean
+            See :meth:`generate`.
+            Default set to "False".
+        pool : :class:`ConnectionPool` (None)
+            Default set to "None" to use the shared pool.
+
+        Returns
+        -------
+        bytes
+            The encoded script.
+
+        """
+        if self.payload is None:
+            self.generate(minify)
+        try:
+            (default_pool if pool is None else pool).get(self.ur_ip, self.ur_port).connect()
+        except ConnectionError:
+            # retried when sending
+            pass
+        return self.payload
+
+    def iter_generate(self, chunk_size=65536, minify=False, textmsg=None):
+        """Translate the script to encoded chunks without building the
+        whole string.
+
+        Parameters
+        ----------
+        chunk_size : integer
+            Approximate size of the yielded chunks in bytes.
+            Default set to 65536.
+        minify, textmsg : boolean
+            See :meth:`generate`.
+
+        Yields
+        ------
+        bytes
+            Consecutive utf-8 encoded parts of the script, which joined
+            are equal to the encoded result of :meth:`generate`.
+
+        """
+        pieces = []
+        size = 0
+        total = 0
+        first = True
+        for i, lines in enumerate(self._iter_sections(minify, textmsg)):
+            if i > 0 and not minify:
+                pieces.append('\n')
+            for j, line in enumerate(lines):
+                if (j > 0 and not minify) or (minify and not first):
+                    pieces.append('\n')
+                first = False
+                pieces.append(line)
+                size += len(line) + 1
+                if size >= chunk_size:
+                    chunk = ''.join(pieces).encode('utf-8')
+                    total += len(chunk)
+                    yield chunk
+                    pieces = []
+                    size = 0
+        chunk = ''.join(pieces).encode('utf-8')
+        self._set_script_size(total + len(chunk))
+        if chunk:
+            yield chunk
+
+    def size_report(self):
+        """Report the size of the last generated script.
+
+        Returns
+        -------
+        dictionary
+            "bytes": size of the script in bytes,
+            "budget": :attr:`size_budget` in bytes,
+            "within_budget": "True" if the size does not exceed the budget.
+
+        """
+        within = self.size_budget is None or self.script_size <= self.size_budget
+        return {"bytes": self.script_size,
+                "budget": self.size_budget,
+                "within_budget": within}
+
+    def _iter_sections(self, minify=False, textmsg=None):
+        sections = [self.header, self.globals, self.commands, self.footer]
+        if textmsg is None:
+            textmsg = not minify
+        precision = None
+        if minify:
+            precision = {"m": self.linear_precision, "a": self.angular_precision}
+        skips = [None] * len(sections)
+        if not textmsg:
+            # blocks span sections, e.g. the program block
+            skips = [set(positions) for positions in script_passes.removable_textmsgs(*sections)]
+        for i, section in enumerate(sections):
+            if i == 1 and self.libraries:
+                yield self._iter_libraries(minify)
+            yield section.iter_lines(precision, minify, skips[i])
+
+    def _iter_libraries(self, minify=False):
+        names = None
+        for library, shake in self.libraries:
+            if shake and names is None:
+                names = self._used_names()
+            lines = library.shake(names) if shake else library.lines
+            for line in lines:
+                if not minify:
+                    yield line
+                    continue
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    yield line
+
+    def _used_names(self):
+        # only text entries can call library functions
+        names = set()
+        for section in [self.header, self.globals, self.commands, self.footer]:
+            for _pos, op, _indent, args in section.ops():
+                if op in (RAW, TEXTMSG):
+                    names |= script_identifiers(args)
+        return names
+
+    def _set_script_size(self, size):
+        self.script_size = size
+        if self.size_budget is not None and size > self.size_budget:
+            print("Script size of {} bytes exceeds the budget of {} bytes".format(
+                size, self.size_budget))
+
     # Dictionary building
     def add_line(self, line, to_dict="commands", key=None, indent=1):
         """Add a single line to the script.
@@ -125,15 +294,9 @@ class URScript(URSocketComm):
 
         """
         _dict = self.dictionaries.get(to_dict)
-        if key is None:
-            if len(_dict)!=0:
-                key = max(_dict.keys())+1
-            else:
-                key = 0
-        if key in _dict:
-            value = _dict.get(key)
+        value = _dict.append(line, key, indent)
+        if value is not None:
             print("Replaced {} with {}".format(value, line))
-        _dict[key] = "\t"*indent+line
         return line
 
     def add_lines(self, lines, to_dict="commands", keys=None, indent=1):
@@ -150,18 +313,87 @@ class URScript(URSocketComm):
             Multiple lines added to the command dictionary.
 
         """
-        _dict = self.dictionaries.get(to_dict)
         if keys is None:
-            if len(_dict)!=0:
-                start_key = max(_dict.keys())+1
-            else:
-                start_key = 0
-            alt_keys = list(range(start_key, start_key+len(lines)))
-        keys = alt_keys if keys is None else keys
+            keys = [None]*len(lines)
         for (key, line) in zip(keys, lines):
             self.add_line(line, to_dict, key, indent)
         return lines
 
+    def add_op(self, op, args, to_dict="commands", key=None, indent=1):
+        """Add a single operation to the script.
+
+        Parameters
+        ----------
+        op : integer
+            Opcode of the operation, e.g. MOVEL.
+        args : sequence of float or string
+            Arguments of the operation, the text for TEXTMSG.
+            Non-numeric arguments, e.g. URScript variables, are added
+            as a text line.
+
+        Returns
+        -------
+        None
+            A single operation added to the command dictionary.
+
+        """
+        if op != TEXTMSG:
+            try:
+                args = [float(a) for a in args]
+            except (TypeError, ValueError):
+                self.add_line(format_op(op, args, "%s"), to_dict, key, indent)
+                return
+        _dict = self.dictionaries.get(to_dict)
+        value = _dict.append_op(op, args, key, indent)
+        if value is not None:
+            print("Replaced {} with {}".format(value, format_op(op, args)))
+
+    def add_library(self, path, shake=True):
+        """Add a library of URScript functions to the start of the program.
+
+        The library is parsed once per process, see :func:`load_library`,
+        and emitted after the header when the script is generated.
+
+        Parameters
+        ----------
+        path : string
+            Path of the library file.
+        shake : boolean
+            Set to "True" to emit only the functions the script uses and
+            their dependencies, "False" to emit the whole library.
+            Default set to "True".
+
+        Returns
+        -------
+        :class:`ScriptLibrary`
+
+        """
+        library = load_library(path)
+        for i, (added, _shake) in enumerate(self.libraries):
+            if added.name == library.name:
+                self.libraries[i] = (library, shake)
+                return library
+        self.libraries.append((library, shake))
+        return library
+
+    def optimize(self, passes=None):
+        """Run optimisation passes on every section of the script.
+
+        Parameters
+        ----------
+        passes : sequence of callable (None)
+            Passes of :mod:`script_passes`.
+            Default set to "None" to run all default passes.
+
+        Returns
+        -------
+        dictionary
+            Number of removed operations per pass name.
+
+        """
+        sections = [self.header, self.globals, self.commands, self.footer]
+        return script_passes.optimize(sections, passes)
+
     # Feedback functionality
     def get_current_pose_cartesian(self, socket_name="socket_0",
                                    address=("192.168.10.11", 50002),
@@ -209,18 +441,21 @@ class URScript(URSocketComm):
             "joints": "get_actual_joint_positions()"
         }
         func = pose_type.get(get_type)
-        self.add_lines(["current_pose = {}".format(func), "textmsg(current_pose)"])
+        self.add_line("current_pose = {}".format(func))
+        self.textmessage("current_pose")
         if send:
             self.socket_send_line('current_pose', socket_name, address)
         return func
 
     # Connectivity
-    def is_available(self):
-        """Ping the UR network to check for availability.
+    def is_available(self, refresh=False):
+        """Check if the UR Robot accepts connections.
 
         Parameters
         ----------
-        None
+        refresh : boolean
+            Set to "True" to probe even if a cached result exists.
+            Default set to "False".
 
         Returns
         -------
@@ -229,36 +464,41 @@ class URScript(URSocketComm):
             "False" if unavailable.
 
         """
-        system_call = "ping -r 1 -n 1 {}".format(self.ur_ip)
-        response = os.system(system_call)
-        if response == 0:
-            return True
-        else:
-            return False
+        return is_available(self.ur_ip, refresh)
 
-    def send_script(self):
+    def send_script(self, stream=False, minify=False, pool=None):
         """Send the generated script to the UR Robot.
 
         Parameters
         ----------
-        None
+        stream : boolean
+            Set to "True" to send the script chunk by chunk while it is
+            generated, see :meth:`iter_generate`.
+            Default set to "False" to send the string of :meth:`generate`.
+        minify : boolean
+            Set to "True" to send a minified script when streaming.
+            Default set to "False".
+        pool : :class:`ConnectionPool` (None)
+            Pool of the persistent connection the script is sent over.
+            Default set to "None" to use the shared pool.
 
         Returns
         -------
         None
 
         """
+        if stream:
+            data = self.iter_generate(minify=minify)
+        else:
+            if self.payload is None:
+                self.generate()
+            data = self.payload
         try:
-            s = socket.create_connection((self.ur_ip, self.ur_port), timeout=2)
-        except socket.timeout:
+            (default_pool if pool is None else pool).send(self.ur_ip, self.ur_port, data)
+        except ConnectionError:
             print("UR at {} not available on port {}".format(self.ur_ip, self.ur_port))
-            raise ConnectionError
-        finally:
-            enc_script = self.script.encode('utf-8')
-            # encoding allows use of python 3.7
-            s.send(enc_script)
-            print("Script sent to {} on port {}".format(self.ur_ip, self.ur_port))
-            s.close()
+            raise
+        print("Script sent to {} on port {}".format(self.ur_ip, self.ur_port))
 
     # Geometric effects
     def set_tcp(self, tcp):
@@ -278,7 +518,7 @@ class URScript(URSocketComm):
         """
         # tcp = [tcp[i]/1000 if i < 3 else tcp[i] for i in range(len(tcp))]
         tcp = [tcp[i] for i in range(len(tcp))]
-        return self.add_line("set_tcp(p{})".format(tcp))
+        self.add_op(SET_TCP, tcp)
 
     def set_payload(self, payload, CoG=None):
         """Set the mass of the tool and elements attached to the tool.
@@ -297,9 +537,9 @@ class URScript(URSocketComm):
         None
         """
         if CoG is not None:
-            self.add_line("set_payload({}, {})".format(str(payload), str(CoG)))
+            self.add_op(SET_PAYLOAD, [payload] + list(CoG))
         else:
-            self.add_line("set_payload({})".format(str(payload)))
+            self.add_op(SET_PAYLOAD, [payload])
 
     def move_linear(self, frame, velocity=0.05, radius=0):
         """Add a move linear command to the script.
@@ -315,8 +555,8 @@ class URScript(URSocketComm):
         None
             A move linear command is added to the command dictionary.
         """
-        pose = self._frame_to_pose(frame)
-        return self.add_line("movel({}, v={}, r={})".format(pose, velocity, radius))
+        pose = list(frame.point) + list(frame.axis_angle_vector)
+        self.add_op(MOVEL, pose + [velocity, radius])
 
     def move_joint(self, joint_configuration, velocity, radius=0.0):
         """Add a move joint command to the script.
@@ -335,8 +575,8 @@ class URScript(URSocketComm):
             A move joint command is added to the command dictionary.
 
         """
-        joint_values = joint_configuration.joint_values
-        return self.add_line("movej({}, v={}, r={})".format(joint_values, velocity, radius))
+        joint_values = list(joint_configuration.joint_values)
+        self.add_op(MOVEJ, joint_values + [velocity, radius])
 
     def move_process(self, configuration=None, frame=None, velocity=0.05, radius=0.0):
         """Add a move process command to the script.
@@ -354,16 +594,84 @@ class URScript(URSocketComm):
 
         """
         if configuration is None:
-            pose = self._frame_to_pose(frame)
+            pose = list(frame.point) + list(frame.axis_angle_vector)
+            self.add_op(MOVEP, pose + [velocity, radius])
         elif frame is None:
             pose = configuration.joint_values
-        return self.add_line("movep({}, v={}, r={})".format(pose,velocity,radius))
+            self.add_line("movep({}, v={}, r={})".format(pose,velocity,radius))
+
+    # Batch motion
+    def moves_linear(self, frames, velocity=0.05, radius=0):
+        """Add a move linear command for every frame or pose to the script.
+
+        Parameters
+        ----------
+        frames : sequence of :class:`compas.geometry.Frame` or (N, 6) array
+            Frames, or poses [x, y, z, rx, ry, rz] with the rotation vector.
+        velocity : float or sequence of float
+            Tool speed in m/s, a single value or one per move.
+        radius : float or sequence of float
+            Blend radius in m, a single value or one per move.
+
+        Returns
+        -------
+        integer
+            Number of move linear commands added to the command dictionary.
+
+        """
+        rows = pose_rows(self._poses(frames), velocity, radius)
+        return self._add_rows(MOVEL, rows)
+
+    def moves_joint(self, joint_configurations, velocity, radius=0.0):
+        """Add a move joint command for every configuration to the script.
+
+        Parameters
+        ----------
+        joint_configurations : sequence of object or (N, 6) array
+            compas_fab.robots.Configuration objects or joint values in rad.
+        velocity : float or sequence of float
+            Joint speed in rad/s, a single value or one per move.
+        radius : float or sequence of float
+            Blend radius in m, a single value or one per move.
+
+        Returns
+        -------
+        integer
+            Number of move joint commands added to the command dictionary.
+
+        """
+        joint_values = [c.joint_values if hasattr(c, "joint_values") else c
+                        for c in joint_configurations]
+        rows = pose_rows(joint_values, velocity, radius)
+        return self._add_rows(MOVEJ, rows)
+
+    def moves_process(self, frames, velocity=0.05, radius=0.0):
+        """Add a move process command for every frame or pose to the script.
+
+        Parameters
+        ----------
+        frames : sequence of :class:`compas.geometry.Frame` or (N, 6) array
+            Frames, or poses [x, y, z, rx, ry, rz] with the rotation vector.
+        velocity : float or sequence of float
+            Tool speed in m/s, a single value or one per move.
+        radius : float or sequence of float
+            Blend radius in m, a single value or one per move.
+
+        Returns
+        -------
+        integer
+            Number of move process commands added to the command dictionary.
+
+        """
+        rows = pose_rows(self._poses(frames), velocity, radius)
+        return self._add_rows(MOVEP, rows)
 
     def get_force(self):
         """Get the tcp force value.
         """
         func = "force()"
-        self.add_lines(["force_value = {}".format(func), "textmsg(force_value)"])
+        self.add_line("force_value = {}".format(func))
+        self.textmessage("force_value")
         return func
 
     def force_mode(self, selection_vector, force_limits, speed_limits):
@@ -515,24 +823,153 @@ class URScript(URSocketComm):
 
     # Setting variables
     def set_variable(self, variable_name, value):
-        self.add_line("{} = {}".format(variable_name,value), dict="globals", key=variable_name)
+        self.add_line("{} = {}".format(variable_name,value), to_dict="globals", key=variable_name)
 
-    def textmessage(self, message, string=False):
+    def textmessage(self, message, string=False, to_dict="commands"):
         if string:
-            self.add_line('textmsg("{}")'.format(message))
+            self.add_op(TEXTMSG, '"{}"'.format(message), to_dict)
         else:
-            self.add_line('textmsg({})'.format(message))
+            self.add_op(TEXTMSG, '{}'.format(message), to_dict)
+
+    def sleep(self, seconds):
+        """Add a sleep command to the script.
+
+        Parameters
+        ----------
+        seconds : float
+            Time to sleep in seconds.
+
+        Returns
+        -------
+        None
+
+        """
+        self.add_op(SLEEP, [seconds])
+
+    def blend_path(self, frames, max_radius, velocity=0.05, div=2.01):
+        """Add move linear commands blended with the largest safe radius.
+
+        The radii of the whole path are computed at once with
+        :func:`blend_radii`, see :meth:`_radius_between_frames` for a
+        single point. The robot only stops at the last point.
+
+        Parameters
+        ----------
+        frames : sequence of :class:`compas.geometry.Frame` or (N, 6) array
+            Frames, or poses [x, y, z, rx, ry, rz] with the rotation vector.
+        max_radius : float
+            Maximum blend radius in m.
+        velocity : float or sequence of float
+            Tool speed in m/s, a single value or one per move.
+        div : float
+            Divisor of the segment lengths limiting the radii.
+            Default set to 2.01.
+
+        Returns
+        -------
+        integer
+            Number of move linear commands added to the command dictionary.
+
+        """
+        poses = self._poses(frames)
+        return self.moves_linear(poses, velocity, blend_radii(poses, max_radius, div))
+
+    def moves_linear_array(self, frames, velocity=0.05, radius=0, name="path", chunk_size=500):
+        """Add a path as pose array globals and a loop of move linear commands.
+
+        Unlike :meth:`moves_linear` the moves are not unrolled, the script
+        only grows with the pose data.
+
+        Parameters
+        ----------
+        frames : sequence of :class:`compas.geometry.Frame` or (N, 6) array
+            Frames, or poses [x, y, z, rx, ry, rz] with the rotation vector.
+        velocity : float or sequence of float
+            Tool speed in m/s, a single value or one per move.
+        radius : float or sequence of float
+            Blend radius in m, a single value or one per move.
+        name : string
+            Prefix of the global variables, must be unique in the script.
+            Default set to "path".
+        chunk_size : integer
+            Maximum number of poses per global list.
+            Default set to 500.
+
+        Returns
+        -------
+        list of string
+            The loop lines added to the command dictionary.
+
+        """
+        return self._moves_array("movel", frames, velocity, radius, name, chunk_size)
+
+    def moves_process_array(self, frames, velocity=0.05, radius=0.0, name="path", chunk_size=500):
+        """Add a path as pose array globals and a loop of move process
+        commands, see :meth:`moves_linear_array`.
+        """
+        return self._moves_array("movep", frames, velocity, radius, name, chunk_size)
+
+    def moves_linear_stream(self, socket_name="Pathserver",
+                            address=("192.168.10.11", 50003), timeout=2):
+        """Add a loop of move linear commands fed at runtime by a
+        :class:`PathStreamServer`, see :meth:`socket_stream_moves`.
+
+        The socket has to be set with :meth:`set_socket` before.
+        """
+        return self.socket_stream_moves("movel", "stream", socket_name, address, timeout)
+
+    def moves_process_stream(self, socket_name="Pathserver",
+                             address=("192.168.10.11", 50003), timeout=2):
+        """Add a loop of move process commands fed at runtime by a
+        :class:`PathStreamServer`, see :meth:`socket_stream_moves`.
+        """
+        return self.socket_stream_moves("movep", "stream", socket_name, address, timeout)
 
     # Utilities
+    def _poses(self, frames):
+        if len(frames) and hasattr(frames[0], "point"):
+            return frames_to_pose_array(frames)
+        return frames
+
+    def _add_rows(self, op, rows):
+        # Rows are stored as operations and only formatted on generate
+        if len(rows) and len(rows[0]) != 8:
+            raise ValueError("Expected 6 pose values per move, got {}".format(len(rows[0]) - 2))
+        self.commands.extend_ops(op, rows, indent=1)
+        return len(rows)
+
     def _frame_to_pose(self, frame):
         pose = frame.point.data + frame.axis_angle_vector.data
         return "p[{}, {}, {}, {}, {}, {}]".format(*pose)
 
     def _frames_to_poses(self, frames):
-        return NotImplementedError
-        poses_list = [self._frame_to_pose(frame) for frame in frames]
-        poses_list = ', '.join(poses_list)
-        return '[' + poses_list + ']'
+        rows = pose_rows(self._poses(frames))
+        template = ", ".join(["p[%r, %r, %r, %r, %r, %r]"]*len(rows))
+        return "[" + template % tuple(flatten_list(rows)) + "]"
+
+    def _moves_array(self, move, frames, velocity, radius, name, chunk_size):
+        # Store the path as pose list globals and loop over them on the robot
+        poses = self._poses(frames)
+        lines = []
+        for k, start in enumerate(range(0, len(poses), chunk_size)):
+            stop = start + chunk_size
+            var_name = "{}_{}".format(name, k)
+            self.set_variable(var_name, self._frames_to_poses(poses[start:stop]))
+            args = []
+            for arg, value in [("v", velocity), ("r", radius)]:
+                # also NumPy scalars
+                if isinstance(value, numbers.Number):
+                    args.append("{}={}".format(arg, value))
+                else:
+                    values = [float(x) for x in value[start:stop]]
+                    self.set_variable("{}_{}".format(var_name, arg), values)
+                    args.append("{}={}_{}[{}_i]".format(arg, var_name, arg, name))
+            lines.extend(["{}_i = 0".format(name),
+                          "while {}_i < {}:".format(name, len(poses[start:stop])),
+                          "\t{}({}[{}_i], {})".format(move, var_name, name, ", ".join(args)),
+                          "\t{}_i = {}_i + 1".format(name, name),
+                          "end"])
+        return self.add_lines(lines)
 
     def _radius_between_frames(self, from_frame, via_frame,
                                to_frame, max_radius, div=2.01):
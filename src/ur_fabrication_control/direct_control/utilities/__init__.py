@@ -1,4 +1,5 @@
 from .files import read_file_to_list, read_file_to_string
 from .lists import flatten_list, divide_list_by_number, isclose, islist
 from .numbers import argsort, sign, convert_float_to_int
-from .ping import is_available
\ No newline at end of file
+from .ping import is_available, available, probe, ReachabilityCache
+from .poses import frames_to_pose_array, pose_rows, blend_radii, simplify_path
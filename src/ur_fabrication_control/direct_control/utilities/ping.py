@@ -4,13 +4,189 @@ Created on 12.10.2017
 @author: rustr
 '''
 
-import os
-
-def is_available(ip):
-    
-    syscall = "ping -r 1 -n 1 %s"
-    response = os.system(syscall % ip)
-    if response == 0:
-        return True
-    else:
-        return False
\ No newline at end of file
+import errno
+import select
+import socket
+import threading
+import time
+
+__all__ = [
+    'UR_PORTS',
+    'probe',
+    'ReachabilityCache',
+    'is_available',
+    'available'
+]
+
+UR_PORTS = (30002, 29999)   # secondary client interface, dashboard server
+IN_PROGRESS = (0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY,
+               getattr(errno, "WSAEWOULDBLOCK", 10035))
+
+
+def probe(ips, ports=UR_PORTS, timeout=0.5):
+    """Check which hosts accept a TCP connection on one of the ports.
+
+    All connections are opened at once without blocking, the check takes
+    at most ``timeout`` for any number of hosts.
+
+    Parameters
+    ----------
+    ips : sequence of string
+        IPs of the UR Robots.
+    ports : sequence of integer
+        Ports tried on every host.
+        Default set to the secondary client interface and the dashboard
+        server ports.
+    timeout : float
+        Maximum wait in s.
+        Default set to 0.5.
+
+    Returns
+    -------
+    dict
+        "True" or "False" by IP.
+
+    """
+    result = dict((ip, False) for ip in ips)
+    pending = {}
+    for ip in result:
+        for port in ports:
+            try:
+                s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            except socket.error:
+                continue
+            s.setblocking(0)
+            try:
+                code = s.connect_ex((ip, port))
+            except socket.error:
+                # unresolvable host
+                s.close()
+                continue
+            if code not in IN_PROGRESS:
+                s.close()
+            elif code == 0:
+                result[ip] = True
+                s.close()
+            else:
+                pending[s] = ip
+    t_end = time.time() + timeout
+    try:
+        while pending:
+            wait = t_end - time.time()
+            if wait <= 0:
+                break
+            _, writable, failed = select.select([], list(pending), list(pending), wait)
+            for s in set(writable) | set(failed):
+                ip = pending.pop(s)
+                if s.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0:
+                    result[ip] = True
+                s.close()
+            # one open port is enough
+            for s in [s for s, ip in pending.items() if result[ip]]:
+                pending.pop(s).close()
+    finally:
+        for s in pending:
+            s.close()
+    return result
+
+
+class ReachabilityCache(object):
+    """Reachability of UR Robots, probed with :func:`probe` and cached.
+
+    Parameters
+    ----------
+    ttl : float
+        Time in s a result is reused.
+        Default set to 5.
+    ports : sequence of integer
+        Ports tried on every host.
+        Default set to :data:`UR_PORTS`.
+    timeout : float
+        Maximum wait in s of a probe.
+        Default set to 0.5.
+
+    """
+    def __init__(self, ttl=5, ports=UR_PORTS, timeout=0.5):
+        self.ttl = ttl
+        self.ports = tuple(ports)
+        self.timeout = timeout
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def available(self, ips, refresh=False):
+        """Return the reachability of many UR Robots, by IP.
+
+        Expired or missing results are probed in parallel.
+        """
+        now = time.time()
+        with self._lock:
+            cached = dict((ip, self._results.get(ip)) for ip in ips)
+        stale = [ip for ip, r in cached.items()
+                 if refresh or r is None or now - r[1] > self.ttl]
+        result = dict((ip, r[0]) for ip, r in cached.items() if ip not in stale)
+        if stale:
+            probed = probe(stale, self.ports, self.timeout)
+            now = time.time()
+            with self._lock:
+                for ip, state in probed.items():
+                    self._results[ip] = (state, now)
+            result.update(probed)
+        return result
+
+    def is_available(self, ip, refresh=False):
+        return self.available([ip], refresh)[ip]
+
+    def invalidate(self, ip=None):
+        """Forget the result of an IP, or all results."""
+        with self._lock:
+            if ip is None:
+                self._results.clear()
+            else:
+                self._results.pop(ip, None)
+
+
+default_cache = ReachabilityCache()
+
+
+def is_available(ip, refresh=False):
+    """Check if a UR Robot accepts connections, see :class:`ReachabilityCache`.
+
+    Parameters
+    ----------
+    ip : string
+        IP of the UR Robot.
+    refresh : boolean
+        Set to "True" to probe even if a cached result exists.
+        Default set to "False".
+
+    Returns
+    -------
+    boolean
+        "True" if available.
+        "False" if unavailable.
+
+    """
+    return default_cache.is_available(ip, refresh)
+
+
+def available(ips, refresh=False):
+    """Check many UR Robots in parallel, returns "True" or "False" by IP."""
+    return default_cache.available(ips, refresh)
+
+
+if __name__ == '__main__':
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+    port = listener.getsockname()[1]
+    ips = ["127.0.0.1", "127.0.0.2", "127.0.0.3", "127.0.0.4"]
+    t0 = time.time()
+    print(probe(ips, ports=(port, 29999), timeout=0.5))
+    print("{} hosts probed in {:.3f} s".format(len(ips), time.time() - t0))
+    cache = ReachabilityCache(ports=(port,))
+    cache.is_available("127.0.0.1")
+    t0 = time.time()
+    for _ in range(10000):
+        cache.is_available("127.0.0.1")
+    print("{:.2f} us per cached check".format((time.time() - t0) / 10000 * 1e6))
+    listener.close()
@@ -0,0 +1,328 @@
+from __future__ import absolute_import
+
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+__all__ = [
+    'frames_to_pose_array',
+    'pose_rows',
+    'blend_radii',
+    'simplify_path'
+]
+
+
+def frames_to_pose_array(frames):
+    """Convert frames to UR poses [x, y, z, rx, ry, rz] in one pass.
+
+    Parameters
+    ----------
+    frames : sequence of :class:`compas.geometry.Frame`
+        Frames of the path.
+
+    Returns
+    -------
+    numpy.ndarray or list
+        (N, 6) array of poses, a list of lists if NumPy is not available.
+
+    """
+    if np is None:
+        return [list(f.point) + list(f.axis_angle_vector) for f in frames]
+    if not len(frames):
+        return np.zeros((0, 6))
+    points = np.array([list(f.point) for f in frames], dtype=float)
+    xaxes = np.array([list(f.xaxis) for f in frames], dtype=float)
+    yaxes = np.array([list(f.yaxis) for f in frames], dtype=float)
+    rotvecs = _rotation_vectors(xaxes, yaxes)
+    return np.hstack([points, rotvecs])
+
+
+def _rotation_vectors(xaxes, yaxes):
+    xaxes = xaxes / np.linalg.norm(xaxes, axis=1)[:, None]
+    yaxes = yaxes / np.linalg.norm(yaxes, axis=1)[:, None]
+    zaxes = np.cross(xaxes, yaxes)
+    # rotation matrices with the frame axes as columns
+    R = np.stack([xaxes, yaxes, zaxes], axis=2)
+    # quaternions with Shepperd's method, stable for all angles
+    diagonal = np.stack([R[:, 0, 0], R[:, 1, 1], R[:, 2, 2]], axis=1)
+    trace = diagonal.sum(axis=1)
+    case = np.argmax(np.column_stack([trace, diagonal]), axis=1)
+    q = np.empty((len(R), 4))
+    for c in range(4):
+        m = case == c
+        if not m.any():
+            continue
+        r = R[m]
+        if c == 0:
+            s = 2.0 * np.sqrt(1.0 + trace[m])
+            q[m] = np.column_stack([s / 4, (r[:, 2, 1] - r[:, 1, 2]) / s,
+                                    (r[:, 0, 2] - r[:, 2, 0]) / s, (r[:, 1, 0] - r[:, 0, 1]) / s])
+        elif c == 1:
+            s = 2.0 * np.sqrt(1.0 + r[:, 0, 0] - r[:, 1, 1] - r[:, 2, 2])
+            q[m] = np.column_stack([(r[:, 2, 1] - r[:, 1, 2]) / s, s / 4,
+                                    (r[:, 0, 1] + r[:, 1, 0]) / s, (r[:, 0, 2] + r[:, 2, 0]) / s])
+        elif c == 2:
+            s = 2.0 * np.sqrt(1.0 + r[:, 1, 1] - r[:, 0, 0] - r[:, 2, 2])
+            q[m] = np.column_stack([(r[:, 0, 2] - r[:, 2, 0]) / s, (r[:, 0, 1] + r[:, 1, 0]) / s,
+                                    s / 4, (r[:, 1, 2] + r[:, 2, 1]) / s])
+        else:
+            s = 2.0 * np.sqrt(1.0 + r[:, 2, 2] - r[:, 0, 0] - r[:, 1, 1])
+            q[m] = np.column_stack([(r[:, 1, 0] - r[:, 0, 1]) / s, (r[:, 0, 2] + r[:, 2, 0]) / s,
+                                    (r[:, 1, 2] + r[:, 2, 1]) / s, s / 4])
+    q[q[:, 0] < 0] *= -1
+    sines = np.linalg.norm(q[:, 1:], axis=1)
+    angles = 2.0 * np.arctan2(sines, q[:, 0])
+    scale = np.where(sines > 1e-12, angles / np.maximum(sines, 1e-12), 2.0)
+    return q[:, 1:] * scale[:, None]
+
+
+def pose_rows(poses, *columns):
+    """Combine poses and per-row values to a flat list of floats per row.
+
+    Parameters
+    ----------
+    poses : (N, M) array-like
+        Poses or joint positions.
+    columns : float or sequence of float
+        Values appended to every row, scalars are repeated.
+
+    Returns
+    -------
+    list of list of float
+        N rows of M + len(columns) values.
+
+    """
+    if not len(poses):
+        return []
+    if np is not None:
+        poses = np.asarray(poses, dtype=float)
+        if poses.ndim != 2:
+            raise ValueError("Expected an (N, M) array, got shape {}".format(poses.shape))
+        n = poses.shape[0]
+        cols = [np.broadcast_to(np.asarray(c, dtype=float), (n,)) for c in columns]
+        return np.column_stack([poses] + cols).tolist()
+    poses = [list(p) for p in poses]
+    n = len(poses)
+    cols = [c if isinstance(c, (list, tuple)) else [c] * n for c in columns]
+    for c in cols:
+        if len(c) != n:
+            raise ValueError("Expected {} values per column, got {}".format(n, len(c)))
+    return [p + [c[i] for c in cols] for i, p in enumerate(poses)]
+
+
+def blend_radii(points, max_radius, div=2.01):
+    """Compute the largest safe blend radius at every point of a path.
+
+    A radius is limited by ``max_radius`` and by the lengths of the
+    adjoining segments divided by ``div``, so that blends of consecutive
+    points do not overlap. The first and last point are not blended.
+
+    Parameters
+    ----------
+    points : (N, 3+) array-like
+        Positions of the path, further columns are ignored.
+    max_radius : float
+        Maximum blend radius in m.
+    div : float
+        Divisor of the segment lengths.
+        Default set to 2.01.
+
+    Returns
+    -------
+    numpy.ndarray or list
+        N blend radii, a list if NumPy is not available.
+
+    """
+    n = len(points)
+    if np is None:
+        points = [list(p)[:3] for p in points]
+        lengths = [sum((b - a) ** 2 for a, b in zip(p, q)) ** 0.5
+                   for p, q in zip(points[:-1], points[1:])]
+        radii = [0.0] * n
+        for i in range(1, n - 1):
+            radii[i] = min(max_radius, lengths[i - 1] / div, lengths[i] / div)
+        return radii
+    radii = np.zeros(n)
+    if n < 3:
+        return radii
+    points = np.asarray(points, dtype=float)[:, :3]
+    lengths = np.linalg.norm(np.diff(points, axis=0), axis=1) / div
+    radii[1:-1] = np.minimum(max_radius, np.minimum(lengths[:-1], lengths[1:]))
+    return radii
+
+
+def simplify_path(poses, tolerance, angle_tolerance=None):
+    """Remove points of a path that a linear move between their neighbours
+    reproduces within the given tolerances (Douglas-Peucker).
+
+    A point is compared to the segment between the kept points around it:
+    its position by the distance to the segment, its orientation by the
+    angle to the orientation interpolated at the projection of the point.
+
+    Parameters
+    ----------
+    poses : (N, 6) array-like
+        Poses [x, y, z, rx, ry, rz] with the rotation vector.
+    tolerance : float
+        Maximum position deviation in m, greater than 0.
+    angle_tolerance : float (None)
+        Maximum orientation deviation in rad, greater than 0.
+        Default set to "None" to ignore the orientation.
+
+    Returns
+    -------
+    indices : list of int
+        Indices of the kept poses, always including the end points.
+    removed : int
+        Number of removed poses.
+    max_deviation : float
+        Largest position deviation in m of a removed pose.
+    max_angle_deviation : float or None
+        Largest orientation deviation in rad of a removed pose, "None"
+        without ``angle_tolerance``.
+
+    """
+    if not tolerance > 0:
+        raise ValueError("tolerance must be greater than 0, got {}".format(tolerance))
+    if angle_tolerance is not None and not angle_tolerance > 0:
+        raise ValueError("angle_tolerance must be greater than 0, got {}".format(angle_tolerance))
+    n = len(poses)
+    max_deviation = 0.0
+    max_angle_deviation = None if angle_tolerance is None else 0.0
+    if n < 3:
+        return list(range(n)), 0, max_deviation, max_angle_deviation
+    if np is None:
+        deviations = _py_deviations(poses, angle_tolerance is not None)
+    else:
+        deviations = _np_deviations(poses, angle_tolerance is not None)
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        distances, angles = deviations(a, b)
+        i, excess = _largest_excess(distances, angles, tolerance, angle_tolerance)
+        if excess > 1.0:
+            keep[a + 1 + i] = True
+            stack.append((a, a + 1 + i))
+            stack.append((a + 1 + i, b))
+        else:
+            max_deviation = max(max_deviation, _maximum(distances))
+            if angles is not None:
+                max_angle_deviation = max(max_angle_deviation, _maximum(angles))
+    indices = [i for i in range(n) if keep[i]]
+    return indices, n - len(indices), max_deviation, max_angle_deviation
+
+
+def _maximum(values):
+    return float(values.max()) if np is not None else max(values)
+
+
+def _largest_excess(distances, angles, tolerance, angle_tolerance):
+    # index and ratio to its tolerance of the largest deviation
+    if np is not None:
+        excess = distances / tolerance
+        if angles is not None:
+            excess = np.maximum(excess, angles / angle_tolerance)
+        i = int(np.argmax(excess))
+        return i, excess[i]
+    excess = [d / tolerance for d in distances]
+    if angles is not None:
+        excess = [max(e, a / angle_tolerance) for e, a in zip(excess, angles)]
+    i = max(range(len(excess)), key=excess.__getitem__)
+    return i, excess[i]
+
+
+def _np_deviations(poses, orientation):
+    # deviations of the poses between a and b from the segment a-b
+    poses = np.asarray(poses, dtype=float)
+    points = poses[:, :3]
+    quats = _quaternions(poses[:, 3:6]) if orientation else None
+
+    def deviations(a, b):
+        distances, t = _segment_distances(points[a + 1:b], points[a], points[b])
+        if quats is None:
+            return distances, None
+        return distances, _quaternion_angles(quats[a + 1:b], _slerp(quats[a], quats[b], t))
+    return deviations
+
+
+def _py_deviations(poses, orientation):
+    points = [[float(x) for x in list(p)[:3]] for p in poses]
+    quats = [_py_quaternion(list(p)[3:6]) for p in poses] if orientation else None
+
+    def deviations(a, b):
+        start, end = points[a], points[b]
+        direction = [e - s for s, e in zip(start, end)]
+        length2 = sum(d * d for d in direction)
+        distances, ts = [], []
+        for p in points[a + 1:b]:
+            t = 0.0
+            if length2 > 0.0:
+                t = min(max(sum((x - s) * d for x, s, d in zip(p, start, direction)) / length2, 0.0), 1.0)
+            distances.append(sum((x - s - t * d) ** 2 for x, s, d in zip(p, start, direction)) ** 0.5)
+            ts.append(t)
+        if quats is None:
+            return distances, None
+        return distances, [_py_quaternion_angle(q, _py_slerp(quats[a], quats[b], t))
+                           for q, t in zip(quats[a + 1:b], ts)]
+    return deviations
+
+
+def _py_quaternion(rotvec):
+    angle = sum(r * r for r in rotvec) ** 0.5
+    scale = math.sin(angle / 2) / angle if angle > 1e-12 else 0.5
+    return [math.cos(angle / 2)] + [r * scale for r in rotvec]
+
+
+def _py_slerp(q0, q1, t):
+    dot = sum(a * b for a, b in zip(q0, q1))
+    if dot < 0.0:
+        q1, dot = [-b for b in q1], -dot
+    omega = math.acos(min(dot, 1.0))
+    if omega < 1e-9:
+        return q0
+    s0, s1, s = math.sin((1 - t) * omega), math.sin(t * omega), math.sin(omega)
+    return [(s0 * a + s1 * b) / s for a, b in zip(q0, q1)]
+
+
+def _py_quaternion_angle(q0, q1):
+    dot = abs(sum(a * b for a, b in zip(q0, q1)))
+    return 2.0 * math.acos(min(max(dot, 0.0), 1.0))
+
+
+def _segment_distances(points, start, end):
+    direction = end - start
+    length2 = float(np.dot(direction, direction))
+    if length2 == 0.0:
+        t = np.zeros(len(points))
+    else:
+        t = np.clip(np.dot(points - start, direction) / length2, 0.0, 1.0)
+    closest = start + t[:, None] * direction
+    return np.linalg.norm(points - closest, axis=1), t
+
+
+def _quaternions(rotvecs):
+    angles = np.linalg.norm(rotvecs, axis=1)
+    scale = np.where(angles > 1e-12, np.sin(angles / 2) / np.maximum(angles, 1e-12), 0.5)
+    return np.column_stack([np.cos(angles / 2), rotvecs * scale[:, None]])
+
+
+def _slerp(q0, q1, t):
+    dot = float(np.dot(q0, q1))
+    if dot < 0.0:
+        q1, dot = -q1, -dot
+    omega = np.arccos(min(dot, 1.0))
+    if omega < 1e-9:
+        return np.tile(q0, (len(t), 1))
+    return (np.sin((1 - t) * omega)[:, None] * q0 + np.sin(t * omega)[:, None] * q1) / np.sin(omega)
+
+
+def _quaternion_angles(q0, q1):
+    dots = np.abs(np.sum(q0 * q1, axis=1))
+    return 2.0 * np.arccos(np.clip(dots, 0.0, 1.0))
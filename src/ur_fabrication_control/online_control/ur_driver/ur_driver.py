@@ -8,6 +8,7 @@ import socket
 import sys
 from ..communication import msg_identifier_dict, command_identifier_dict
 from ...direct_control.utilities import read_file_to_string, read_file_to_list
+from ...direct_control.communication import send_to
 
 if (sys.version_info > (3, 0)):
     python_version = 3
@@ -72,13 +73,10 @@ def generate_ur_program():
 def send_script(ur_ip, script):
     global UR_SERVER_PORT
     try:
-        s = socket.create_connection((ur_ip, UR_SERVER_PORT), timeout=2)
         enc_script = script.encode('utf-8') # encoding allows use of python 3.7
-        s.send(enc_script)
-        #s.send(script)
+        send_to(ur_ip, UR_SERVER_PORT, enc_script)
         print("Script sent to %s on port %i" % (ur_ip, UR_SERVER_PORT))
-        s.close()
-    except socket.timeout:
+    except socket.error:
         print("UR with ip %s not available on port %i" % (ur_ip, UR_SERVER_PORT))
         raise
 
@@ -0,0 +1,157 @@
+"""
+Benchmarks for scheduling fabrication tasks.
+
+Run with ``python tests/benchmark_fabrication.py``.
+"""
+import time
+import socket
+import multiprocessing
+
+from ur_fabrication_control.direct_control import URScript
+from ur_fabrication_control.direct_control.communication import ConnectionPool
+from ur_fabrication_control.direct_control.fabrication_process import Fabrication
+
+
+class FakeFabrication(Fabrication):
+    """Fabrication whose tasks are exit messages sent straight back to the
+    feedback server."""
+    def connect(self):
+        self.s = socket.create_connection(self.server.server.server_address)
+        self.f = self.s.makefile('rb')
+
+    def perform_task(self, task):
+        self.s.sendall(task.encode())
+        self.f.readline()
+
+    def close(self):
+        self.f.close()
+        self.s.close()
+        super(FakeFabrication, self).close()
+
+
+class SpinningFabrication(FakeFabrication):
+    """Fabrication with the former busy spinning scheduling."""
+    def tasks_available(self):
+        for task in self.tasks.values():
+            if task["state"] != "completed":
+                return True
+        return False
+
+    def get_next_task(self):
+        for key in sorted(self.tasks.keys()):
+            if self.tasks[key]["state"] == "waiting":
+                return key
+        return None
+
+    def run(self, stop_thread, q):
+        while self.tasks_available():
+            if stop_thread():
+                self._performing_task = False
+                break
+            elif not self._performing_task:
+                self.current_task = self.get_next_task()
+                q.put(self.tasks[self.current_task]["exit_message"])
+                self.perform_task(self.tasks[self.current_task]['task'])
+                self._performing_task = True
+            elif self._performing_task and not q.unfinished_tasks:
+                q.join()
+                self.tasks[self.current_task]["state"] = "completed"
+                self._performing_task = False
+
+
+FABRICATIONS = [("event", FakeFabrication), ("spin", SpinningFabrication)]
+
+
+def benchmark_run(sizes=(100, 1000, 3000)):
+    """Wall and CPU time of running n tasks."""
+    print("{:>10} {:>8} {:>12} {:>12}".format("scheduler", "tasks", "wall [s]", "CPU [s]"))
+    for n in sizes:
+        for name, cls in FABRICATIONS:
+            fab = cls()
+            fab.set_feedback_server("localhost", 0)
+            fab.server.add_message = lambda msg, seq=None, fab=fab: fab.server.msgs.add(msg, seq)
+            for i in range(n):
+                fab.add_task("Task_{}_complete\n".format(i), "Task_{}_complete".format(i))
+            fab.server.start()
+            fab.connect()
+            fab._create_threads()
+            t0, c0 = time.perf_counter(), time.process_time()
+            fab.listen_thread.start()
+            fab.task_thread.start()
+            fab.task_thread.join()
+            wall, cpu = time.perf_counter() - t0, time.process_time() - c0
+            fab.close()
+            print("{:>10} {:>8} {:>12.3f} {:>12.3f}".format(name, n, wall, cpu))
+
+
+def _fake_controller(pipe, motion=0.05):
+    # runs every received script for ``motion`` s, then sends its exit message,
+    # in its own process to leave the timing unaffected by the host threads
+    ur_socket = socket.socket()
+    ur_socket.bind(("localhost", 0))
+    ur_socket.listen(1)
+    pipe.send(ur_socket.getsockname())
+    feedback = socket.create_connection(pipe.recv())
+    feedback_file = feedback.makefile('rb')
+    c, _ = ur_socket.accept()
+    f = c.makefile('rb')
+    gaps = []
+    exit_sent = None
+    while True:
+        line = f.readline().decode()
+        if not line:
+            break
+        if line.startswith("def program") and exit_sent is not None:
+            gaps.append(time.perf_counter() - exit_sent)
+        elif line.startswith("\ttextmsg(\"Task_"):
+            exit_msg = line.split('"')[1]
+        elif line.startswith("program()"):
+            time.sleep(motion)
+            exit_sent = time.perf_counter()
+            feedback.sendall("{}\n".format(exit_msg).encode())
+            feedback_file.readline()
+    feedback_file.close()
+    feedback.close()
+    ur_socket.close()
+    pipe.send(gaps)
+
+
+def benchmark_lookahead(n=30, moves=5000):
+    """Gap between the exit message of a task and the arrival of the next
+    script, tasks are URScripts of n moves generated when prepared."""
+    print("{:>10} {:>12} {:>12}".format("lookahead", "p50 [ms]", "max [ms]"))
+    poses = [[0.1 + 1e-5 * i, 0.2, 0.3, 0.0, 3.14159, 0.0] for i in range(moves)]
+    for lookahead in [0, 1, 2]:
+        pipe, controller_pipe = multiprocessing.Pipe()
+        controller = multiprocessing.Process(target=_fake_controller, args=(controller_pipe,))
+        controller.start()
+        ur_address = pipe.recv()
+        pool = ConnectionPool()
+        fab = Fabrication(lookahead)
+        fab.perform_task = lambda task: task.send_script(pool=pool)
+        fab.set_feedback_server("localhost", 0)
+        fab.server.add_message = lambda msg, seq=None, fab=fab: fab.server.msgs.add(msg, seq)
+        for i in range(n):
+            urscript = URScript(*ur_address)
+            urscript.start()
+            urscript.textmessage("Task_{}_complete".format(i), string=True)
+            urscript.moves_linear(poses)
+            urscript.end()
+            urscript.prepare = lambda urscript=urscript: URScript.prepare(urscript, pool=pool)
+            fab.add_task(urscript, "Task_{}_complete".format(i))
+        fab.server.start()
+        pipe.send(fab.server.server.server_address)
+        fab._create_threads()
+        fab.listen_thread.start()
+        fab.task_thread.start()
+        fab.task_thread.join()
+        pool.close()
+        gaps = sorted(pipe.recv())
+        controller.join()
+        fab.close()
+        print("{:>10} {:>12.2f} {:>12.2f}".format(lookahead, gaps[len(gaps) // 2] * 1e3, gaps[-1] * 1e3))
+
+
+if __name__ == "__main__":
+    benchmark_run()
+    benchmark_lookahead()
@@ -0,0 +1,109 @@
+"""
+Benchmarks for receiving feedback messages.
+
+Run with ``python tests/benchmark_feedback.py``.
+"""
+import time
+import socket
+
+from ur_fabrication_control.direct_control.communication import TCPFeedbackServer
+from ur_fabrication_control.direct_control.communication import parse_message, parse_lists
+from ur_fabrication_control.direct_control.communication import MessageStore
+
+
+class SpinningFeedbackServer(TCPFeedbackServer):
+    """Server with the former busy spinning message processing."""
+    def process_messages(self, _stop_flag, timeout=None):
+        while not _stop_flag():
+            if len(self.msgs) != len(self.server.rcv_msg):
+                self.add_message(self.server.rcv_msg[len(self.msgs)])
+
+
+SERVERS = [("event", TCPFeedbackServer), ("spin", SpinningFeedbackServer)]
+
+
+def _quiet(server):
+    # leave out the prints of every message
+    server.add_message = lambda msg, seq=None: server.msgs.add(msg, seq)
+    return server
+
+
+def benchmark_idle_cpu(duration=2.0):
+    """CPU time used by a started server without messages."""
+    print("{:>10} {:>16}".format("server", "idle CPU [%]"))
+    for name, cls in SERVERS:
+        with _quiet(cls(ip="localhost", port=0)):
+            time.sleep(0.1)
+            t0 = time.process_time()
+            time.sleep(duration)
+            cpu = time.process_time() - t0
+        print("{:>10} {:>16.1f}".format(name, cpu / duration * 100))
+
+
+def benchmark_latency(n=1000):
+    """Time from sending a line until its message is processed."""
+    print("{:>10} {:>16} {:>16}".format("server", "p50 [us]", "p95 [us]"))
+    for name, cls in SERVERS:
+        with _quiet(cls(ip="localhost", port=0)) as server:
+            s = socket.create_connection(server.server.server_address)
+            f = s.makefile('rb')
+            latencies = []
+            for i in range(n):
+                t0 = time.perf_counter()
+                s.sendall("[{}, 0.1, 0.2]\n".format(i).encode())
+                while len(server.msgs) <= i:
+                    pass
+                latencies.append(time.perf_counter() - t0)
+                f.readline()
+            f.close()
+            s.close()
+        latencies.sort()
+        print("{:>10} {:>16.1f} {:>16.1f}".format(
+            name, latencies[n // 2] * 1e6, latencies[int(n * 0.95)] * 1e6))
+
+
+def _eval_message(msg):
+    # the former parsing with eval
+    if all(i in msg for i in ["[", "]", ","]):
+        msg = msg.split('[', 1)[1].split(']')[0]
+        msg = msg.split(',')
+        msg = [eval(x) for x in msg]
+    return msg
+
+
+def benchmark_parse(n=100000):
+    """Time parsing n pose lines with eval, per line and in bulk."""
+    lines = ["p[{!r}, 0.2, 0.3, 0.0, 3.14159, 0.0]".format(0.001 * i) for i in range(n)]
+    print("{:>10} {:>16}".format("parser", "[us/line]"))
+    for name, parse in [("eval", lambda m: [_eval_message(x) for x in m]),
+                        ("message", lambda m: [parse_message(x) for x in m]),
+                        ("bulk", parse_lists)]:
+        t0 = time.perf_counter()
+        parse(lines)
+        print("{:>10} {:>16.2f}".format(name, (time.perf_counter() - t0) / n * 1e6))
+
+
+def benchmark_lookup(sizes=(1000, 10000, 100000), repeat=100):
+    """Time checking for an exit message after n node messages."""
+    print("{:>10} {:>16} {:>16}".format("messages", "dict [us]", "store [us]"))
+    for n in sizes:
+        msgs = {}
+        store = MessageStore()
+        for i in range(n):
+            msg = "{{'TASK': 0, 'NODE': {}}}".format(i)
+            msgs[len(msgs)] = msg
+            store.add(msg)
+        times = []
+        for container in [msgs, store]:
+            t0 = time.perf_counter()
+            for _ in range(repeat):
+                "Task_0_complete" in container.values()
+            times.append((time.perf_counter() - t0) / repeat * 1e6)
+        print("{:>10} {:>16.2f} {:>16.2f}".format(n, *times))
+
+
+if __name__ == "__main__":
+    benchmark_idle_cpu()
+    benchmark_latency()
+    benchmark_parse()
+    benchmark_lookup()
@@ -0,0 +1,74 @@
+"""
+Benchmarks for building URScripts.
+
+Run with ``python tests/benchmark_urscript.py``.
+"""
+import time
+import tracemalloc
+
+from ur_fabrication_control.direct_control import URScript
+
+SIZES = [1000, 10000, 100000, 1000000]
+LINE = "movel(p[0.1, 0.2, 0.3, 0.0, 3.14159, 0.0], v=0.05, r=0)"
+
+
+def benchmark_add_line(sizes=SIZES):
+    """Time appending n movel lines and generating the script."""
+    print("{:>10} {:>12} {:>12} {:>14}".format("lines", "add [s]", "generate [s]", "add [us/line]"))
+    for n in sizes:
+        urscript = URScript()
+        urscript.start()
+        t0 = time.time()
+        for _ in range(n):
+            urscript.add_line(LINE)
+        t1 = time.time()
+        urscript.end()
+        urscript.generate()
+        t2 = time.time()
+        print("{:>10} {:>12.3f} {:>12.3f} {:>14.3f}".format(n, t1 - t0, t2 - t1, (t1 - t0) / n * 1e6))
+
+
+def benchmark_iter_generate(sizes=SIZES):
+    """Compare peak memory of generate and iter_generate."""
+    print("{:>10} {:>16} {:>16}".format("lines", "generate [MB]", "iter [MB]"))
+    for n in sizes:
+        urscript = URScript()
+        urscript.start()
+        for _ in range(n):
+            urscript.add_line(LINE)
+        urscript.end()
+        tracemalloc.start()
+        urscript.generate().encode('utf-8')
+        peak_generate = tracemalloc.get_traced_memory()[1]
+        urscript.script = None
+        tracemalloc.stop()
+        tracemalloc.start()
+        for _chunk in urscript.iter_generate():
+            pass
+        peak_iter = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print("{:>10} {:>16.2f} {:>16.2f}".format(n, peak_generate / 1e6, peak_iter / 1e6))
+
+
+def benchmark_memory(sizes=SIZES[:-1]):
+    """Compare the memory of n moves stored as operations and as lines."""
+    print("{:>10} {:>16} {:>16}".format("moves", "ops [MB]", "lines [MB]"))
+    for n in sizes:
+        poses = [[0.1 * i, 0.2, 0.3, 0.0, 3.14159, 0.0] for i in range(n)]
+        urscript = URScript()
+        tracemalloc.start()
+        urscript.moves_linear(poses)
+        ops = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        tracemalloc.start()
+        lines = urscript.commands.lines
+        text = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del lines
+        print("{:>10} {:>16.2f} {:>16.2f}".format(n, ops / 1e6, text / 1e6))
+
+
+if __name__ == "__main__":
+    benchmark_add_line()
+    benchmark_iter_generate()
+    benchmark_memory()
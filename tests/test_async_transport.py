@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+transport = pytest.importorskip("ur_fabrication_control.direct_control.communication.async_transport")
+
+
+async def send_lines(address, lines):
+    reader, writer = await asyncio.open_connection(*address)
+    for line in lines:
+        writer.write("{}\n".format(line).encode())
+        await writer.drain()
+        await reader.readline()
+    writer.close()
+
+
+def test_wait_for_message():
+    async def main():
+        async with transport.AsyncFeedbackServer("localhost", 0) as server:
+            asyncio.ensure_future(send_lines(server.server_address, ["a", "Done"]))
+            assert await server.wait_for("Done", timeout=2)
+            assert not await server.wait_for("Other", timeout=0.1)
+            return server.msgs.keys()
+
+    assert asyncio.run(main()) == [0, 1]
+
+
+def test_wait_for_predicate_checks_every_message_once():
+    checked = []
+
+    def predicate(msg):
+        checked.append(msg)
+        return msg == "last"
+
+    async def main():
+        async with transport.AsyncFeedbackServer("localhost", 0) as server:
+            task = asyncio.ensure_future(server.wait_for(predicate, timeout=2))
+            await send_lines(server.server_address, ["m_{}".format(i) for i in range(20)] + ["last"])
+            return await task
+
+    assert asyncio.run(main())
+    assert checked == ["m_{}".format(i) for i in range(20)] + ["last"]
+
+
+def test_bounded_retention():
+    async def main():
+        async with transport.AsyncFeedbackServer("localhost", 0, maxlen=5) as server:
+            await send_lines(server.server_address, ["m_{}".format(i) for i in range(20)])
+            assert await server.wait_for("m_19", timeout=2)
+            return server
+
+    server = asyncio.run(main())
+    assert len(server.rcv_msg) == 5
+    assert server.msgs.keys() == [15, 16, 17, 18, 19]
+    assert "m_0" not in server.msgs.values()
+
+
+def test_send_ungenerated_script():
+    from ur_fabrication_control.direct_control import URScript
+
+    received = []
+
+    async def handle(reader, writer):
+        received.append(await reader.read())
+        writer.close()
+
+    async def main():
+        controller = await asyncio.start_server(handle, "localhost", 0)
+        ip, port = controller.sockets[0].getsockname()[:2]
+        script = URScript(ur_ip=ip, ur_port=port)
+        script.start()
+        script.add_line("textmsg(\"Done\")")
+        script.end()
+        async with transport.AsyncURScriptClient(ip, port) as client:
+            await client.send_script(script)
+        while not received:
+            await asyncio.sleep(0.01)
+        controller.close()
+        return script
+
+    script = asyncio.run(main())
+    assert received == [script.payload]
+    assert b'textmsg("Done")' in script.payload
@@ -0,0 +1,85 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from ur_fabrication_control.direct_control.common import send_stop
+from ur_fabrication_control.direct_control.communication import ConnectionPool, default_pool, send_direct
+
+
+@pytest.fixture
+def controller():
+    # fake controller collecting the data of every connection
+    server = socket.socket()
+    server.bind(("localhost", 0))
+    server.listen(8)
+    received = []
+
+    def read(c):
+        data = b""
+        while True:
+            chunk = c.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+        received.append(data.decode())
+
+    def serve():
+        while True:
+            try:
+                c, _ = server.accept()
+            except socket.error:
+                break
+            t = threading.Thread(target=read, args=(c,))
+            t.daemon = True
+            t.start()
+
+    t = threading.Thread(target=serve)
+    t.daemon = True
+    t.start()
+    yield server.getsockname(), received
+    server.close()
+
+
+def wait_until(predicate, timeout=2):
+    t_end = time.time() + timeout
+    while not predicate() and time.time() < t_end:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_pooled_connection_reused(controller):
+    (ip, port), received = controller
+    pool = ConnectionPool()
+    pool.send(ip, port, b"a\n")
+    pool.send(ip, port, b"b\n")
+    pool.close()
+    assert wait_until(lambda: received == ["a\nb\n"])
+
+
+def test_send_direct(controller):
+    (ip, port), received = controller
+    send_direct(ip, port, "stop\n")
+    assert wait_until(lambda: received == ["stop\n"])
+
+
+def test_send_direct_unavailable():
+    s = socket.socket()
+    s.bind(("localhost", 0))
+    port = s.getsockname()[1]
+    s.close()
+    with pytest.raises(ConnectionError):
+        send_direct("localhost", port, "stop\n", timeout=0.5)
+
+
+def test_stop_bypasses_busy_upload(controller):
+    (ip, port), received = controller
+    connection = default_pool.get(ip, port)
+    with connection._lock:
+        # an upload holds the pooled connection
+        t0 = time.time()
+        send_stop(ip, port)
+        assert time.time() - t0 < 1
+        assert wait_until(lambda: any("stopl" in data for data in received))
+    default_pool.close(ip, port)
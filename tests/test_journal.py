@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+
+from ur_fabrication_control.direct_control.fabrication_process import TaskJournal, TaskScheduler
+from ur_fabrication_control.direct_control.fabrication_process import format_node_message, parse_node_message
+
+
+class ResumableTask(object):
+    start_node = 0
+
+
+def scheduler_with_tasks(n=4):
+    scheduler = TaskScheduler()
+    for key in range(n):
+        scheduler.add(key, {"task": ResumableTask(), "depends_on": [key - 1] if key else []})
+    return scheduler
+
+
+@pytest.fixture
+def path(tmpdir):
+    return str(tmpdir.join("journal.jsonl"))
+
+
+def test_round_trip(path):
+    journal = TaskJournal(path, fsync=False)
+    journal.record_state(0, "running")
+    journal.record_node(0, 3)
+    journal.record_state(0, "completed")
+    journal.record_state((1, "a"), "running")
+    journal.record_node((1, "a"), 2)
+    journal.close()
+    states, nodes = TaskJournal(path).replay()
+    assert states == {0: "completed", (1, "a"): "running"}
+    assert nodes == {(1, "a"): 2}
+
+
+def test_resume(path):
+    scheduler = scheduler_with_tasks()
+    scheduler.journal = TaskJournal(path, fsync=False)
+    assert scheduler.pop() == 0
+    scheduler.complete(0)
+    assert scheduler.pop() == 1
+    scheduler.journal.record_node(1, 4)
+    scheduler.journal.close()
+    with open(path, "a") as f:
+        # a record cut off by a crash
+        f.write('{"t": 1, "key": 1, "no')
+
+    resumed = scheduler_with_tasks()
+    journal = TaskJournal(path)
+    assert journal.restore(resumed) == 1
+    assert resumed.tasks[0]["state"] == "completed"
+    assert resumed.tasks[1]["node"] == 4
+    assert resumed.tasks[1]["task"].start_node == 5
+    assert resumed.pop() == 1
+    assert resumed.remaining == 3
+
+    journal.compact()
+    assert TaskJournal(path).replay() == ({0: "completed", 1: "running"}, {1: 4})
+
+
+def test_lock_released_while_writing(path):
+    scheduler = scheduler_with_tasks(2)
+    blocked = []
+
+    class CheckingJournal(TaskJournal):
+        def record_state(self, key, state):
+            # another robot thread can use the scheduler meanwhile
+            t = threading.Thread(target=scheduler.next)
+            t.start()
+            t.join(1)
+            blocked.append(t.is_alive())
+            super(CheckingJournal, self).record_state(key, state)
+
+    scheduler.journal = CheckingJournal(path, fsync=False)
+    key = scheduler.pop()
+    scheduler.complete(key)
+    scheduler.journal.close()
+    assert blocked == [False, False]
+    assert TaskJournal(path).replay()[0] == {0: "completed"}
+
+
+@pytest.mark.parametrize("key", [3, -1, "3", "a b", (1, "x"), "@x"])
+@pytest.mark.parametrize("compact", [False, True])
+def test_node_message_keys(key, compact):
+    msg = format_node_message(key, 7, compact)
+    assert parse_node_message(msg) == (key, 7)
+    assert msg.startswith("@") == (compact and isinstance(key, int))
+
+
+def test_other_messages():
+    assert parse_node_message("Task_3_complete") is None
+    assert parse_node_message("@x 3") is None
+    assert parse_node_message([0.1, 0.2]) is None
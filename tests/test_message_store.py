@@ -0,0 +1,102 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from ur_fabrication_control.direct_control.communication import MessageStore
+
+
+def test_dictionary_interface():
+    store = MessageStore()
+    for msg in ["a", [0.1, 0.2], "b"]:
+        store.add(msg)
+    assert store.keys() == [0, 1, 2]
+    assert store[1] == [0.1, 0.2]
+    assert [0.1, 0.2] in store.values()
+    assert "c" not in store.values()
+    assert len(store) == 3
+    assert store.find("b") == [2]
+
+
+def test_sequence_numbers():
+    store = MessageStore()
+    assert store.add("a", 3) == 3
+    assert store.next_seq == 4
+    with pytest.raises(ValueError):
+        store.add("b", 2)
+
+
+def test_retention():
+    store = MessageStore(maxlen=3)
+    for i in range(10):
+        store.add("msg_{}".format(i))
+    assert store.keys() == [7, 8, 9]
+    assert store.first_seq == 7
+    assert store.next_seq == 10
+    assert "msg_6" not in store.values()
+    assert "msg_9" in store.values()
+    with pytest.raises(KeyError):
+        store[6]
+    assert store.get(6) is None
+
+
+def test_spill(tmpdir):
+    path = str(tmpdir.join("spill.jsonl"))
+    store = MessageStore(maxlen=2, spill=path)
+    store.add("a")
+    store.add([1, 2])
+    store.add("c", 5)
+    store.add("d")
+    assert store.keys() == [5, 6]
+    assert store[0] == "a"
+    assert store[1] == [1, 2]
+    with pytest.raises(KeyError):
+        store[3]
+    store.close()
+    with open(path) as f:
+        assert len(f.readlines()) == 2
+
+
+def test_wait_for_message():
+    store = MessageStore()
+    t = threading.Timer(0.1, store.add, args=("Done",))
+    t.start()
+    t0 = time.time()
+    c0 = time.process_time()
+    assert store.wait_for("Done", timeout=2) == 0
+    assert time.time() - t0 < 1
+    assert time.process_time() - c0 < 0.05
+    assert store.wait_for("Other", timeout=0.1) is None
+
+
+def test_wait_for_predicate():
+    store = MessageStore(maxlen=2)
+    for i in range(5):
+        store.add(i)
+    checked = []
+
+    def predicate(msg):
+        checked.append(msg)
+        return msg == 6
+
+    threading.Timer(0.1, store.add, args=(5,)).start()
+    threading.Timer(0.2, store.add, args=(6,)).start()
+    assert store.wait_for(predicate, timeout=2) == 6
+    # every message is checked once
+    assert checked == [3, 4, 5, 6]
+
+
+def test_spill_offsets_compact(tmpdir):
+    path = str(tmpdir.join("spill.jsonl"))
+    store = MessageStore(maxlen=1, spill=path)
+    n = 10000
+    for i in range(n + 1):
+        store.add("msg_{}".format(i))
+    # 8 bytes per evicted message instead of an int object each
+    assert len(store._spilled) == n
+    assert store._spilled.itemsize == 8
+    assert sys.getsizeof(store._spilled) < 9 * n
+    assert store[0] == "msg_0"
+    assert store[n - 1] == "msg_{}".format(n - 1)
+    store.close()
@@ -0,0 +1,122 @@
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+from ur_fabrication_control.direct_control.fabrication_process import MultiRobotFabrication
+if sys.version_info[0] == 2:
+    import SocketServer as ss
+else:
+    import socketserver as ss
+
+
+class FakeController(ss.ThreadingTCPServer):
+    """Fake UR controller performing the scripts ``Task_<key>_complete``
+    for ``motion`` s, then sending the exit message to the feedback
+    server of its robot."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, motion=0.1):
+        ss.ThreadingTCPServer.__init__(self, ("127.0.0.1", 0), ControllerHandler)
+        self.motion = motion
+        self.feedback_address = None
+        self.log = []       # (exit message, start, end)
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+class ControllerHandler(ss.StreamRequestHandler):
+    def handle(self):
+        controller = self.server
+        while True:
+            line = self.rfile.readline().decode().strip()
+            if not line:
+                break
+            start = time.time()
+            time.sleep(controller.motion)
+            controller.log.append((line, start, time.time()))
+            s = socket.create_connection(controller.feedback_address)
+            s.sendall("{}\n".format(line).encode())
+            s.makefile('rb').readline()
+            s.close()
+
+
+def closed_port():
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+@pytest.fixture
+def cell():
+    fab = MultiRobotFabrication()
+    controllers = {}
+    for name in ["a", "b"]:
+        controller = FakeController()
+        robot = fab.add_robot(name, "127.0.0.1", controller.server_address[1], "127.0.0.1", 0)
+        controller.feedback_address = robot.server_address
+        controllers[name] = controller
+    yield fab, controllers
+    fab.close()
+    for controller in controllers.values():
+        controller.close()
+
+
+def add_task(fab, key, robot=None, depends_on=None):
+    exit_msg = "Task_{}_complete".format(key)
+    fab.add_task(exit_msg + "\n", exit_msg, key, robot, depends_on)
+
+
+def performed(controller):
+    return [int(line.split("_")[1]) for line, _, _ in controller.log]
+
+
+def test_tasks_bound_to_robots(cell):
+    fab, controllers = cell
+    for key in range(6):
+        add_task(fab, key, robot="a" if key % 2 else "b")
+    fab.start()
+    assert fab.join(timeout=5)
+    assert performed(controllers["a"]) == [1, 3, 5]
+    assert performed(controllers["b"]) == [0, 2, 4]
+    assert fab.robots["a"].completed == [1, 3, 5]
+    assert not fab.failures
+
+
+def test_cross_robot_dependency_waits(cell):
+    fab, controllers = cell
+    add_task(fab, 0, robot="a")
+    add_task(fab, 1, robot="a")
+    # b waits for the second task of a
+    add_task(fab, 2, robot="b", depends_on=[1])
+    fab.start()
+    assert fab.join(timeout=5)
+    end_1 = dict((line, end) for line, _, end in controllers["a"].log)["Task_1_complete"]
+    (line, start_2, _), = controllers["b"].log
+    assert line == "Task_2_complete"
+    assert start_2 >= end_1
+
+
+def test_failure_reported(cell):
+    fab, controllers = cell
+    fab.add_robot("offline", "127.0.0.1", closed_port(), "127.0.0.1", 0)
+    add_task(fab, 0, robot="a")
+    add_task(fab, 1, robot="offline")
+    fab.start()
+    assert not fab.join(timeout=10)
+    assert [(key, name) for key, name, _ in fab.failures] == [(1, "offline")]
+    assert fab.robots["offline"].error is not None
+    assert fab.tasks[1]["state"] == "waiting"
+    # the other robots keep working
+    fab.scheduler.wait(lambda: fab.tasks[0]["state"] == "completed", 5)
+    assert performed(controllers["a"]) == [0]
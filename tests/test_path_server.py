@@ -0,0 +1,26 @@
+import pytest
+
+from ur_fabrication_control.direct_control.common import generate_moves_linear_stream
+from ur_fabrication_control.direct_control.communication import PathStreamServer
+
+
+@pytest.fixture
+def server():
+    server = PathStreamServer(ip="localhost", port=0)
+    yield server
+    server.server.server_close()
+
+
+def test_waypoints_without_exponents(server):
+    server.set_path([[1e-7, -2.5e-5, 0.3, 0.0, 3.14, 0.0, 1e-3, 12345678.0]])
+    data = server.next_waypoints(3).decode()
+    assert data == "(1,0,-0.000025,0.3,0,3.14,0,0.001,12345678)\n(0,0,0,0,0,0,0,0,0)\n"
+    assert "e" not in data
+    assert server.sent == 1
+
+
+def test_stream_script_connects_to_server():
+    script = generate_moves_linear_stream([0.0] * 6, "10.0.0.5", 50010, "127.0.0.1", 30002).script
+    assert 'Pathserver_ip = "10.0.0.5"' in script
+    assert "Pathserver_port = 50010" in script
+    assert "socket_read_ascii_float(9, socket_name=Pathserver, timeout=2)" in script
@@ -0,0 +1,55 @@
+import socket
+import time
+
+import pytest
+
+from ur_fabrication_control.direct_control.utilities.ping import ReachabilityCache, probe
+
+
+@pytest.fixture
+def listener():
+    # only bound to 127.0.0.1, the port is closed on 127.0.0.2
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    s.listen(1)
+    yield s
+    s.close()
+
+
+def test_probe(listener):
+    port = listener.getsockname()[1]
+    t0 = time.time()
+    assert probe(["127.0.0.1", "127.0.0.2"], ports=(port,), timeout=0.5) == {
+        "127.0.0.1": True, "127.0.0.2": False}
+    assert time.time() - t0 < 1
+
+
+def test_cache_reachable_and_unreachable(listener):
+    cache = ReachabilityCache(ports=(listener.getsockname()[1],))
+    assert cache.available(["127.0.0.1", "127.0.0.2"]) == {"127.0.0.1": True, "127.0.0.2": False}
+    assert cache.is_available("127.0.0.1")
+    assert not cache.is_available("127.0.0.2")
+
+
+def test_cache_refresh(listener):
+    cache = ReachabilityCache(ttl=0.3, ports=(listener.getsockname()[1],))
+    assert cache.is_available("127.0.0.1")
+    listener.close()
+    # the cached result is reused until it expires
+    assert cache.is_available("127.0.0.1")
+    assert not cache.is_available("127.0.0.1", refresh=True)
+    cache.invalidate()
+    assert not cache.is_available("127.0.0.1")
+
+
+def test_cache_expired_result_probed_again():
+    s = socket.socket()
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    cache = ReachabilityCache(ttl=0.2, ports=(port,))
+    assert not cache.is_available("127.0.0.1")
+    s.listen(1)
+    assert not cache.is_available("127.0.0.1")
+    time.sleep(0.3)
+    assert cache.is_available("127.0.0.1")
+    s.close()
@@ -0,0 +1,129 @@
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+from ur_fabrication_control.direct_control.fabrication_process import Fabrication, TaskPipeline
+if sys.version_info[0] == 2:
+    import SocketServer as ss
+else:
+    import socketserver as ss
+
+
+class FakeController(ss.ThreadingTCPServer):
+    """Fake UR controller performing every received exit message for
+    ``motion`` s, then sending it to the feedback server."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, motion=0.3):
+        ss.ThreadingTCPServer.__init__(self, ("127.0.0.1", 0), ControllerHandler)
+        self.motion = motion
+        self.feedback_address = None
+        self.log = []       # (exit message, start, end)
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+class ControllerHandler(ss.StreamRequestHandler):
+    def handle(self):
+        controller = self.server
+        for line in self.rfile:
+            line = line.decode().strip()
+            start = time.time()
+            time.sleep(controller.motion)
+            controller.log.append((line, start, time.time()))
+            s = socket.create_connection(controller.feedback_address)
+            s.sendall("{}\n".format(line).encode())
+            s.makefile('rb').readline()
+            s.close()
+
+
+class Task(object):
+    """Task taking ``prep`` s to prepare, the first ``failures``
+    preparations raise."""
+    def __init__(self, exit_msg, address, prep=0.1, failures=0):
+        self.exit_msg = exit_msg
+        self.address = address
+        self.prep = prep
+        self.failures = failures
+        self.prepared = []  # (start, end) of the successful preparations
+        self.sent = None
+
+    def prepare(self):
+        start = time.time()
+        time.sleep(self.prep)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("Preparing {} failed".format(self.exit_msg))
+        self.prepared.append((start, time.time()))
+
+    def send_script(self):
+        assert self.prepared
+        self.sent = time.time()
+        s = socket.create_connection(self.address)
+        s.sendall("{}\n".format(self.exit_msg).encode())
+        s.close()
+
+
+@pytest.fixture
+def cell():
+    controller = FakeController()
+    fab = Fabrication(lookahead=1)
+    fab.set_feedback_server("127.0.0.1", 0)
+    controller.feedback_address = fab.server.server.server_address
+    yield fab, controller
+    fab.close()
+    controller.close()
+
+
+def run_tasks(fab, controller, n, **failures):
+    tasks = []
+    for key in range(n):
+        exit_msg = "Task_{}_complete".format(key)
+        task = Task(exit_msg, controller.server_address, failures=failures.get(exit_msg, 0))
+        fab.add_task(task, exit_msg, key)
+        tasks.append(task)
+    fab.start()
+    assert fab.scheduler.wait(lambda: not fab.tasks_available(), 10)
+    return tasks
+
+
+def test_next_task_prepared_while_running(cell):
+    fab, controller = cell
+    tasks = run_tasks(fab, controller, 4)
+    ends = [end for _, _, end in controller.log]
+    for k in range(1, 4):
+        (start, end), = tasks[k].prepared
+        # prepared while the previous task ran, sent once it was completed
+        assert start < ends[k - 1]
+        assert end <= ends[k - 1] <= tasks[k].sent
+
+
+def test_order_kept_when_preparation_fails(cell):
+    fab, controller = cell
+    tasks = run_tasks(fab, controller, 4, Task_2_complete=1)
+    assert [line for line, _, _ in controller.log] == ["Task_{}_complete".format(k) for k in range(4)]
+    assert [task.sent for task in tasks] == sorted(task.sent for task in tasks)
+    # prepared again when it was taken, after the previous task completed
+    (start, _), = tasks[2].prepared
+    assert start >= controller.log[1][2]
+
+
+def test_failed_preparation_raised_on_take():
+    failing = Task("Task_0_complete", None, prep=0, failures=2)
+    task = Task("Task_1_complete", None, prep=0)
+    pipeline = TaskPipeline(depth=2)
+    pipeline.submit([failing, task])
+    with pytest.raises(RuntimeError):
+        pipeline.take(failing)
+    pipeline.take(task)
+    assert task.prepared and not failing.prepared
+    pipeline.close()
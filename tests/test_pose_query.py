@@ -0,0 +1,83 @@
+import socket
+import time
+
+import pytest
+
+from ur_fabrication_control.direct_control.common import get_current_pose_joints
+from ur_fabrication_control.direct_control.pose_query import PoseFeedbackServer, PoseQueryService
+from ur_fabrication_control.direct_control.pose_query import close_pose_services, get_pose_service
+
+
+@pytest.fixture
+def server():
+    server = PoseFeedbackServer(ip="localhost", port=0)
+    server.start()
+    yield server
+    server.shutdown()
+
+
+def send_lines(server, *lines):
+    s = socket.create_connection(server.server.server_address)
+    f = s.makefile('rb')
+    for line in lines:
+        s.sendall("{}\n".format(line).encode())
+        f.readline()
+    f.close()
+    s.close()
+
+
+def test_reply_and_feedback(server):
+    server.expect(3)
+    send_lines(server, "pose_reply 3 p[0.1, 0.2, 0.3, 0.0, 3.14, 0.0]", "Done")
+    assert server.wait_reply(3, timeout=2) == [0.1, 0.2, 0.3, 0.0, 3.14, 0.0]
+    assert server.wait_for("Done", timeout=2)
+    assert server.wait_reply(3, timeout=0.1) is None
+
+
+def test_unexpected_reply_dropped(server):
+    send_lines(server, "pose_reply 4 [0.0, 0.0, 0.0, 0.0, 0.0, 0.0]", "Done")
+    # processed in order, so the reply came before expect
+    assert server.wait_for("Done", timeout=2)
+    server.expect(4)
+    assert server.wait_reply(4, timeout=0.2) is None
+
+
+def test_idle_after_reply(server):
+    server.expect(0)
+    send_lines(server, "pose_reply 0 [0.0, -1.57, 1.57, 0.0, 1.57, 0.0]")
+    assert server.wait_reply(0, timeout=2) is not None
+    c0 = time.process_time()
+    time.sleep(1)
+    assert time.process_time() - c0 < 0.2
+
+
+def test_malformed_reply_dropped(server):
+    server.expect(5)
+    send_lines(server, "pose_reply x5 [0.0, 0.0, 0.0, 0.0, 0.0, 0.0]", "pose_reply 5 [1.0, 0.0, 0.0, 0.0, 0.0, 0.0]")
+    assert server.wait_reply(5, timeout=2) == [1.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+
+
+def test_close_pose_services_releases_port():
+    service = get_pose_service("localhost", 0)
+    assert get_pose_service("localhost", 0) is service
+    address = service.server_address
+    close_pose_services()
+    s = socket.socket()
+    s.bind(address)
+    s.close()
+    assert get_pose_service("localhost", 0) is not service
+    close_pose_services()
+
+
+def test_existing_server(server):
+    calls = []
+
+    class Service(PoseQueryService):
+        def query(self, *args):
+            calls.append(args)
+            return [0.0] * 6
+
+    service = Service(None, None, server=server)
+    assert service.server_address == server.server.server_address
+    assert get_current_pose_joints(None, None, "ur", 30002, send=True, service=service) == [0.0] * 6
+    assert calls == [("joints", "ur", 30002, None)]
@@ -0,0 +1,55 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from ur_fabrication_control.direct_control.communication import PoseStreamServer
+
+
+@pytest.fixture
+def server():
+    server = PoseStreamServer(ip="localhost", port=0)
+    server.start()
+    yield server
+    server.shutdown()
+
+
+def send_pose(server, x=0.1, delay=0.1):
+    # sent once wait_pose waits for the next pose
+    def send():
+        s = socket.create_connection(server.server.server_address)
+        s.sendall("pose_cartesian p[{}, 0.2, 0.3, 0.0, 3.14, 0.0]\n".format(x).encode())
+        s.close()
+    sender = threading.Timer(delay, send)
+    sender.start()
+    return sender
+
+
+def test_latest_pose(server):
+    sender = send_pose(server)
+    pose, t = server.wait_pose("cartesian", timeout=2)
+    sender.join()
+    assert pose == [0.1, 0.2, 0.3, 0.0, 3.14, 0.0]
+    assert abs(time.time() - t) < 1
+    assert server.get_pose("cartesian") == (pose, t)
+    assert server.get_pose("joints") is None
+
+
+def test_idle_after_pose(server):
+    sender = send_pose(server)
+    assert server.wait_pose("cartesian", timeout=2) is not None
+    sender.join()
+    c0 = time.process_time()
+    time.sleep(1)
+    assert time.process_time() - c0 < 0.2
+
+
+def test_pose_goes_stale(server):
+    sender = send_pose(server)
+    pose, t = server.wait_pose("cartesian", timeout=2)
+    sender.join()
+    time.sleep(0.3)
+    assert server.get_pose("cartesian") == (pose, t)
+    assert server.get_pose("cartesian", max_age=0.2) is None
+    assert server.wait_pose("cartesian", timeout=0.2) is None
@@ -0,0 +1,63 @@
+import math
+
+import pytest
+
+from ur_fabrication_control.direct_control.utilities import poses as poses_module
+from ur_fabrication_control.direct_control.utilities import simplify_path
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(poses_module, "np", None)
+    return request.param
+
+
+def line(n, noise=0.0):
+    # poses along x, every other one offset by noise in y
+    return [[0.01 * i, noise * (i % 2), 0.3, 0.0, math.pi, 0.0] for i in range(n)]
+
+
+def test_straight_line(backend):
+    indices, removed, deviation, angle_deviation = simplify_path(line(10), 1e-4)
+    assert indices == [0, 9]
+    assert removed == 8
+    assert deviation < 1e-12
+    assert angle_deviation is None
+
+
+def test_tolerance(backend):
+    poses = line(11, noise=1e-3)
+    assert simplify_path(poses, 1e-4)[0] == list(range(11))
+    indices, removed, deviation, _ = simplify_path(poses, 2e-3)
+    assert indices == [0, 10]
+    assert deviation == pytest.approx(1e-3)
+
+
+def test_corner_kept(backend):
+    poses = line(5) + [[0.04, 0.01 * i, 0.3, 0.0, math.pi, 0.0] for i in range(1, 5)]
+    assert simplify_path(poses, 1e-4)[0] == [0, 4, 8]
+
+
+def test_angle_tolerance(backend):
+    poses = line(5)
+    poses[2][3:6] = [0.0, math.pi - 0.1, 0.0]
+    assert simplify_path(poses, 1e-4)[0] == [0, 4]
+    indices, _, _, angle_deviation = simplify_path(poses, 1e-4, angle_tolerance=0.05)
+    assert 2 in indices
+    indices, _, _, angle_deviation = simplify_path(poses, 1e-4, angle_tolerance=0.2)
+    assert indices == [0, 4]
+    assert angle_deviation == pytest.approx(0.1, abs=1e-6)
+
+
+def test_short_paths(backend):
+    assert simplify_path([], 1e-3) == ([], 0, 0.0, None)
+    assert simplify_path(line(2), 1e-3) == ([0, 1], 0, 0.0, None)
+
+
+@pytest.mark.parametrize("tolerance, angle_tolerance", [(0, None), (-1e-3, None), (1e-3, 0)])
+def test_invalid_tolerance(tolerance, angle_tolerance):
+    with pytest.raises(ValueError):
+        simplify_path(line(5), tolerance, angle_tolerance)
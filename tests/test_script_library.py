@@ -0,0 +1,52 @@
+import re
+
+import pytest
+
+from ur_fabrication_control.direct_control import AIRPICK_LIBRARY, URScript
+
+DEFINITION = re.compile(r"^\s*(?:def|thread)\s+([A-Za-z_][A-Za-z0-9_]*)\s*\(", re.M)
+CALL = re.compile(r"\b([A-Za-z_][A-Za-z0-9_]*)\s*\(")
+
+
+def airpick_script(shake=True):
+    ur_cmds = URScript(ur_ip="127.0.0.1", ur_port=30002)
+    ur_cmds.start()
+    ur_cmds.add_airpick_commands(shake)
+    ur_cmds.airpick_on()
+    ur_cmds.end()
+    return ur_cmds.generate()
+
+
+@pytest.fixture
+def library_functions():
+    # nested definitions included
+    with open(AIRPICK_LIBRARY) as f:
+        return set(DEFINITION.findall(f.read()))
+
+
+def test_used_definitions_emitted(library_functions):
+    script = airpick_script()
+    defined = set(DEFINITION.findall(script))
+    called = set(CALL.findall(script)) & library_functions
+    assert "rq_vacuum_grip" in defined
+    # every call of a library function has its definition, the calls
+    # inside emitted definitions included
+    assert called <= defined
+    assert defined - {"program"} <= called
+
+
+def test_unused_definitions_dropped(library_functions):
+    script = airpick_script()
+    defined = set(DEFINITION.findall(script))
+    assert "rq_vacuum_release" not in defined
+    assert len(defined - {"program"}) < len(library_functions)
+    assert set(DEFINITION.findall(airpick_script(shake=False))) - {"program"} == library_functions
+
+
+def test_library_follows_header():
+    lines = airpick_script().split("\n")
+    assert lines[:2] == ["def program():", '\ttextmsg(">> Entering program.")']
+    first_def = next(i for i, line in enumerate(lines) if DEFINITION.match(line) and i > 0)
+    call = next(i for i, line in enumerate(lines) if line.strip().startswith("rq_vacuum_grip(advanced_mode=True"))
+    assert 2 < first_def < call
+    assert lines[call + 1:call + 3] == ['\ttextmsg("<< Exiting program.")', "end"]
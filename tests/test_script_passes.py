@@ -0,0 +1,77 @@
+from ur_fabrication_control.direct_control import URScript
+from ur_fabrication_control.direct_control import script_passes
+from ur_fabrication_control.direct_control.script_buffer import MOVEL, ScriptBuffer
+
+
+def program():
+    urscript = URScript(ur_ip="127.0.0.1", ur_port=30002)
+    urscript.start()
+    urscript.textmessage("Moving", string=True)
+    urscript.add_line("movel(p[0.1, 0.2, 0.3, 0.0, 3.14, 0.0], v=0.1, r=0.0)")
+    urscript.textmessage("current_pose")
+    urscript.end()
+    return urscript
+
+
+def test_is_literal_textmsg():
+    assert script_passes.is_literal_textmsg('"Moving"')
+    assert script_passes.is_literal_textmsg('"a \\" b", "c"')
+    assert not script_passes.is_literal_textmsg("current_pose")
+    assert not script_passes.is_literal_textmsg('"pose: ", current_pose')
+
+
+def test_minify_removes_literal_textmsgs_across_sections():
+    lines = program().generate(minify=True).split("\n")
+    assert not [line for line in lines if "textmsg(\"" in line]
+    assert "textmsg(current_pose)" in lines
+
+
+def test_empty_block_keeps_one_textmsg():
+    urscript = URScript(ur_ip="127.0.0.1", ur_port=30002)
+    urscript.start()
+    urscript.add_line("if True:")
+    urscript.textmessage("inside", string=True, to_dict="commands")
+    urscript.add_line("end")
+    urscript.end()
+    lines = urscript.generate(minify=True).split("\n")
+    assert lines == ["def program():", "if True:", 'textmsg("inside")', "end", "end", "program()"]
+
+
+def test_optimize_runs_textmsgs_on_whole_program():
+    urscript = program()
+    report = urscript.optimize()
+    assert report["remove_textmsgs"] == 3
+    assert "<< Exiting" not in urscript.generate()
+    assert "textmsg(current_pose)" in urscript.generate()
+
+
+def test_remove_textmsgs_single_buffer():
+    buffer = ScriptBuffer()
+    buffer.append_op(script_passes.TEXTMSG, '"a"')
+    buffer.append_op(script_passes.RAW, "sleep(0.1)")
+    buffer.append_op(script_passes.TEXTMSG, "x")
+    assert script_passes.optimize(buffer, [script_passes.remove_textmsgs]) == {"remove_textmsgs": 1}
+    assert len(buffer) == 2
+
+
+def waypoints_between(*lines):
+    buffer = ScriptBuffer()
+    move = (0.1, 0.2, 0.3, 0.0, 3.14, 0.0, 0.1, 0.0)
+    buffer.append_op(MOVEL, move)
+    for line in lines:
+        buffer.append(line)
+    buffer.append_op(MOVEL, move)
+    script_passes.remove_duplicate_waypoints(buffer)
+    return len([op for _pos, op, _indent, _args in buffer.ops() if op == MOVEL])
+
+
+def test_duplicate_waypoint_after_inert_lines_removed():
+    assert waypoints_between() == 1
+    assert waypoints_between("# comment", 'textmsg("at pick")', "i = 0", "global q[1] = 2.0") == 1
+
+
+def test_duplicate_waypoint_after_calls_kept():
+    assert waypoints_between("rq_vacuum_grip()") == 2
+    assert waypoints_between("set_digital_out(0, True)") == 2
+    assert waypoints_between("p = get_actual_tcp_pose()") == 2
+    assert waypoints_between("if i == 0:", "end") == 2
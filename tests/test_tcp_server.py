@@ -0,0 +1,61 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from ur_fabrication_control.direct_control.communication import TCPFeedbackServer
+
+
+@pytest.fixture
+def server():
+    server = TCPFeedbackServer(ip="localhost", port=0)
+    server.start()
+    yield server
+    server.shutdown()
+
+
+def send_lines(server, *lines):
+    s = socket.create_connection(server.server.server_address)
+    f = s.makefile('rb')
+    for line in lines:
+        s.sendall("{}\n".format(line).encode())
+        f.readline()
+    f.close()
+    s.close()
+
+
+def test_messages_parsed(server):
+    send_lines(server, "Hello", "[0.11, 0.11, 0.11]", "Done")
+    assert server.wait_for("Done", timeout=2)
+    assert server.msgs.items() == [(0, "Hello"), (1, [0.11, 0.11, 0.11]), (2, "Done")]
+
+
+def test_wait_for_wakes_on_message(server):
+    t = threading.Timer(0.2, send_lines, args=(server, "Task_1_complete"))
+    t.start()
+    t0 = time.time()
+    c0 = time.process_time()
+    assert server.wait_for("Task_1_complete", timeout=2)
+    assert time.time() - t0 < 1
+    assert time.process_time() - c0 < 0.1
+    t.join()
+
+
+def test_wait_for_timeout_without_spinning(server):
+    send_lines(server, "a")
+    assert server.wait_for("a", timeout=2)
+    c0 = time.process_time()
+    assert not server.wait_for("b", timeout=1)
+    assert not server.wait_for(lambda msg: msg == "b", timeout=0.5)
+    assert time.process_time() - c0 < 0.2
+
+
+def test_clear(server):
+    send_lines(server, "a")
+    assert server.wait_for("a", timeout=2)
+    server.clear()
+    assert len(server.msgs) == 0
+    send_lines(server, "b")
+    assert server.wait_for("b", timeout=2)
+    assert server.msgs.keys() == [0]
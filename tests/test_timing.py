@@ -0,0 +1,95 @@
+import csv
+import json
+
+import pytest
+
+from ur_fabrication_control.direct_control.fabrication_process import TaskTimer, percentile
+
+
+class FakeClock(object):
+    def __init__(self, t=100.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+class Task(object):
+    def estimate_node(self, node, elapsed):
+        return (-1 if node is None else node) + elapsed
+
+
+@pytest.fixture
+def timer():
+    clock = FakeClock()
+    timer = TaskTimer(clock)
+
+    def at(t, event, *args):
+        clock.t = 100.0 + t
+        getattr(timer, event)(*args)
+
+    at(0, "sent", 0, "pick", "a")
+    at(1, "node", 0, 0)
+    at(2, "node", 0, 1)
+    at(4, "exit", 0)
+    at(5, "sent", 1, "pick", "a")
+    at(7, "exit", 1)
+    at(7, "sent", 2, "place", "a")
+    at(10, "exit", 2)
+    at(10, "sent", 3, "place", "a")
+    at(10.5, "node", 3, 0)
+    clock.t = 111.0
+    return timer
+
+
+def test_durations(timer):
+    rows = timer.rows()
+    assert [row["key"] for row in rows] == [0, 1, 2, 3]
+    assert [row["duration"] for row in rows] == [4.0, 2.0, 3.0, None]
+    assert [row["idle_before"] for row in rows] == [None, 1.0, 0.0, 0.0]
+    assert [row["first_node"] for row in rows] == [1.0, None, None, 10.5]
+    assert [row["nodes"] for row in rows] == [2, 0, 0, 1]
+
+
+def test_summary(timer):
+    summary = timer.summary()
+    assert summary["types"] == {
+        "pick": {"count": 2, "p50": 3.0, "p95": 3.9, "mean": 3.0},
+        "place": {"count": 1, "p50": 3.0, "p95": 3.0, "mean": 3.0}}
+    assert summary["idle"] == {"count": 3, "p50": 0.0, "p95": pytest.approx(0.9), "total": 1.0}
+    assert summary["completed"] == 3
+    # 3 tasks in 10 s
+    assert summary["elements_per_hour"] == 1080.0
+
+
+def test_progress(timer):
+    assert timer.progress(3, Task()) == 0.5
+    assert timer.progress(3, object()) is None
+    assert timer.progress(4, Task()) is None
+
+
+def test_reports(timer, tmpdir):
+    path = str(tmpdir.join("tasks.csv"))
+    timer.to_csv(path)
+    with open(path) as f:
+        rows = list(csv.DictReader(f))
+    assert [row["duration"] for row in rows] == ["4.0", "2.0", "3.0", ""]
+    path = str(tmpdir.join("tasks.json"))
+    timer.to_json(path)
+    with open(path) as f:
+        report = json.load(f)
+    assert report["summary"]["completed"] == 3
+    assert len(report["tasks"]) == 4
+
+
+def test_clear(timer):
+    timer.clear()
+    assert timer.rows() == []
+    assert timer.now() == 0.0
+    assert timer.summary()["elements_per_hour"] is None
+
+
+def test_percentile():
+    assert percentile([], 50) is None
+    assert percentile([3.0, 1.0, 2.0], 50) == 2.0
+    assert percentile([1.0, 2.0], 100) == 2.0
@@ -0,0 +1,30 @@
+import pytest
+
+from ur_fabrication_control.direct_control import URScript
+
+np = pytest.importorskip("numpy")
+
+
+def moves_array(velocity, radius):
+    ur_cmds = URScript(ur_ip="127.0.0.1", ur_port=30002)
+    ur_cmds.start()
+    ur_cmds.moves_linear_array(np.zeros((3, 6)), velocity, radius)
+    ur_cmds.end()
+    return ur_cmds.generate()
+
+
+@pytest.mark.parametrize("velocity, radius", [
+    (0.5, 0),
+    (np.float64(0.5), np.int64(0)),
+    (np.float32(0.5), np.float32(0.0)),
+])
+def test_moves_array_scalars(velocity, radius):
+    script = moves_array(velocity, radius)
+    assert "movel(path_0[path_i], v=0.5, r=0" in script
+    assert "path_0_v" not in script
+
+
+def test_moves_array_per_move_values():
+    script = moves_array(np.array([0.1, 0.2, 0.3]), 0)
+    assert "path_0_v = [0.1, 0.2, 0.3]" in script
+    assert "v=path_0_v[path_i], r=0" in script
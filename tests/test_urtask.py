@@ -0,0 +1,105 @@
+import pytest
+
+from ur_fabrication_control.direct_control import URScript
+from ur_fabrication_control.direct_control.fabrication_process import URTask
+
+
+class Frame(object):
+    def __init__(self, point, axis_angle_vector=(0.0, 3.14, 0.0)):
+        self.point = point
+        self.axis_angle_vector = list(axis_angle_vector)
+
+
+class Node(object):
+    def __init__(self, node_type, point, robot_vel=0.1):
+        self.type = node_type
+        self.frame = Frame(point)
+        self.robot_vel = robot_vel
+        self.radius = 0.0
+
+
+class Tool(object):
+    frame = Frame([0.0, 0.0, 0.1], [0.0, 0.0, 0.0])
+
+
+class Robot(object):
+    attached_tool = Tool()
+
+
+class Server(object):
+    ip = "127.0.0.1"
+    port = 50002
+    name = "Feedback"
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    # generate the scripts without connecting to a robot
+    monkeypatch.setattr(URScript, "prepare", lambda self, minify=False, pool=None: self.generate(minify))
+
+
+def path(linear=10, process=5):
+    return ([Node("linear", [0.01 * i, 0.0, 0.0]) for i in range(linear)] +
+            [Node("process", [0.1, 0.01 * i, 0.0]) for i in range(1, process + 1)])
+
+
+def task_from_nodes(nodes, **kwargs):
+    task = URTask.from_nodes(Robot(), ("127.0.0.1", 30002), nodes, key=7, **kwargs)
+    task.server = Server()
+    return task
+
+
+def node_messages(task):
+    return [line for line in task.urscript.script.splitlines() if "'NODE'" in line or '"@' in line]
+
+
+def test_resume_recreates_script_from_start_node():
+    task = task_from_nodes(path())
+    task.prepare()
+    assert len(node_messages(task)) == 15
+    task.start_node = 12
+    assert task.urscript is None
+    task.prepare()
+    assert task.feedback_nodes == [12, 13, 14]
+    assert len(node_messages(task)) == 3
+
+
+def test_resume_given_urscript_is_reported():
+    urscript = URScript(ur_ip="127.0.0.1", ur_port=30002)
+    task = URTask.from_urscript(Robot(), ("127.0.0.1", 30002), urscript, key=7)
+    logged = []
+    task.log = logged.append
+    task.start_node = 3
+    assert task.urscript is urscript
+    assert "can not start at node 3" in logged[0]
+
+
+@pytest.mark.parametrize("feedback, expected", [
+    ("node", list(range(15))),
+    (1, list(range(15))),
+    (4, [3, 7, 11, 14]),
+    (5, [4, 9, 14]),
+    ("segment", [9, 14]),
+    (None, [14]),
+])
+def test_feedback_nodes(feedback, expected):
+    task = task_from_nodes(path(), feedback=feedback)
+    task.prepare()
+    assert task.feedback_nodes == expected
+    assert len(node_messages(task)) == len(expected)
+
+
+def test_feedback_nodes_after_start_node():
+    task = task_from_nodes(path(), feedback=4)
+    task.start_node = 5
+    task.prepare()
+    assert task.feedback_nodes == [8, 12, 14]
+
+
+@pytest.mark.parametrize("feedback", [0, -2, 1.5, True, "every"])
+def test_invalid_feedback(feedback):
+    with pytest.raises(ValueError):
+        task_from_nodes(path(), feedback=feedback)
+    task = task_from_nodes(path())
+    with pytest.raises(ValueError):
+        task.create_urscript_from_nodes(path(), feedback=feedback)